@@ -0,0 +1,82 @@
+"""
+Alembic environment
+Migrations run against settings.DATABASE_URL with the sync driver, and
+autogenerate compares against the models in app.db.models.
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+from app.core.config import settings
+from app.db.database import Base
+from app.db import models  # noqa: F401  (registers the tables on Base.metadata)
+
+config = context.config
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL.replace("%", "%%"))
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# SQLite cannot ALTER constraints in place; batch mode recreates the table instead
+render_as_batch = settings.DATABASE_URL.startswith("sqlite")
+
+# Full-text search objects created by migration 0008 outside the models: the
+# FTS5 table (and its shadow tables) on SQLite, the tsvector column and its
+# GIN index on Postgres. Without this, autogenerate would drop them.
+SEARCH_INDEX_TABLE_PREFIX = "life_events_fts"
+SEARCH_INDEX_COLUMN = ("life_events", "search_vector")
+SEARCH_INDEX_NAME = "ix_life_events_search_vector"
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """Leave the full-text search objects out of autogenerate comparisons"""
+    if type_ == "table":
+        return not (name or "").startswith(SEARCH_INDEX_TABLE_PREFIX)
+    if type_ == "column":
+        return (parent_names.get("table_name"), name) != SEARCH_INDEX_COLUMN
+    if type_ == "index":
+        return name != SEARCH_INDEX_NAME
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL without connecting (alembic upgrade head --sql)"""
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=render_as_batch,
+        include_name=include_name
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=render_as_batch,
+            include_name=include_name
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,91 @@
+"""Stored analyses, insight cache, forecast state and event idempotency keys
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:05:00
+
+Objects that already exist are skipped, since the app's startup create_all
+may have created the new tables (but not the new columns) on an older database.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _inspector():
+    return None if context.is_offline_mode() else sa.inspect(op.get_bind())
+
+
+def _has_table(inspector, table: str) -> bool:
+    return inspector is not None and inspector.has_table(table)
+
+
+def _has_column(inspector, table: str, column: str) -> bool:
+    return inspector is not None and column in {c["name"] for c in inspector.get_columns(table)}
+
+
+def _has_index(inspector, table: str, index: str) -> bool:
+    return inspector is not None and index in {i["name"] for i in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    inspector = _inspector()
+
+    with op.batch_alter_table("analyses") as batch_op:
+        if not _has_column(inspector, "analyses", "result_data"):
+            batch_op.add_column(sa.Column("result_data", sa.Text(), nullable=True))
+        if not _has_column(inspector, "analyses", "events_fingerprint"):
+            batch_op.add_column(sa.Column("events_fingerprint", sa.String(length=64), nullable=True))
+        if not _has_index(inspector, "analyses", "ix_analyses_user_id"):
+            batch_op.create_index("ix_analyses_user_id", ["user_id"])
+
+    if not _has_column(inspector, "life_events", "idempotency_key"):
+        with op.batch_alter_table("life_events") as batch_op:
+            batch_op.add_column(sa.Column("idempotency_key", sa.String(length=128), nullable=True))
+            batch_op.create_unique_constraint("uq_life_events_user_idempotency_key", ["user_id", "idempotency_key"])
+
+    if not _has_table(inspector, "insight_cache"):
+        op.create_table(
+            "insight_cache",
+            sa.Column("key", sa.String(length=64), nullable=False),
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("value", sa.Text(), nullable=False),
+            sa.Column("expires_at", sa.DateTime(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("key")
+        )
+        op.create_index("ix_insight_cache_user_id", "insight_cache", ["user_id"])
+
+    if not _has_table(inspector, "forecast_states"):
+        op.create_table(
+            "forecast_states",
+            sa.Column("user_id", sa.String(), nullable=False),
+            sa.Column("state_data", sa.Text(), nullable=True),
+            sa.Column("forecast_data", sa.Text(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("user_id")
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("forecast_states")
+    op.drop_index("ix_insight_cache_user_id", table_name="insight_cache")
+    op.drop_table("insight_cache")
+
+    with op.batch_alter_table("life_events") as batch_op:
+        batch_op.drop_constraint("uq_life_events_user_idempotency_key", type_="unique")
+        batch_op.drop_column("idempotency_key")
+
+    with op.batch_alter_table("analyses") as batch_op:
+        batch_op.drop_index("ix_analyses_user_id")
+        batch_op.drop_column("events_fingerprint")
+        batch_op.drop_column("result_data")
@@ -0,0 +1,44 @@
+"""Composite (user_id, year, month, id) index on life_events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 09:10:00
+
+Per-user event reads filter on user_id and order by (year, month, id); with
+this index they are a range scan in index order instead of a full table scan
+plus a sort, and keyset pages start directly at the cursor. On Postgres the
+index is built CONCURRENTLY so writes to life_events are not blocked.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX_NAME = "ix_life_events_user_year_month_id"
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        existing = {i["name"] for i in sa.inspect(op.get_bind()).get_indexes("life_events")}
+        if INDEX_NAME in existing:
+            return
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            "life_events",
+            ["user_id", "year", "month", "id"],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX_NAME, table_name="life_events", postgresql_concurrently=True)
@@ -0,0 +1,34 @@
+"""Add life_events.description_hash
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 11:30:00
+
+Records the sha256 of the description each stored rephrasing was made from,
+so analyses only send new or edited events to the model for rephrasing.
+Existing rows start without a hash and are rephrased once more.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        columns = {c["name"] for c in sa.inspect(op.get_bind()).get_columns("life_events")}
+        if "description_hash" in columns:
+            return
+    op.add_column("life_events", sa.Column("description_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("life_events") as batch_op:
+        batch_op.drop_column("description_hash")
@@ -0,0 +1,53 @@
+"""Add the analysis_jobs queue table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 12:10:00
+
+Backs POST /api/analyze/jobs. Workers claim jobs by (status, priority,
+created_at), so that is the one composite index.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("analysis_jobs"):
+        return
+    op.create_table(
+        "analysis_jobs",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("force", sa.Boolean(), nullable=False),
+        sa.Column("webhook_url", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("locked_by", sa.String(length=64), nullable=True),
+        sa.Column("locked_until", sa.DateTime(), nullable=True),
+        sa.Column("analysis_id", sa.Integer(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["analysis_id"], ["analyses.id"]),
+        sa.PrimaryKeyConstraint("id")
+    )
+    op.create_index("ix_analysis_jobs_user_id", "analysis_jobs", ["user_id"])
+    op.create_index("ix_analysis_jobs_claim", "analysis_jobs", ["status", "priority", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_jobs_claim", table_name="analysis_jobs")
+    op.drop_index("ix_analysis_jobs_user_id", table_name="analysis_jobs")
+    op.drop_table("analysis_jobs")
@@ -0,0 +1,42 @@
+"""Add the cohort_bins table for cohort statistics
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 15:40:00
+
+Backs GET /api/cohorts. Rows are kept up to date by the event write paths;
+events stored before this revision are counted by running
+`python -m app.services.cohort_stats --rebuild` once.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("cohort_bins"):
+        return
+    op.create_table(
+        "cohort_bins",
+        sa.Column("birth_decade", sa.Integer(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("phase", sa.String(length=16), nullable=False),
+        sa.Column("score_bin", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("birth_decade", "year", "phase", "score_bin")
+    )
+    op.create_index("ix_cohort_bins_updated_at", "cohort_bins", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cohort_bins_updated_at", table_name="cohort_bins")
+    op.drop_table("cohort_bins")
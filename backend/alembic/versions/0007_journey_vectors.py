@@ -0,0 +1,42 @@
+"""Add the journey_vectors table for similar-journey search
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 17:20:00
+
+Backs GET /api/users/{user_id}/similar. Rows are kept up to date by the
+event write paths; users whose events were stored before this revision are
+indexed by running `python -m app.services.journey_index --rebuild` once.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table("journey_vectors"):
+        return
+    op.create_table(
+        "journey_vectors",
+        sa.Column("row_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("row_id"),
+        sa.UniqueConstraint("user_id")
+    )
+    op.create_index("ix_journey_vectors_updated_at", "journey_vectors", ["updated_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_journey_vectors_updated_at", table_name="journey_vectors")
+    op.drop_table("journey_vectors")
@@ -0,0 +1,83 @@
+"""Add the full-text index over life event descriptions
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 18:40:00
+
+Backs GET /api/events/{user_id}/search:
+- SQLite: life_events_fts, an external-content FTS5 table kept in step with
+  life_events by triggers, built from the existing rows here
+- Postgres (12+): a generated life_events.search_vector tsvector column with
+  a GIN index (adding it rewrites the table once)
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_UPGRADE = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS life_events_fts USING fts5(
+        user_id, description, rephrased_description,
+        content='life_events', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_insert AFTER INSERT ON life_events BEGIN
+        INSERT INTO life_events_fts(rowid, user_id, description, rephrased_description)
+        VALUES (new.id, new.user_id, new.description, new.rephrased_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_delete AFTER DELETE ON life_events BEGIN
+        INSERT INTO life_events_fts(life_events_fts, rowid, user_id, description, rephrased_description)
+        VALUES ('delete', old.id, old.user_id, old.description, old.rephrased_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_update
+    AFTER UPDATE OF user_id, description, rephrased_description ON life_events BEGIN
+        INSERT INTO life_events_fts(life_events_fts, rowid, user_id, description, rephrased_description)
+        VALUES ('delete', old.id, old.user_id, old.description, old.rephrased_description);
+        INSERT INTO life_events_fts(rowid, user_id, description, rephrased_description)
+        VALUES (new.id, new.user_id, new.description, new.rephrased_description);
+    END
+    """,
+    # Index the rows stored before this revision (also repairs a table the app created on startup)
+    "INSERT INTO life_events_fts(life_events_fts) VALUES ('rebuild')"
+)
+
+POSTGRES_UPGRADE = (
+    """
+    ALTER TABLE life_events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', description || ' ' || coalesce(rephrased_description, ''))
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_life_events_search_vector ON life_events USING gin (search_vector)"
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+    statements = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+    if dialect == "sqlite":
+        for trigger in ("life_events_fts_insert", "life_events_fts_delete", "life_events_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS life_events_fts")
+    elif dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_life_events_search_vector")
+        op.execute("ALTER TABLE life_events DROP COLUMN IF EXISTS search_vector")
@@ -1,163 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import logging
 
-from app.db.database import get_db
-from app.db.models import User, LifeEvent, Analysis
-from app.schemas.schemas import AnalysisRequest, AnalysisResponse
-from app.services.prediction_service import generate_statistical_forecast
-from app.services.llm_service import generate_llm_insights
-from app.services.insights_service import generate_insight_cards
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.instrumentation import ANALYSES, StageTimer
+from app.db.database import AsyncSessionLocal, get_db
+from app.db.models import User
+from app.schemas.schemas import AnalysisJobRequest, AnalysisJobResponse, AnalysisRequest, AnalysisResponse
+from app.services.analysis_service import (
+    compute_analysis,
+    events_fingerprint,
+    load_latest_analysis,
+    stored_analysis_response,
+    stream_analysis
+)
+from app.services.analysis_coalescer import analysis_coalescer
+from app.services.analysis_jobs import enqueue_job, job_response, load_job
+from app.services.event_query import user_events_query
+from app.services.webhooks import resolve_webhook_url
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 
 @router.post("/analyze", response_model=AnalysisResponse)
-async def analyze_life_journey(request: AnalysisRequest, db: Session = Depends(get_db)):
+async def analyze_life_journey(request: AnalysisRequest, response: Response, db: AsyncSession = Depends(get_db)):
     """
     Analyze user's life journey and generate:
     - Statistical predictions (ARIMA/Exponential Smoothing)
     - LLM-based predictions with reasoning
     - Rephrased event descriptions
     - Personalized insights and recommendations
+
+    If the latest stored analysis was computed from the same events it is
+    returned as-is, unless `force` is set. Concurrent requests for the same
+    user and events share one computation (X-Analysis-Source: coalesced).
+    The statistical forecast and the LLM call run concurrently; per-stage
+    durations are returned in the Server-Timing header.
     """
-    print("=" * 80)
-    print("🔵 BACKEND: Starting analysis")
-    print(f"🔵 BACKEND: User ID: {request.user_id}")
-    
-    # Verify user exists
-    user = db.query(User).filter(User.id == request.user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    logger.debug("Starting analysis for user %s", request.user_id)
+    timer = StageTimer()
     
-    print(f"🔵 BACKEND: Found user: {user.name}, DOB: {user.dob}")
-    
-    # Fetch all events
-    events = db.query(LifeEvent).filter(
-        LifeEvent.user_id == request.user_id
-    ).order_by(LifeEvent.year, LifeEvent.month).all()
+    with timer.stage("fetch"):
+        # Verify user exists
+        user = await db.get(User, request.user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        # Fetch all events
+        events = (await db.execute(user_events_query(request.user_id))).scalars().all()
     
     if not events:
         raise HTTPException(status_code=400, detail="No life events found for analysis")
     
-    print(f"🔵 BACKEND: Found {len(events)} events")
-    for i, event in enumerate(events, 1):
-        print(f"🔵 BACKEND:   Event {i}: {event.year}/{event.month} - Score: {event.score} - {event.description[:50]}...")
+    logger.debug("User %s has %d events", request.user_id, len(events))
+    
+    fingerprint = events_fingerprint(events)
+    if not request.force:
+        with timer.stage("stored"):
+            stored = await load_latest_analysis(db, request.user_id)
+        if stored and stored.events_fingerprint == fingerprint:
+            ANALYSES.inc("stored")
+            response.headers["X-Analysis-Source"] = "stored"
+            response.headers["Server-Timing"] = timer.server_timing()
+            return AnalysisResponse(**stored_analysis_response(stored, fingerprint))
     
     try:
-        # Generate statistical forecast
-        print("🔵 BACKEND: Generating statistical forecast...")
-        statistical_forecast_raw = generate_statistical_forecast(events)
-        # Format to match ForecastPoint schema (remove month if present)
-        statistical_forecast = []
-        for f in statistical_forecast_raw:
-            statistical_forecast.append({
-                "year": f.get("year", 2025),
-                "score": f.get("score", 5.0),
-                "phase": f.get("phase", "Moderate"),
-                "reasoning": None
-            })
-        print(f"🔵 BACKEND: Statistical forecast generated: {len(statistical_forecast)} points")
-        print(f"🔵 BACKEND: First prediction: {statistical_forecast[0] if statistical_forecast else 'None'}")
-        
-        # Generate LLM insights (includes rephrased descriptions, predictions, insights)
-        print("🔵 BACKEND: Calling OpenAI for LLM insights...")
-        llm_results = await generate_llm_insights(user, events)
-        print(f"🔵 BACKEND: LLM results received!")
-        print(f"🔵 BACKEND: Hero heading: {llm_results.get('hero_heading', 'N/A')[:100]}")
-        print(f"🔵 BACKEND: LLM forecast points: {len(llm_results.get('llm_forecast', []))}")
-        print(f"🔵 BACKEND: Actionable insights: {len(llm_results.get('actionable_insights', []))}")
-        print(f"🔵 BACKEND: Personalized plan items: {len(llm_results.get('personalized_plan', []))}")
-        
-        # Ensure llm_forecast is properly formatted
-        llm_forecast = llm_results.get("llm_forecast", [])
-        if llm_forecast:
-            # Ensure each forecast point has required fields
-            formatted_forecast = []
-            for f in llm_forecast:
-                if isinstance(f, dict):
-                    formatted_forecast.append({
-                        "year": f.get("year", 2025),
-                        "score": f.get("score", 5.0),
-                        "phase": f.get("phase", "Moderate"),
-                        "reasoning": f.get("reasoning", "")
-                    })
-            llm_results["llm_forecast"] = formatted_forecast
-        
-        # Update events with rephrased descriptions
-        for event in events:
-            if str(event.id) in llm_results.get("rephrased_events", {}):
-                event.rephrased_description = llm_results["rephrased_events"][str(event.id)]
-        db.commit()
-        
-        # Build timeline
-        timeline = []
-        for event in events:
-            timeline.append({
-                "year": event.year,
-                "month": event.month,
-                "score": event.score,
-                "phase": event.phase,
-                "event": event.description,
-                "rephrased": event.rephrased_description
-            })
-        
-        # Generate insight cards
-        print("🔵 BACKEND: Generating insight cards...")
-        insights = generate_insight_cards(events, statistical_forecast, llm_results)
-        print(f"🔵 BACKEND: Generated {len(insights)} insight cards")
-        print(f"🔵 BACKEND: Insight keys: {list(insights.keys())}")
-        
-        # Format personalized plan
-        actionable_insights = llm_results.get("actionable_insights", [])
-        personalized_plan = llm_results.get("personalized_plan", [])
-        
-        # Combine and format
-        plan_items = []
-        if actionable_insights:
-            plan_items = actionable_insights
-        elif personalized_plan:
-            plan_items = personalized_plan
-        
-        print(f"🔵 BACKEND: Plan items: {len(plan_items)}")
-        
-        # Store analysis
-        analysis = Analysis(
-            user_id=request.user_id,
-            hero_heading=llm_results.get("hero_heading", "Your Emotional Journey"),
-            summary=llm_results.get("summary", "Here's your life timeline."),
-            insights_data=str(insights)  # Store as JSON string
-        )
-        db.add(analysis)
-        db.commit()
-        
-        response_data = AnalysisResponse(
-            hero_heading=llm_results.get("hero_heading", "Your Emotional Journey"),
-            summary=llm_results.get("summary", "Here's your emotional timeline."),
-            timeline=timeline,
-            statistical_forecast=statistical_forecast,
-            llm_forecast=llm_results.get("llm_forecast", []),
-            insights=insights,
-            personalized_plan=plan_items
-        )
-        
-        print("🔵 BACKEND: Final response ready!")
-        print(f"🔵 BACKEND: Timeline events: {len(timeline)}")
-        print(f"🔵 BACKEND: Statistical forecast: {len(statistical_forecast)}")
-        print(f"🔵 BACKEND: LLM forecast: {len(llm_results.get('llm_forecast', []))}")
-        print(f"🔵 BACKEND: Insights cards: {len(insights)}")
-        print(f"🔵 BACKEND: Personalized plan: {len(llm_results.get('personalized_plan', []))}")
-        print("=" * 80)
-        
+        with timer.stage("coalesce"):
+            (result, source), coalesced = await analysis_coalescer.run(
+                request.user_id,
+                fingerprint,
+                lambda: compute_analysis(request.user_id, fingerprint, request.force, timer)
+            )
+        response_data = AnalysisResponse(**result)
+        source = "coalesced" if coalesced else source
+        ANALYSES.inc(source)
+        response.headers["X-Analysis-Source"] = source
+        response.headers["Server-Timing"] = timer.server_timing()
+        logger.debug("Analysis %s for user %s ready (%s): %s", response_data.analysis_id, request.user_id, source, timer.server_timing())
         return response_data
     
     except Exception as e:
-        import traceback
-        print("=" * 80)
-        print("🔵 BACKEND: ❌ ERROR OCCURRED!")
-        print(f"🔵 BACKEND: Error type: {type(e).__name__}")
-        print(f"🔵 BACKEND: Error message: {str(e)}")
-        print("🔵 BACKEND: Full traceback:")
-        traceback.print_exc()
-        print("=" * 80)
+        logger.exception("Analysis for user %s failed", request.user_id)
         raise HTTPException(status_code=500, detail=f"Error during analysis: {str(e)}")
 
+
+@router.post("/analyze/jobs", response_model=AnalysisJobResponse, status_code=202)
+async def create_analysis_job(request: AnalysisJobRequest, response: Response, db: AsyncSession = Depends(get_db)):
+    """
+    Queue the same analysis as POST /analyze and return immediately. Poll the
+    job (Location header) until its status is `succeeded` or `failed`, or pass
+    `webhook_url` to be POSTed the job status when it finishes. Higher
+    `priority` jobs are run first.
+    """
+    user = await db.get(User, request.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    has_events = (await db.execute(user_events_query(request.user_id).limit(1))).scalars().first()
+    if not has_events:
+        raise HTTPException(status_code=400, detail="No life events found for analysis")
+    
+    if request.webhook_url:
+        try:
+            await resolve_webhook_url(request.webhook_url)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    job = await enqueue_job(db, request.user_id, request.force, request.priority, request.webhook_url)
+    response.headers["Location"] = f"/api/analyze/jobs/{job.id}"
+    response.headers["Retry-After"] = "1"
+    return AnalysisJobResponse(**job_response(job))
+
+
+@router.get("/analyze/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(job_id: str, response: Response, db: AsyncSession = Depends(get_db)):
+    """Status of a queued analysis; `result` holds the analysis once it has succeeded"""
+    job = await load_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] in ("queued", "running"):
+        response.headers["Retry-After"] = "1"
+    return AnalysisJobResponse(**job)
+
+
+@router.get("/analyze/stream")
+async def stream_life_journey_analysis(user_id: str, force: bool = False):
+    """
+    Same analysis as POST /analyze, streamed as Server-Sent Events so the
+    client can render the statistical forecast and each LLM section as soon
+    as it is ready instead of waiting for the whole response. The analysis is
+    stored when the stream completes; see stream_analysis for the event types.
+    """
+    # The stream outlives the request scope, so it gets a session of its own
+    db = AsyncSessionLocal()
+    try:
+        user = await db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        events = (await db.execute(user_events_query(user_id))).scalars().all()
+        if not events:
+            raise HTTPException(status_code=400, detail="No life events found for analysis")
+    except Exception:
+        await db.close()
+        raise
+    
+    logger.debug("Streaming analysis for user %s (%d events)", user_id, len(events))
+    return StreamingResponse(
+        stream_analysis(user, events, db, force),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/analysis/{user_id}", response_model=AnalysisResponse)
+async def get_latest_analysis(user_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Return the most recent stored analysis for a user without recomputing.
+    `stale` is true when the user's events changed after it was generated.
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    stored = await load_latest_analysis(db, user_id)
+    if not stored:
+        raise HTTPException(status_code=404, detail="No analysis found for this user")
+    
+    events = (await db.execute(user_events_query(user_id))).scalars().all()
+    return AnalysisResponse(**stored_analysis_response(stored, events_fingerprint(events)))
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+
+from app.schemas.schemas import CohortListResponse, CohortResponse, CohortSummary
+from app.services.cohort_stats import cohort_stats
+
+router = APIRouter()
+
+
+@router.get("/cohorts", response_model=CohortListResponse)
+async def list_cohorts():
+    """Birth decades that have cohort statistics"""
+    return CohortListResponse(birth_decades=cohort_stats.decades())
+
+
+@router.get("/cohorts/{birth_decade}", response_model=CohortResponse)
+async def get_cohort(birth_decade: int):
+    """
+    Score percentiles, mean and phase distribution of everyone born in
+    `birth_decade` (e.g. 1980), across all years and per calendar year.
+    Served from memory.
+    """
+    overall = cohort_stats.summary(birth_decade)
+    if not overall:
+        raise HTTPException(status_code=404, detail="No events for this cohort")
+    
+    return CohortResponse(
+        birth_decade=birth_decade,
+        overall=overall,
+        years=[cohort_stats.summary(birth_decade, year) for year in cohort_stats.years(birth_decade)]
+    )
+
+
+@router.get("/cohorts/{birth_decade}/{year}", response_model=CohortSummary)
+async def get_cohort_year(
+    birth_decade: int,
+    year: int,
+    score: Optional[float] = Query(None, ge=-10, le=10, description="Also return this score's percentile rank in the cohort")
+):
+    """
+    One cohort in one calendar year, e.g. how people born in the 1980s felt
+    in 2020. With `score`, `percentile_rank` says where that score falls.
+    """
+    summary = cohort_stats.summary(birth_decade, year)
+    if not summary:
+        raise HTTPException(status_code=404, detail="No events for this cohort and year")
+    
+    if score is None:
+        return summary
+    return {**summary, "percentile_rank": cohort_stats.percentile_rank(birth_decade, year, score)}
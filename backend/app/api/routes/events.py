@@ -1,93 +1,175 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 
+from app.core.config import settings
 from app.db.database import get_db
 from app.db.models import User, LifeEvent
 from app.schemas.schemas import (
     LifeEventsRequest,
     LifeEventsResponse,
     UserEventsResponse,
-    LifeEventResponse
+    LifeEventResponse,
+    EventSearchHit,
+    EventSearchResponse
 )
+from app.services.cohort_stats import cohort_stats, record_cohort_events
+from app.services.event_ingest import bulk_insert_events
+from app.services.event_query import decode_cursor, iter_user_events, user_events_page, user_events_query
+from app.services.event_search import event_search
+from app.services.insight_cache import insight_cache
+from app.services.journey_index import journey_index
 
 router = APIRouter()
 
 
 @router.post("/life-events", response_model=LifeEventsResponse)
-async def create_life_events(request: LifeEventsRequest, db: Session = Depends(get_db)):
+async def create_life_events(request: LifeEventsRequest, db: AsyncSession = Depends(get_db)):
     """
     Store multiple life events for a user.
-    Each event includes year, month, phase, score, and description.
+    Each event includes year, month, phase, score, and description, plus an
+    optional idempotency_key so retried uploads are not stored twice.
     """
     # Verify user exists
-    user = db.query(User).filter(User.id == request.user_id).first()
+    user = await db.get(User, request.user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    dob = user.dob
+    
+    async def record_cohorts(session: AsyncSession, rows):
+        await record_cohort_events(session, dob, rows)
+    
     try:
-        # Create life events
-        events_created = []
-        for event_data in request.events:
-            event = LifeEvent(
-                user_id=request.user_id,
-                year=event_data.year,
-                month=event_data.month,
-                phase=event_data.phase,
-                score=event_data.score,
-                description=event_data.description
-            )
-            db.add(event)
-            events_created.append(event)
-        
-        db.commit()
+        # Bulk insert (COPY on Postgres for large payloads), deduped by idempotency key;
+        # each chunk is counted into the user's cohort in the same transaction
+        event_ids, created, duplicates = await bulk_insert_events(
+            db, request.user_id, request.events, before_commit=record_cohorts
+        )
+        if created:
+            await insight_cache.invalidate_user(request.user_id)
+            event_search.invalidate_user(request.user_id)
+            cohort_stats.notify()
+            await journey_index.upsert_user(db, request.user_id)
         
         return LifeEventsResponse(
             message="Life events saved successfully",
-            events_count=len(events_created)
+            events_count=created,
+            event_ids=event_ids,
+            duplicates_count=duplicates
         )
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        # Chunks committed before the failure are stored
+        await insight_cache.invalidate_user(request.user_id)
+        event_search.invalidate_user(request.user_id)
+        cohort_stats.notify()
+        await journey_index.upsert_user(db, request.user_id)
         raise HTTPException(status_code=500, detail=f"Error saving events: {str(e)}")
 
 
 @router.get("/events/{user_id}", response_model=UserEventsResponse)
-async def get_user_events(user_id: str, db: Session = Depends(get_db)):
+async def get_user_events(
+    user_id: str,
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.EVENTS_MAX_PAGE_SIZE, description="Page size"),
+    stream: bool = Query(False, description="Stream events as NDJSON, one event per line"),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Retrieve all life events for a specific user.
+    Retrieve life events for a specific user in timeline order.
     Used for editing and displaying event history.
+
+    Without `limit` the whole history is returned. With `limit`, one page is
+    returned along with `next_cursor` to pass as `after` for the next page.
+    With `stream`, events after `after` (up to `limit`) are streamed as
+    newline-delimited JSON, read from the database page by page.
     """
     # Get user
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get all events
-    events = db.query(LifeEvent).filter(LifeEvent.user_id == user_id).order_by(LifeEvent.year, LifeEvent.month).all()
+    try:
+        cursor = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if stream:
+        async def ndjson_lines():
+            async for event in iter_user_events(user_id, cursor, settings.EVENTS_STREAM_BATCH_SIZE, limit):
+                yield LifeEventResponse.from_orm(event).model_dump_json() + "\n"
+        
+        return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+    
+    next_cursor = None
+    if limit is None and cursor is None:
+        events = (await db.execute(user_events_query(user_id))).scalars().all()
+    else:
+        events, next_cursor = await user_events_page(db, user_id, cursor, limit or settings.EVENTS_MAX_PAGE_SIZE)
     
     return UserEventsResponse(
         user_id=user.id,
         name=user.name,
         dob=user.dob,
-        events=[LifeEventResponse.from_orm(event) for event in events]
+        events=[LifeEventResponse.from_orm(event) for event in events],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/events/{user_id}/search", response_model=EventSearchResponse)
+async def search_user_events(
+    user_id: str,
+    q: str = Query(..., min_length=1, max_length=500, description="Search terms"),
+    limit: int = Query(20, ge=1, le=settings.EVENT_SEARCH_MAX_PAGE_SIZE, description="Page size"),
+    offset: int = Query(0, ge=0, description="Results to skip; pass a previous page's next_offset"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search a user's event descriptions and rephrasings.
+    Events matching any of the terms are returned best first by BM25 score,
+    one page at a time, from the database's full-text index.
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    hits, has_more = await event_search.search(db, user_id, q, limit, offset)
+    
+    return EventSearchResponse(
+        user_id=user_id,
+        query=q,
+        results=[EventSearchHit(event=LifeEventResponse.from_orm(event), score=score) for event, score in hits],
+        next_offset=offset + limit if has_more else None,
+        backend=await event_search.backend(db)
     )
 
 
 @router.delete("/events/{event_id}")
-async def delete_event(event_id: int, db: Session = Depends(get_db)):
+async def delete_event(event_id: int, db: AsyncSession = Depends(get_db)):
     """
     Delete a specific life event.
     """
-    event = db.query(LifeEvent).filter(LifeEvent.id == event_id).first()
+    event = await db.get(LifeEvent, event_id)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     try:
-        db.delete(event)
-        db.commit()
+        user_id = event.user_id
+        user = await db.get(User, user_id)
+        await record_cohort_events(
+            db, user.dob, [{"year": event.year, "phase": event.phase, "score": event.score}], sign=-1
+        )
+        await db.delete(event)
+        await db.commit()
+        await insight_cache.invalidate_user(user_id)
+        event_search.invalidate_user(user_id)
+        cohort_stats.notify()
+        await journey_index.upsert_user(db, user_id)
         return {"message": "Event deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting event: {str(e)}")
 
@@ -0,0 +1,59 @@
+import hmac
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.services.data_export import (
+    EXPORT_TABLES,
+    FILE_EXTENSIONS,
+    MEDIA_TYPES,
+    check_format,
+    export_query,
+    stream_export
+)
+
+router = APIRouter()
+
+
+def _check_token(authorization: Optional[str]) -> None:
+    if not settings.EXPORT_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Export endpoint is disabled (set EXPORT_API_TOKEN)")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token, settings.EXPORT_API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid export token")
+
+
+@router.get("/export/{table}")
+async def export_table(
+    table: str,
+    fmt: str = Query("ndjson", alias="format", description="ndjson, arrow (IPC stream) or parquet"),
+    gzip: bool = Query(False, description="Gzip the stream (ndjson and arrow)"),
+    user_id: Optional[List[str]] = Query(None, description="Limit to these users (repeatable)"),
+    since: Optional[datetime] = Query(None, description="Rows created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Rows created before this time"),
+    after: Optional[str] = Query(None, description="Resume after this id (the last row received)"),
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Stream a whole table (users, events or analyses) in primary key order,
+    read through a server-side cursor in constant memory. Requires
+    `Authorization: Bearer <EXPORT_API_TOKEN>`.
+    """
+    _check_token(authorization)
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=404, detail=f"Unknown table; expected one of {', '.join(sorted(EXPORT_TABLES))}")
+    try:
+        check_format(fmt, gzip)
+        export_query(table, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = f"{table}.{FILE_EXTENSIONS[fmt]}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(table, fmt, gzip, user_id, since, until, after),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
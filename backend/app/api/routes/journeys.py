@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import get_db
+from app.db.models import User
+from app.schemas.schemas import JourneyPoint, SimilarJourney, SimilarJourneysResponse
+from app.services.journey_index import MIN_EVENTS, journey_index
+
+router = APIRouter()
+
+
+@router.get("/users/{user_id}/similar", response_model=SimilarJourneysResponse)
+async def get_similar_journeys(
+    user_id: str,
+    k: int = Query(10, ge=1, le=100, description="Number of similar journeys"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Journeys most like this user's: similar scores at the same ages, and a
+    similar trend and volatility. Served from the in-memory journey index.
+    Matches are anonymous: their similarity, the ages both journeys cover
+    and the shape of the matched journey, never who it belongs to.
+    """
+    user = await db.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    matches = journey_index.similar(user_id, k)
+    if matches is None:
+        raise HTTPException(status_code=404, detail=f"No journey indexed for this user (needs {MIN_EVENTS}+ events)")
+    
+    return SimilarJourneysResponse(
+        user_id=user_id,
+        matches=[
+            SimilarJourney(
+                similarity=match.similarity,
+                shared_ages=list(match.shared_ages) if match.shared_ages else None,
+                trajectory=[JourneyPoint(age=age, level=level) for age, level in match.trajectory]
+            )
+            for match in matches
+        ],
+        search=journey_index.search_method
+    )
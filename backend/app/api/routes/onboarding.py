@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
 from app.db.models import User
@@ -9,7 +9,7 @@ router = APIRouter()
 
 
 @router.post("/onboarding", response_model=OnboardingResponse)
-async def create_user(request: OnboardingRequest, db: Session = Depends(get_db)):
+async def create_user(request: OnboardingRequest, db: AsyncSession = Depends(get_db)):
     """
     Create a new user profile with name and date of birth.
     Returns user_id for subsequent API calls.
@@ -22,8 +22,8 @@ async def create_user(request: OnboardingRequest, db: Session = Depends(get_db))
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         
         return OnboardingResponse(
             user_id=new_user.id,
@@ -31,6 +31,6 @@ async def create_user(request: OnboardingRequest, db: Session = Depends(get_db))
         )
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
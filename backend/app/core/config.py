@@ -10,10 +10,88 @@ class Settings(BaseSettings):
     
     # Database - Use SQLite for local development by default
     DATABASE_URL: str = "sqlite:///./lifelens.db"
+    DB_POOL_SIZE: int = 10  # Persistent connections per worker (Postgres)
+    DB_MAX_OVERFLOW: int = 20  # Extra connections allowed under burst
+    DB_POOL_TIMEOUT: float = 30.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # Test connections before handing them out
+    BULK_INSERT_CHUNK_SIZE: int = 1000  # Events per INSERT batch and commit
+    BULK_COPY_MIN_ROWS: int = 2000  # Payloads this large use COPY on Postgres
+    EVENTS_MAX_PAGE_SIZE: int = 1000  # Largest `limit` accepted by GET /api/events/{user_id}
+    EVENTS_STREAM_BATCH_SIZE: int = 500  # Events read per query when streaming
     
     # OpenAI
     OPENAI_API_KEY: str = ""
-    
+    OPENAI_MODEL: str = "gpt-4o"
+    OPENAI_BASE_URL: str = ""  # Empty = api.openai.com; set to use a proxy or benchmarks/fake_openai.py
+    OPENAI_TIMEOUT: float = 60.0  # Seconds per request before it is retried
+    LLM_TASK_CONCURRENCY: int = 4  # Insight sub-requests in flight per analysis
+    LLM_TASK_RETRIES: int = 2  # Retries per sub-request before its fallback is used
+    LLM_RETRY_BACKOFF: float = 0.5  # Seconds before the first retry, doubled after each
+    LLM_REPHRASE_BATCH_SIZE: int = 25  # Events per rephrasing sub-request
+
+    # LLM gateway - shared limits for every OpenAI request made by this worker
+    LLM_GATEWAY_CONCURRENCY: int = 16  # Requests in flight across all analyses
+    LLM_RPM_LIMIT: int = 0  # Requests per minute, 0 = unlimited
+    LLM_TPM_LIMIT: int = 0  # Tokens per minute, 0 = unlimited
+    LLM_EXPECTED_OUTPUT_TOKENS: int = 600  # Completion tokens reserved per request until usage is known
+    LLM_GATEWAY_RETRIES: int = 3  # Retries of connection errors, timeouts, 429s and 5xx
+    LLM_GATEWAY_BACKOFF: float = 0.5  # Seconds before the first retry, doubled after each (with jitter)
+    LLM_GATEWAY_MAX_BACKOFF: float = 20.0  # Longest wait; a longer Retry-After fails immediately
+    LLM_HEDGE_ENABLED: bool = False  # Send a backup request when one runs past the p95 latency
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # Latency samples needed before hedging starts
+    LLM_BREAKER_THRESHOLD: int = 5  # Consecutive failures that open the circuit
+    LLM_BREAKER_RESET: float = 30.0  # Seconds the circuit stays open before a probe request
+
+    # Insight cache - LLM results keyed by a hash of the prompt inputs
+    INSIGHT_CACHE_SIZE: int = 1024  # Entries kept in the in-process LRU
+    INSIGHT_CACHE_TTL: int = 86400  # Seconds
+    INSIGHT_CACHE_DB: bool = False  # Add a database-backed tier shared across workers
+
+    # Analysis coalescing - concurrent /api/analyze calls for one user share a computation
+    ANALYSIS_CROSS_WORKER_LOCK: bool = False  # Also lock per user across workers (advisory lock on Postgres, file lock on SQLite)
+    ANALYSIS_LOCK_DIR: str = "./.analysis_locks"  # Lock files for SQLite
+    ANALYSIS_LOCK_TIMEOUT: float = 120.0  # Seconds to wait for the lock before computing without it
+
+    # Analysis jobs - POST /api/analyze/jobs queue, stored in analysis_jobs
+    ANALYSIS_JOB_WORKERS: int = 2  # Jobs run at once inside each API process; 0 = only `python -m app.services.analysis_jobs` workers
+    ANALYSIS_JOB_POLL_INTERVAL: float = 1.0  # Seconds between queue polls when idle
+    ANALYSIS_JOB_VISIBILITY_TIMEOUT: float = 300.0  # Seconds a job stays leased without a renewal before another worker reclaims it
+    ANALYSIS_JOB_MAX_ATTEMPTS: int = 3  # Attempts before a job is marked failed
+    ANALYSIS_JOB_RETRY_BACKOFF: float = 5.0  # Seconds before a failed job is retried, doubled after each attempt
+    ANALYSIS_JOB_WEBHOOK_TIMEOUT: float = 10.0  # Seconds per webhook delivery attempt
+    WEBHOOK_ALLOWED_HOSTS: str = ""  # Comma-separated hosts webhooks may target (private addresses allowed); empty = any host with only public addresses
+
+    # Cohort statistics - served from memory, reloaded from cohort_bins
+    COHORT_REFRESH_INTERVAL: float = 10.0  # Seconds between reloads of rows written by other processes
+
+    # Journey index - "journeys like yours" search over score trajectories
+    JOURNEY_INDEX_PATH: str = "./journey_index.f32"  # Memory-mapped float32 vector matrix, shared by the API processes
+    JOURNEY_REFRESH_INTERVAL: float = 10.0  # Seconds between reloads of vectors written by other processes
+    JOURNEY_IVF_LISTS: int = 0  # Coarse quantizer lists; 0 = exact search (about sqrt(users) for millions of users)
+    JOURNEY_IVF_PROBES: int = 8  # Lists scored per query when the quantizer is on
+
+    # Event search - GET /api/events/{user_id}/search
+    EVENT_SEARCH_BACKEND: str = "auto"  # auto (FTS5 on SQLite, tsvector + GIN on Postgres) or python (in-memory index)
+    EVENT_SEARCH_MAX_PAGE_SIZE: int = 100  # Largest `limit` accepted
+    EVENT_SEARCH_CACHE_USERS: int = 256  # Per-user indexes kept in memory by the python backend
+
+    # Bulk export - GET /api/export/{table} and `python -m app.services.data_export`
+    EXPORT_API_TOKEN: str = ""  # Bearer token required by the export endpoint; empty = endpoint disabled
+    EXPORT_BATCH_SIZE: int = 5000  # Rows per server-side cursor fetch (and per Arrow batch / Parquet row group)
+
+    # Forecasting - process pool for CPU-bound model fitting
+    FORECAST_ENGINE: str = "auto"  # full (statsmodels), fast (closed-form NumPy) or auto
+    FORECAST_AUTO_FULL_MIN_POINTS: int = 40  # auto uses the full engine from this many events
+    FORECAST_WORKERS: int = 0  # 0 = one worker per CPU core
+    FORECAST_MAX_PENDING: int = 64  # Jobs allowed in flight before callers wait
+    FORECAST_JOB_TIMEOUT: float = 15.0  # Seconds before a forecast job is abandoned
+    FORECAST_START_METHOD: str = "spawn"  # multiprocessing start method
+    FORECAST_ARIMA_REFIT_EVERY: int = 5  # Appends between warm-started ARIMA refits
+    FORECAST_DRIFT_SIGMA: float = 4.0  # Surprise (in residual std devs) that forces a full refit
+    FORECAST_MAX_INCREMENTAL_APPENDS: int = 50  # Appends before a periodic full refit
+    FORECAST_INTERVAL_PATHS: int = 10000  # Bootstrap paths behind the 50/80/95% prediction bands; 0 = no bands
+
     # CORS - comma-separated string that gets split into list
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:3001"
     
@@ -0,0 +1,260 @@
+"""
+Instrumentation
+Logging setup, Prometheus-style metrics and per-request stage timing.
+
+- configure_logging(): DEBUG-level logs when Settings.DEBUG, INFO otherwise
+- metrics: counters, histograms and gauges rendered for GET /metrics in the
+  Prometheus text format (per process; scrape every worker)
+- StageTimer / span(): time a pipeline stage into the stage histogram and
+  into the active request's Server-Timing header
+- run_recorded(): run a function in a forecast worker process and carry the
+  metrics it recorded back to the parent, where replay() applies them
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def configure_logging() -> None:
+    """Root logging for the API, workers and CLI jobs; DEBUG traces only when Settings.DEBUG"""
+    logging.basicConfig(
+        level=logging.DEBUG if settings.DEBUG else logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    # Library chatter stays at INFO even in debug mode
+    for name in ("httpx", "httpcore", "openai", "aiosqlite", "asyncio"):
+        logging.getLogger(name).setLevel(logging.INFO)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        if _record("inc", self.name, labels, amount):
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in sorted(self._values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (last one is +Inf), sum and count
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        if _record("observe", self.name, labels, value):
+            return
+        with self._lock:
+            counts, totals = self._series.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, (total, count)) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, float("inf")), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    bucket_labels = _format_labels(self.labels, key, 'le="' + le + '"')
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label values: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], read: Callable[[], Dict[LabelValues, float]]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.read = read
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in sorted(self.read().items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._metrics.setdefault(name, Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.setdefault(name, Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str], read: Callable[[], Dict[LabelValues, float]]) -> Gauge:
+        self._metrics[name] = Gauge(name, help, labels, read)
+        return self._metrics[name]
+
+    def get(self, name: str) -> Any:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = metric.render()
+            except Exception as e:
+                logging.getLogger(__name__).warning("Metric %s failed to render: %s", metric.name, e)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "lifelens_stage_duration_seconds", "Duration of analysis pipeline stages", ["stage"]
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "lifelens_http_request_duration_seconds", "HTTP request duration by route", ["method", "route", "status"]
+)
+ANALYSES = metrics.counter(
+    "lifelens_analyses_total", "Analyses served by source (stored, computed, coalesced)", ["source"]
+)
+FORECAST_MODELS = metrics.counter(
+    "lifelens_forecast_model_fits_total", "Statistical model fits by outcome (ok, failed)", ["model", "outcome"]
+)
+FORECAST_FALLBACKS = metrics.counter(
+    "lifelens_forecast_fallbacks_total", "Statistical forecasts replaced by the linear trend", ["reason"]
+)
+LLM_TASKS = metrics.counter(
+    "lifelens_llm_tasks_total", "LLM insight tasks by outcome (ok, cached, fallback)", ["task", "outcome"]
+)
+LLM_TOKENS = metrics.counter(
+    "lifelens_llm_tokens_total", "OpenAI tokens reported as used (non-streamed requests)", ["kind"]
+)
+
+
+class StageTimer:
+    """Collects wall-clock durations per pipeline stage for the Server-Timing header"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage into this timer and the stage histogram; spans opened inside it report here too"""
+        token = _current_timer.set(self)
+        try:
+            with span(name):
+                yield
+        finally:
+            _current_timer.reset(token)
+
+    async def run(self, name: str, awaitable: Awaitable) -> Any:
+        with self.stage(name):
+            return await awaitable
+
+    def add(self, name: str, seconds: float) -> None:
+        self.timings[name] = seconds * 1000
+
+    def server_timing(self) -> str:
+        """Format timings for the Server-Timing response header"""
+        return ", ".join(f"{name};dur={duration:.1f}" for name, duration in self.timings.items())
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("current_timer", default=None)
+_recorder: ContextVar[Optional[List[Tuple[str, str, LabelValues, float]]]] = ContextVar("metrics_recorder", default=None)
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a stage into the stage histogram and, when a StageTimer is active
+    in this context (the request being served), into its Server-Timing.
+    """
+    timer = _current_timer.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, name)
+        if timer is not None:
+            timer.add(name, elapsed)
+
+
+def _record(op: str, name: str, labels: LabelValues, value: float) -> bool:
+    """Buffer a metric update while run_recorded is active; True if it was buffered"""
+    buffer = _recorder.get()
+    if buffer is None:
+        return False
+    buffer.append((op, name, labels, value))
+    return True
+
+
+def run_recorded(fn: Callable, *args: Any) -> Tuple[Any, List[Tuple[str, str, LabelValues, float]]]:
+    """Run `fn(*args)` (in a worker process) and return its result with the metric updates it made"""
+    buffer: List[Tuple[str, str, LabelValues, float]] = []
+    token = _recorder.set(buffer)
+    try:
+        return fn(*args), buffer
+    finally:
+        _recorder.reset(token)
+
+
+def replay(samples: List[Tuple[str, str, LabelValues, float]]) -> None:
+    """Apply metric updates recorded in a worker; stage spans also go to the active StageTimer"""
+    timer = _current_timer.get()
+    for op, name, labels, value in samples:
+        metric = metrics.get(name)
+        if op == "inc":
+            metric.inc(*labels, amount=value)
+        else:
+            metric.observe(value, *labels)
+            if timer is not None and metric is STAGE_SECONDS:
+                timer.add(labels[0], value)
@@ -0,0 +1,51 @@
+"""
+Webhook URL Checks
+The checks on a webhook URL that need no DNS lookup, shared by the request
+schemas and app.services.webhooks (which also resolves the host):
+1. Only http(s) URLs without credentials are accepted
+2. A literal IP address must be public (no loopback, private, link-local
+   or reserved ranges such as 169.254.169.254)
+3. With WEBHOOK_ALLOWED_HOSTS set, only the hosts listed there are accepted
+"""
+import ipaddress
+from typing import Set
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+
+def allowed_webhook_hosts() -> Set[str]:
+    return {host.strip().lower() for host in settings.WEBHOOK_ALLOWED_HOSTS.split(",") if host.strip()}
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    return ip.is_global and not ip.is_multicast
+
+
+def check_webhook_url(url: str) -> str:
+    """Checks that need no DNS lookup; returns the host. Raises ValueError for a rejected URL"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https"):
+        raise ValueError("Webhook URL must start with http:// or https://")
+    if not parts.hostname:
+        raise ValueError("Webhook URL has no host")
+    if parts.username is not None or parts.password is not None:
+        raise ValueError("Webhook URL must not contain credentials")
+    try:
+        parts.port
+    except ValueError:
+        raise ValueError("Webhook URL has an invalid port")
+    host = parts.hostname.lower()
+    allowed = allowed_webhook_hosts()
+    if allowed:
+        if host not in allowed:
+            raise ValueError("Webhook host is not in WEBHOOK_ALLOWED_HOSTS")
+        return host
+    try:
+        literal = ipaddress.ip_address(host)
+    except ValueError:
+        return host
+    if not is_public_address(str(literal)):
+        raise ValueError("Webhook URL must not point at a private, loopback, link-local or reserved address")
+    return host
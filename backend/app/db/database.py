@@ -1,22 +1,51 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
+is_sqlite = "sqlite" in settings.DATABASE_URL
+
+
+def async_database_url(url: str) -> str:
+    """Map DATABASE_URL onto its async driver (aiosqlite for SQLite, asyncpg for Postgres)"""
+    scheme, _, rest = url.partition("://")
+    driver = scheme.split("+")[0]
+    if driver == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if driver in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def _pool_options() -> dict:
+    """Pool tuning from Settings; SQLite keeps SQLAlchemy's default file pool"""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if not is_sqlite:
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE
+        )
+    return options
+
+
+# Sync engine - schema creation and CLI jobs (batch forecasting, exports)
 # Add connect_args for SQLite to avoid threading issues
-connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+connect_args = {"check_same_thread": False} if is_sqlite else {}
+engine = create_engine(settings.DATABASE_URL, connect_args=connect_args, **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine - request handlers, so DB round trips never block the event loop
+async_engine = create_async_engine(async_database_url(settings.DATABASE_URL), **_pool_options())
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Database session dependency"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
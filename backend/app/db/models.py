@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Text, Index, LargeBinary, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -34,20 +34,93 @@ class LifeEvent(Base):
     score = Column(Float, nullable=False)  # -10 to 10
     description = Column(Text, nullable=False)
     rephrased_description = Column(Text, nullable=True)  # LLM-generated
+    description_hash = Column(String(64), nullable=True)  # sha256 of the description that was rephrased
+    idempotency_key = Column(String(128), nullable=True)  # Client-supplied, dedupes retried uploads
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationship
     user = relationship("User", back_populates="events")
 
+    __table_args__ = (
+        UniqueConstraint("user_id", "idempotency_key", name="uq_life_events_user_idempotency_key"),
+        # Per-user reads in timeline order (events list, analysis) come straight off this index
+        Index("ix_life_events_user_year_month_id", "user_id", "year", "month", "id"),
+    )
+
 
 class Analysis(Base):
     __tablename__ = "analyses"
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     hero_heading = Column(Text, nullable=True)
     summary = Column(Text, nullable=True)
     insights_data = Column(Text, nullable=True)  # JSON stored as text
+    result_data = Column(Text, nullable=True)  # Full AnalysisResponse as JSON
+    events_fingerprint = Column(String(64), nullable=True)  # Hash of the events analyzed
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    priority = Column(Integer, nullable=False, default=0)  # Higher runs first
+    force = Column(Boolean, nullable=False, default=False)
+    webhook_url = Column(Text, nullable=True)  # POSTed the job status when it finishes
+    attempts = Column(Integer, nullable=False, default=0)
+    locked_by = Column(String(64), nullable=True)  # Worker currently running the job
+    locked_until = Column(DateTime, nullable=True)  # Running: visibility timeout, the job is reclaimed after it. Queued: earliest retry
+    analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # Workers claim the highest-priority, oldest claimable job
+        Index("ix_analysis_jobs_claim", "status", "priority", "created_at"),
+    )
+
+
+class InsightCacheEntry(Base):
+    __tablename__ = "insight_cache"
+    
+    key = Column(String(64), primary_key=True)  # sha256 of the prompt inputs
+    user_id = Column(String, nullable=False, index=True)
+    value = Column(Text, nullable=False)  # JSON stored as text
+    expires_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+
+class ForecastState(Base):
+    __tablename__ = "forecast_states"
+    
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    state_data = Column(Text, nullable=True)  # Fitted model state as JSON
+    forecast_data = Column(Text, nullable=True)  # Latest statistical forecast as JSON
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CohortBin(Base):
+    __tablename__ = "cohort_bins"
+    
+    # One score-histogram bin of one phase in a (birth decade, calendar year) cohort bucket
+    birth_decade = Column(Integer, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    phase = Column(String(16), primary_key=True)
+    score_bin = Column(Integer, primary_key=True)  # round(score * 10) + 100, so 0..200
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)  # API processes reload rows changed since their last refresh
+
+
+class JourneyVector(Base):
+    __tablename__ = "journey_vectors"
+    
+    row_id = Column(Integer, primary_key=True, autoincrement=True)  # Row of this user in the memory-mapped vector matrix
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, unique=True)
+    vector = Column(LargeBinary, nullable=True)  # float32 journey vector; NULL below the minimum number of events
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)  # API processes reload rows changed since their last refresh
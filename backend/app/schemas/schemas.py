@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field, validator
 from typing import Optional, List, Dict, Any
-from datetime import date
+from datetime import date, datetime
+
+from app.core.webhook_urls import check_webhook_url
 
 
 # ===== Onboarding Schemas =====
@@ -29,6 +31,7 @@ class LifeEventCreate(BaseModel):
     phase: str = Field(..., description="Very Low, Low, Moderate, High, Very High")
     score: float = Field(..., ge=-10, le=10)
     description: str = Field(..., min_length=1)
+    idempotency_key: Optional[str] = Field(None, max_length=128, description="Repeat uploads with the same key are stored once")
     
     @validator('phase')
     def validate_phase(cls, v):
@@ -58,7 +61,9 @@ class LifeEventsRequest(BaseModel):
 
 class LifeEventsResponse(BaseModel):
     message: str
-    events_count: int
+    events_count: int  # Newly created events
+    event_ids: List[int] = []  # One per submitted event, in request order
+    duplicates_count: int = 0  # Events skipped because their idempotency key was already stored
 
 
 # ===== Analysis Schemas =====
@@ -76,6 +81,13 @@ class ForecastPoint(BaseModel):
     score: float
     phase: str
     reasoning: Optional[str] = None
+    # Prediction bands (statistical forecast only, from 4+ events)
+    lower_50: Optional[float] = None
+    upper_50: Optional[float] = None
+    lower_80: Optional[float] = None
+    upper_80: Optional[float] = None
+    lower_95: Optional[float] = None
+    upper_95: Optional[float] = None
 
 
 class InsightCard(BaseModel):
@@ -104,10 +116,88 @@ class AnalysisResponse(BaseModel):
     llm_forecast: List[ForecastPoint]
     insights: Dict[str, Any]  # Flexible - can contain any structure
     personalized_plan: List[PersonalizedAction]
+    analysis_id: Optional[int] = None
+    generated_at: Optional[datetime] = None
+    stale: Optional[bool] = None  # True when events changed since this analysis
 
 
 class AnalysisRequest(BaseModel):
     user_id: str
+    force: bool = False  # Recompute even if the stored analysis is current
+
+
+class AnalysisJobRequest(BaseModel):
+    user_id: str
+    force: bool = False  # Recompute even if the stored analysis is current
+    priority: int = Field(0, ge=-100, le=100, description="Higher priorities are run first")
+    webhook_url: Optional[str] = Field(None, max_length=2048, description="POSTed the job status when it finishes")
+    
+    @validator('webhook_url')
+    def validate_webhook_url(cls, v):
+        # Scheme, credentials and literal addresses; the resolved addresses are checked by the route and at send time
+        if v is not None:
+            check_webhook_url(v)
+        return v
+
+
+class AnalysisJobResponse(BaseModel):
+    job_id: str
+    user_id: str
+    status: str  # queued, running, succeeded, failed
+    priority: int
+    attempts: int
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    analysis_id: Optional[int] = None
+    error: Optional[str] = None
+    result: Optional[AnalysisResponse] = None  # Set once the job has succeeded
+
+
+# ===== Cohort Schemas =====
+class CohortPhaseShare(BaseModel):
+    phase: str
+    count: int
+    percentage: float
+
+
+class CohortSummary(BaseModel):
+    birth_decade: int
+    year: Optional[int] = None  # None when merged across all years
+    events: int
+    mean: float
+    percentiles: Dict[str, float]  # p10, p25, p50, p75, p90
+    phases: List[CohortPhaseShare]
+    percentile_rank: Optional[float] = None  # Of the requested score within the cohort (0-100)
+
+
+class CohortResponse(BaseModel):
+    birth_decade: int
+    overall: CohortSummary
+    years: List[CohortSummary]
+
+
+class CohortListResponse(BaseModel):
+    birth_decades: List[int]
+
+
+# ===== Similar Journey Schemas =====
+class JourneyPoint(BaseModel):
+    age: int
+    level: float  # Score relative to the journey's largest, -1 to 1 (shape only)
+
+
+class SimilarJourney(BaseModel):
+    # Anonymous: other users' ids would open their events and analyses
+    similarity: float  # Cosine similarity of the journey vectors, -1 to 1
+    shared_ages: Optional[List[int]] = None  # [first, last] age both journeys cover
+    trajectory: List[JourneyPoint]  # The matched journey's shape, in 3-year steps
+
+
+class SimilarJourneysResponse(BaseModel):
+    user_id: str
+    matches: List[SimilarJourney]
+    search: str  # exact or ivf
 
 
 # ===== User Events Retrieval =====
@@ -116,4 +206,19 @@ class UserEventsResponse(BaseModel):
     name: str
     dob: str
     events: List[LifeEventResponse]
+    next_cursor: Optional[str] = None  # Pass as `after` to fetch the next page
+
+
+# ===== Event Search =====
+class EventSearchHit(BaseModel):
+    event: LifeEventResponse
+    score: float  # BM25, higher is more relevant
+
+
+class EventSearchResponse(BaseModel):
+    user_id: str
+    query: str
+    results: List[EventSearchHit]
+    next_offset: Optional[int] = None  # Pass as `offset` to fetch the next page
+    backend: str  # fts5, postgres or python
 
@@ -0,0 +1,147 @@
+"""
+Analysis Coalescer
+Single-flight deduplication for /api/analyze. Concurrent requests for the
+same user and events fingerprint share one in-flight computation instead of
+each running the forecast and LLM pipeline and storing its own Analysis row.
+
+Two layers:
+1. In-process: the first caller starts the computation as a task, later
+   callers await the same task (always on)
+2. Cross-worker (optional, ANALYSIS_CROSS_WORKER_LOCK): a per-user lock held
+   while computing - a Postgres advisory lock, or a file lock for SQLite - so
+   a request on another worker waits and then finds the stored analysis
+"""
+import asyncio
+import hashlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Tuple
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.database import async_engine, is_sqlite
+
+try:
+    import fcntl
+except ImportError:  # Windows; file locks are skipped there
+    fcntl = None
+
+LOCK_POLL_SECONDS = 0.05
+
+logger = logging.getLogger(__name__)
+
+
+def advisory_lock_key(user_id: str) -> int:
+    """Stable signed 64-bit key for pg_advisory_lock"""
+    return int.from_bytes(hashlib.sha256(f"analysis:{user_id}".encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+async def _wait_for(try_acquire: Callable[[], Awaitable[bool]]) -> bool:
+    """Poll a non-blocking acquire until it succeeds or ANALYSIS_LOCK_TIMEOUT passes"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.ANALYSIS_LOCK_TIMEOUT
+    while not await try_acquire():
+        if loop.time() >= deadline:
+            return False
+        await asyncio.sleep(LOCK_POLL_SECONDS)
+    return True
+
+
+@asynccontextmanager
+async def _advisory_lock(user_id: str) -> AsyncIterator[bool]:
+    key = advisory_lock_key(user_id)
+    # Session-level advisory locks belong to the connection, so it is held until release
+    async with async_engine.connect() as conn:
+        async def try_acquire() -> bool:
+            return bool((await conn.execute(select(func.pg_try_advisory_lock(key)))).scalar())
+
+        acquired = await _wait_for(try_acquire)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                await conn.execute(select(func.pg_advisory_unlock(key)))
+
+
+@asynccontextmanager
+async def _file_lock(user_id: str) -> AsyncIterator[bool]:
+    os.makedirs(settings.ANALYSIS_LOCK_DIR, exist_ok=True)
+    name = hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:32]
+    fd = os.open(os.path.join(settings.ANALYSIS_LOCK_DIR, f"{name}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+
+    async def try_acquire() -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    try:
+        yield await _wait_for(try_acquire)
+    finally:
+        os.close(fd)  # Closing the descriptor releases the lock
+
+
+@asynccontextmanager
+async def user_analysis_lock(user_id: str) -> AsyncIterator[bool]:
+    """
+    Hold the cross-worker lock for a user's analysis. Yields whether the lock
+    is held: False when disabled, unsupported or timed out, in which case the
+    caller proceeds unlocked rather than failing the request.
+    """
+    if not settings.ANALYSIS_CROSS_WORKER_LOCK:
+        yield False
+        return
+    if not is_sqlite:
+        lock = _advisory_lock(user_id)
+    elif fcntl is not None:
+        lock = _file_lock(user_id)
+    else:
+        yield False
+        return
+    async with lock as acquired:
+        if not acquired:
+            logger.warning("Analysis lock for user %s timed out, computing without it", user_id)
+        yield acquired
+
+
+class AnalysisCoalescer:
+    """In-process single-flight: one running computation per (user_id, fingerprint)"""
+
+    def __init__(self):
+        self._in_flight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._counters = {"leaders": 0, "followers": 0, "failures": 0}
+
+    async def run(self, user_id: str, fingerprint: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await the computation for this user and fingerprint, starting it with
+        `compute` if none is running. Returns (result, coalesced) where
+        `coalesced` is True for callers that joined another's computation.
+        Errors are raised to every caller; nothing is cached once it finishes.
+        """
+        key = (user_id, fingerprint)
+        task = self._in_flight.get(key)
+        coalesced = task is not None
+        if coalesced:
+            self._counters["followers"] += 1
+        else:
+            self._counters["leaders"] += 1
+            task = asyncio.create_task(compute())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        # Shielded so a disconnecting caller does not cancel the computation for the others
+        return await asyncio.shield(task), coalesced
+
+    def _finished(self, key: Tuple[str, str], task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self._counters["failures"] += 1
+
+    def stats(self) -> Dict:
+        return {"in_flight": len(self._in_flight), **self._counters}
+
+
+analysis_coalescer = AnalysisCoalescer()
@@ -0,0 +1,319 @@
+"""
+Analysis Jobs
+Asynchronous mode for /api/analyze: POST /api/analyze/jobs stores a job in
+the analysis_jobs table and returns at once; workers run the pipeline and
+the client polls GET /api/analyze/jobs/{id} or receives a webhook.
+
+Workers claim the highest-priority, oldest job with SELECT ... FOR UPDATE
+SKIP LOCKED (plain conditional UPDATE on SQLite) and lease it for
+ANALYSIS_JOB_VISIBILITY_TIMEOUT seconds, renewed while the job runs. A job
+whose worker died becomes claimable again once its lease expires; failed
+jobs are retried up to ANALYSIS_JOB_MAX_ATTEMPTS attempts, each after a
+backoff (ANALYSIS_JOB_RETRY_BACKOFF, doubled per attempt) so an upstream
+outage does not use them all up at once.
+
+Workers run in the API process (ANALYSIS_JOB_WORKERS) or separately:
+    python -m app.services.analysis_jobs --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, async_engine
+from app.db.models import Analysis, AnalysisJob, User
+from app.services.analysis_coalescer import analysis_coalescer
+from app.core.instrumentation import StageTimer, configure_logging
+from app.services.analysis_service import compute_analysis, events_fingerprint, stored_analysis_response
+from app.services.event_query import user_events_query
+from app.services.forecast_executor import forecast_executor
+from app.services.webhooks import post_webhook
+
+WEBHOOK_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class JobError(Exception):
+    """A job that cannot succeed on retry (user or events gone)"""
+
+
+def _claimable(now: datetime):
+    """Queued jobs past their retry backoff, and running jobs whose worker let the lease expire"""
+    return or_(
+        and_(AnalysisJob.status == "queued", or_(AnalysisJob.locked_until.is_(None), AnalysisJob.locked_until <= now)),
+        and_(AnalysisJob.status == "running", AnalysisJob.locked_until < now)
+    )
+
+
+def job_response(job: AnalysisJob, analysis: Optional[Analysis] = None) -> Dict:
+    """AnalysisJobResponse dict; the stored result is included once available"""
+    return {
+        "job_id": job.id,
+        "user_id": job.user_id,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "analysis_id": job.analysis_id,
+        "error": job.error,
+        "result": stored_analysis_response(analysis) if analysis is not None else None
+    }
+
+
+async def enqueue_job(db: AsyncSession, user_id: str, force: bool, priority: int, webhook_url: Optional[str]) -> AnalysisJob:
+    job = AnalysisJob(user_id=user_id, force=force, priority=priority, webhook_url=webhook_url)
+    db.add(job)
+    await db.commit()
+    analysis_job_worker.notify()
+    return job
+
+
+async def load_job(db: AsyncSession, job_id: str) -> Optional[Dict]:
+    job = await db.get(AnalysisJob, job_id)
+    if job is None:
+        return None
+    analysis = await db.get(Analysis, job.analysis_id) if job.status == "succeeded" and job.analysis_id else None
+    return job_response(job, analysis)
+
+
+async def claim_job(db: AsyncSession, lease_id: str) -> Optional[AnalysisJob]:
+    """
+    Lease the next job for `lease_id`, or return None when nothing is claimable.
+    Postgres skips rows other workers have locked; on SQLite, where FOR UPDATE
+    is not supported, the conditional UPDATE decides which worker wins.
+    """
+    now = datetime.utcnow()
+    job_id = (await db.execute(
+        select(AnalysisJob.id)
+        .where(_claimable(now))
+        .order_by(AnalysisJob.priority.desc(), AnalysisJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )).scalar()
+    if job_id is None:
+        await db.rollback()
+        return None
+
+    claimed = await db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, _claimable(now))
+        .values(
+            status="running",
+            locked_by=lease_id,
+            locked_until=now + timedelta(seconds=settings.ANALYSIS_JOB_VISIBILITY_TIMEOUT),
+            attempts=AnalysisJob.attempts + 1,
+            started_at=func.coalesce(AnalysisJob.started_at, now)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if claimed.rowcount != 1:
+        return None
+    return await db.get(AnalysisJob, job_id)
+
+
+async def _update_leased(lease_id: str, job_id: str, **values) -> bool:
+    """Update a job only while `lease_id` still holds it; False if the lease was lost"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.locked_by == lease_id, AnalysisJob.status == "running")
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+async def _renew_lease(lease_id: str, job_id: str) -> None:
+    interval = settings.ANALYSIS_JOB_VISIBILITY_TIMEOUT / 3
+    while True:
+        await asyncio.sleep(interval)
+        locked_until = datetime.utcnow() + timedelta(seconds=settings.ANALYSIS_JOB_VISIBILITY_TIMEOUT)
+        if not await _update_leased(lease_id, job_id, locked_until=locked_until):
+            return
+
+
+async def run_job(job: AnalysisJob) -> int:
+    """Run the analysis for a job (coalesced with /api/analyze calls); returns the analysis id"""
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, job.user_id)
+        events = (await db.execute(user_events_query(job.user_id))).scalars().all()
+    if not user:
+        raise JobError("User not found")
+    if not events:
+        raise JobError("No life events found for analysis")
+
+    fingerprint = events_fingerprint(events)
+    (result, _), _ = await analysis_coalescer.run(
+        job.user_id,
+        fingerprint,
+        lambda: compute_analysis(job.user_id, fingerprint, job.force, StageTimer())
+    )
+    return result["analysis_id"]
+
+
+async def send_webhook(job_id: str) -> None:
+    """POST the finished job's status (without the result) to its webhook_url, retrying failures"""
+    async with AsyncSessionLocal() as db:
+        job = await db.get(AnalysisJob, job_id)
+    if job is None or not job.webhook_url:
+        return
+    payload = job_response(job)
+    del payload["result"]  # Receivers fetch it from GET /api/analyze/jobs/{id}
+    payload = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in payload.items()}
+
+    async with httpx.AsyncClient(timeout=settings.ANALYSIS_JOB_WEBHOOK_TIMEOUT) as client:
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                # Re-checked on every attempt, against the addresses the host resolves to now
+                response = await post_webhook(client, job.webhook_url, payload)
+                if response.status_code < 500:
+                    return
+                logger.warning("Webhook for job %s answered %d (attempt %d)", job_id, response.status_code, attempt + 1)
+            except ValueError as e:
+                logger.warning("Webhook for job %s rejected: %s", job_id, e)
+                return
+            except httpx.HTTPError as e:
+                logger.warning("Webhook for job %s failed (attempt %d): %s", job_id, attempt + 1, e)
+            if attempt < WEBHOOK_ATTEMPTS - 1:
+                await asyncio.sleep(2 ** attempt)
+
+
+class AnalysisJobWorker:
+    """
+    `concurrency` asyncio loops that each claim and run one job at a time.
+    enqueue_job wakes them immediately; jobs enqueued by other processes are
+    picked up within ANALYSIS_JOB_POLL_INTERVAL.
+    """
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()[:32]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._running = 0
+        self._counters = {"succeeded": 0, "failed": 0, "retried": 0, "lost_leases": 0}
+
+    def start(self, concurrency: int) -> None:
+        if self._tasks or concurrency <= 0:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run_forever(f"{self.worker_id}/{slot}")) for slot in range(concurrency)]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        # Interrupted jobs keep their lease and are reclaimed once it expires
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def join(self) -> None:
+        await asyncio.gather(*self._tasks)
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_forever(self, lease_id: str) -> None:
+        while True:
+            try:
+                # Cleared before claiming so a job enqueued meanwhile still wakes this loop
+                self._wakeup.clear()
+                async with AsyncSessionLocal() as db:
+                    job = await claim_job(db, lease_id)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=settings.ANALYSIS_JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self.process(job, lease_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("Analysis job worker %s error: %s", lease_id, e)
+                await asyncio.sleep(settings.ANALYSIS_JOB_POLL_INTERVAL)
+
+    async def process(self, job: AnalysisJob, lease_id: str) -> None:
+        if job.attempts > settings.ANALYSIS_JOB_MAX_ATTEMPTS:
+            # Only reachable when earlier workers died mid-job without recording a failure
+            await self._finish(job, lease_id, status="failed", error="Worker lease expired too many times")
+            return
+
+        self._running += 1
+        renewal = asyncio.create_task(_renew_lease(lease_id, job.id))
+        try:
+            analysis_id = await run_job(job)
+        except Exception as e:
+            logger.warning("Analysis job %s failed (attempt %d): %s", job.id, job.attempts, e)
+            if isinstance(e, JobError) or job.attempts >= settings.ANALYSIS_JOB_MAX_ATTEMPTS:
+                await self._finish(job, lease_id, status="failed", error=str(e))
+            else:
+                # Queued jobs are not claimable before locked_until
+                backoff = settings.ANALYSIS_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+                retry_at = datetime.utcnow() + timedelta(seconds=backoff)
+                if await _update_leased(lease_id, job.id, status="queued", locked_by=None, locked_until=retry_at, error=str(e)):
+                    self._counters["retried"] += 1
+            return
+        finally:
+            renewal.cancel()
+            self._running -= 1
+        await self._finish(job, lease_id, status="succeeded", analysis_id=analysis_id, error=None)
+
+    async def _finish(self, job: AnalysisJob, lease_id: str, **values) -> None:
+        finished = await _update_leased(
+            lease_id, job.id, locked_by=None, locked_until=None, finished_at=datetime.utcnow(), **values
+        )
+        if not finished:
+            # Another worker reclaimed the job after our lease expired; its outcome wins
+            self._counters["lost_leases"] += 1
+            return
+        self._counters[values["status"]] += 1
+        if job.webhook_url:
+            await send_webhook(job.id)
+
+    def stats(self) -> Dict:
+        return {"workers": len(self._tasks), "running": self._running, **self._counters}
+
+
+analysis_job_worker = AnalysisJobWorker()
+
+
+async def run_worker(concurrency: int) -> None:
+    """Standalone worker process: runs jobs until interrupted"""
+    await forecast_executor.start()
+    analysis_job_worker.start(concurrency)
+    logger.info("Analysis job worker %s running %d job(s) at a time", analysis_job_worker.worker_id, concurrency)
+    try:
+        await analysis_job_worker.join()
+    finally:
+        await analysis_job_worker.stop()
+        await forecast_executor.shutdown()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued /api/analyze jobs")
+    parser.add_argument("--concurrency", type=int, default=max(settings.ANALYSIS_JOB_WORKERS, 1), help="Jobs run at once")
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        asyncio.run(run_worker(args.concurrency))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
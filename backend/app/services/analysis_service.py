@@ -0,0 +1,370 @@
+"""
+Analysis Service
+Runs the /api/analyze pipeline as stages:
+1. Statistical forecast (process pool) and LLM insights, concurrently
+2. Insight cards built from both results
+3. Persistence of rephrasings and the Analysis row (as JSON, with an
+   events fingerprint so unchanged journeys are served from the stored row)
+
+compute_analysis wraps run_analysis for the coalesced /api/analyze path: it
+runs in a session of its own under the per-user cross-worker lock.
+
+stream_analysis runs the same stages as Server-Sent Events, sending each
+LLM section as soon as it has been generated.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.instrumentation import FORECAST_FALLBACKS, StageTimer, replay, run_recorded, span
+from app.db.database import AsyncSessionLocal
+from app.db.models import User, LifeEvent, Analysis, ForecastState
+from app.services.analysis_coalescer import user_analysis_lock
+from app.services.event_query import user_events_query
+from app.services.prediction_service import (
+    fast_statistical_forecast,
+    resolve_engine,
+    to_series_points
+)
+from app.services.forecast_state import update_statistical_forecast
+from app.services.forecast_executor import forecast_executor
+from app.services.llm_service import (
+    MERGED_SECTIONS,
+    description_hash,
+    generate_llm_insights,
+    stream_llm_insights
+)
+from app.services.event_analytics import data_insight_cards
+from app.services.insights_service import generate_insight_cards
+
+logger = logging.getLogger(__name__)
+
+
+def events_fingerprint(events: List[LifeEvent]) -> str:
+    """
+    Hash the fields that feed an analysis. LLM rephrasings are excluded since
+    they are outputs of the analysis, not inputs.
+    """
+    digest = hashlib.sha256()
+    for event in sorted(events, key=lambda e: e.id):
+        digest.update(json.dumps(
+            [event.id, event.year, event.month, event.phase, event.score, event.description],
+            separators=(",", ":")
+        ).encode("utf-8"))
+    return digest.hexdigest()
+
+
+async def load_latest_analysis(db: AsyncSession, user_id: str) -> Optional[Analysis]:
+    """Most recent stored analysis that can be served back (has a JSON result)"""
+    result = await db.execute(
+        select(Analysis).where(
+            Analysis.user_id == user_id,
+            Analysis.result_data.isnot(None)
+        ).order_by(Analysis.created_at.desc(), Analysis.id.desc()).limit(1)
+    )
+    return result.scalars().first()
+
+
+def stored_analysis_response(analysis: Analysis, fingerprint: Optional[str] = None) -> Dict:
+    """Rebuild an AnalysisResponse dict from a stored row"""
+    result = json.loads(analysis.result_data)
+    result["analysis_id"] = analysis.id
+    result["generated_at"] = analysis.created_at
+    if fingerprint is not None:
+        result["stale"] = analysis.events_fingerprint != fingerprint
+    return result
+
+
+async def load_forecast_state(db: AsyncSession, user_id: str) -> Optional[Dict]:
+    row = await db.get(ForecastState, user_id)
+    return json.loads(row.state_data) if row and row.state_data else None
+
+
+async def save_forecast_state(db: AsyncSession, user_id: str, state: Optional[Dict], forecast: List[Dict]) -> None:
+    """Stage the fitted state for commit alongside the analysis"""
+    await db.merge(ForecastState(
+        user_id=user_id,
+        state_data=json.dumps(state) if state else None,
+        forecast_data=json.dumps(forecast)
+    ))
+
+
+async def run_statistical_forecast(events: List[LifeEvent], state: Optional[Dict]) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Fit (or incrementally update) the forecast ensemble in the process pool.
+    The fast engine runs inline since it costs well under a millisecond.
+    Returns ForecastPoint dicts and the model state to store for next time.
+    """
+    series = to_series_points(events)
+    if resolve_engine(None, len(series)) == "fast":
+        with span("forecast.fast"):
+            forecast_raw, state = fast_statistical_forecast(series), None
+    else:
+        try:
+            # Model spans and counters recorded in the worker are replayed here
+            (forecast_raw, state, _), samples = await forecast_executor.submit(
+                run_recorded, update_statistical_forecast, series, state
+            )
+            replay(samples)
+        except asyncio.TimeoutError:
+            # The pool is saturated; the closed-form fast engine costs well under a millisecond on the loop
+            FORECAST_FALLBACKS.inc("timeout")
+            logger.warning("Statistical forecast timed out, using the fast engine")
+            forecast_raw = fast_statistical_forecast(series)
+
+    # Format to match ForecastPoint schema (remove month if present)
+    forecast = [
+        {
+            "year": f.get("year", 2025),
+            "score": f.get("score", 5.0),
+            "phase": f.get("phase", "Moderate"),
+            "reasoning": None
+        }
+        for f in forecast_raw
+    ]
+    return forecast, state
+
+
+def format_llm_forecast(llm_results: Dict) -> List[Dict]:
+    """Ensure each LLM forecast point has the required fields"""
+    return [
+        {
+            "year": f.get("year", 2025),
+            "score": f.get("score", 5.0),
+            "phase": f.get("phase", "Moderate"),
+            "reasoning": f.get("reasoning", "")
+        }
+        for f in llm_results.get("llm_forecast", [])
+        if isinstance(f, dict)
+    ]
+
+
+def apply_rephrasings(events: List[LifeEvent], llm_results: Dict) -> None:
+    """
+    Set new rephrasings on the events. Model rephrasings record the hash of
+    the description they were made from so they are reused next time;
+    fallback ones are shown but rephrased again on the next analysis.
+    """
+    rephrased_events = llm_results.get("rephrased_events", {})
+    fallback_rephrased = llm_results.get("fallback_rephrased_events", {})
+    for event in events:
+        if str(event.id) in rephrased_events:
+            event.rephrased_description = rephrased_events[str(event.id)]
+            event.description_hash = description_hash(event.description)
+        elif str(event.id) in fallback_rephrased:
+            event.rephrased_description = fallback_rephrased[str(event.id)]
+            event.description_hash = None
+
+
+def build_timeline(events: List[LifeEvent]) -> List[Dict]:
+    return [
+        {
+            "year": event.year,
+            "month": event.month,
+            "score": event.score,
+            "phase": event.phase,
+            "event": event.description,
+            "rephrased": event.rephrased_description
+        }
+        for event in events
+    ]
+
+
+def select_plan_items(llm_results: Dict) -> List[Dict]:
+    """Prefer actionable insights, fall back to the legacy personalized plan"""
+    return llm_results.get("actionable_insights") or llm_results.get("personalized_plan") or []
+
+
+async def run_analysis(
+    user: User,
+    events: List[LifeEvent],
+    db: AsyncSession,
+    timer: StageTimer,
+    fingerprint: Optional[str] = None
+) -> Dict:
+    """
+    Run the full analysis pipeline for one user and store the result.
+    Returns a dict matching AnalysisResponse.
+    """
+    fingerprint = fingerprint or events_fingerprint(events)
+    forecast_state = await load_forecast_state(db, user.id)
+    # The forecast and the LLM call are independent until the insight cards merge them
+    (statistical_forecast, forecast_state), llm_results = await asyncio.gather(
+        timer.run("forecast", run_statistical_forecast(events, forecast_state)),
+        timer.run("llm", generate_llm_insights(user, events))
+    )
+    llm_results["llm_forecast"] = format_llm_forecast(llm_results)
+
+    with timer.stage("insights"):
+        insights = generate_insight_cards(events, statistical_forecast, llm_results)
+
+    with timer.stage("persist"):
+        result = await persist_analysis(
+            user, events, db, statistical_forecast, forecast_state, llm_results, insights, fingerprint
+        )
+    return result
+
+
+async def compute_analysis(user_id: str, fingerprint: str, force: bool, timer: StageTimer) -> Tuple[Dict, str]:
+    """
+    Compute and store an analysis in a session owned by this call, so it can
+    outlive the request that started it. Under the cross-worker lock the
+    latest stored analysis is checked again: if another worker stored one
+    for the same events meanwhile (a newer one, with `force`) it is served
+    instead. Returns the AnalysisResponse dict and its source.
+    """
+    async with AsyncSessionLocal() as db:
+        before = await load_latest_analysis(db, user_id)
+        async with user_analysis_lock(user_id):
+            with timer.stage("recheck"):
+                stored = await load_latest_analysis(db, user_id)
+            if stored and stored.events_fingerprint == fingerprint and (
+                not force or before is None or stored.id != before.id
+            ):
+                return stored_analysis_response(stored, fingerprint), "stored"
+
+            user = await db.get(User, user_id)
+            events = (await db.execute(user_events_query(user_id))).scalars().all()
+            with timer.stage("total"):
+                result = await run_analysis(user, events, db, timer)
+            return result, "computed"
+
+
+async def persist_analysis(
+    user: User,
+    events: List[LifeEvent],
+    db: AsyncSession,
+    statistical_forecast: List[Dict],
+    forecast_state: Optional[Dict],
+    llm_results: Dict,
+    insights: Dict[str, Any],
+    fingerprint: str
+) -> Dict:
+    """Store rephrasings, the Analysis row and the forecast state; returns the AnalysisResponse dict"""
+    # Update events with rephrased descriptions
+    apply_rephrasings(events, llm_results)
+
+    result = {
+        "hero_heading": llm_results.get("hero_heading", "Your Emotional Journey"),
+        "summary": llm_results.get("summary", "Here's your emotional timeline."),
+        "timeline": build_timeline(events),
+        "statistical_forecast": statistical_forecast,
+        "llm_forecast": llm_results["llm_forecast"],
+        "insights": insights,
+        "personalized_plan": select_plan_items(llm_results)
+    }
+    analysis = Analysis(
+        user_id=user.id,
+        hero_heading=result["hero_heading"],
+        summary=result["summary"],
+        insights_data=json.dumps(insights),
+        result_data=json.dumps(result),
+        events_fingerprint=fingerprint
+    )
+    db.add(analysis)
+    await save_forecast_state(db, user.id, forecast_state, statistical_forecast)
+    await db.commit()
+
+    result.update(analysis_id=analysis.id, generated_at=analysis.created_at, stale=False)
+    return result
+
+
+def sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+async def stream_analysis(user: User, events: List[LifeEvent], db: AsyncSession, force: bool = False) -> AsyncIterator[str]:
+    """
+    Run the analysis pipeline as a stream of Server-Sent Events:
+    - `analysis`: the stored analysis, when it is current and `force` is not set
+    - `data_insights`: the trajectory, contributors, patterns and seasonal
+      cards, computed from the events before anything slower starts
+    - `statistical_forecast`: as soon as the forecast is fitted
+    - one event per LLM section as it completes (`hero_heading`, `summary`,
+      `timeline` once rephrasings arrive, `llm_forecast`, `unique_insights`, ...)
+    - `insights` and `personalized_plan` once the LLM response is complete
+    - `done` with the analysis_id after the analysis is stored, or `error`
+
+    Owns `db` and closes it when the stream ends.
+    """
+    try:
+        fingerprint = events_fingerprint(events)
+        if not force:
+            stored = await load_latest_analysis(db, user.id)
+            if stored and stored.events_fingerprint == fingerprint:
+                response = stored_analysis_response(stored, fingerprint)
+                yield sse_event("analysis", response)
+                yield sse_event("done", {"analysis_id": stored.id, "source": "stored"})
+                return
+
+        yield sse_event("data_insights", data_insight_cards(events))
+        forecast_state = await load_forecast_state(db, user.id)
+        # The forecast and the LLM stream feed one queue so whichever finishes first is sent first
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce_forecast():
+            try:
+                await queue.put(("forecast", await run_statistical_forecast(events, forecast_state)))
+            except Exception as e:
+                await queue.put(("error", e))
+
+        async def produce_llm():
+            try:
+                async for section, value in stream_llm_insights(user, events):
+                    await queue.put(("section", (section, value)))
+                await queue.put(("llm_done", None))
+            except Exception as e:
+                await queue.put(("error", e))
+
+        tasks = [asyncio.create_task(produce_forecast()), asyncio.create_task(produce_llm())]
+        try:
+            statistical_forecast = None
+            llm_results: Dict = {}
+            llm_done = False
+            while statistical_forecast is None or not llm_done:
+                kind, payload = await queue.get()
+                if kind == "error":
+                    raise payload
+                if kind == "forecast":
+                    statistical_forecast, forecast_state = payload
+                    yield sse_event("statistical_forecast", statistical_forecast)
+                elif kind == "llm_done":
+                    llm_done = True
+                else:
+                    section, value = payload
+                    llm_results[section] = value
+                    if section in MERGED_SECTIONS:
+                        apply_rephrasings(events, {section: value})
+                        yield sse_event("timeline", build_timeline(events))
+                    elif section == "llm_forecast":
+                        yield sse_event(section, format_llm_forecast(llm_results))
+                    else:
+                        yield sse_event(section, value)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        llm_results["llm_forecast"] = format_llm_forecast(llm_results)
+        with span("insights"):
+            insights = generate_insight_cards(events, statistical_forecast, llm_results)
+        yield sse_event("insights", insights)
+        yield sse_event("personalized_plan", select_plan_items(llm_results))
+
+        with span("persist"):
+            result = await persist_analysis(
+                user, events, db, statistical_forecast, forecast_state, llm_results, insights, fingerprint
+            )
+        yield sse_event("done", {"analysis_id": result["analysis_id"], "generated_at": result["generated_at"], "source": "computed"})
+    except Exception as e:
+        logger.exception("Analysis stream error: %s", e)
+        await db.rollback()
+        yield sse_event("error", {"detail": f"Error during analysis: {str(e)}"})
+    finally:
+        await db.close()
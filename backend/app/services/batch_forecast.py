@@ -0,0 +1,286 @@
+"""
+Batch Forecast Service
+Re-forecasts many users at once (e.g. the nightly job):
+1. Streams users' event series out of the database in keyset-paged chunks
+2. Fits the linear trend for the whole chunk with stacked least squares
+3. Fans the ETS/ARIMA fits out across a process pool
+4. Writes forecasts and model state back to forecast_states in bulk
+
+Usage:
+    python -m app.services.batch_forecast --chunk-size 1000 --workers 8
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentation import configure_logging
+from app.db.database import SessionLocal
+from app.db.models import LifeEvent, ForecastState
+from app.services.prediction_service import (
+    SeriesPoint,
+    ar1_fast,
+    combine_forecasts,
+    holt_linear_fast,
+    resolve_engine
+)
+from app.services.forecast_state import (
+    build_state,
+    decimal_year,
+    fit_smoothing_models,
+    sorted_points
+)
+
+UserSeries = Tuple[str, List[SeriesPoint]]
+
+logger = logging.getLogger(__name__)
+
+
+def iter_user_series(db: Session, chunk_size: int, user_ids: Optional[List[str]] = None) -> Iterator[List[UserSeries]]:
+    """
+    Yield chunks of up to `chunk_size` users with their chronologically sorted
+    points. Users are paged by keyset on user_id, so memory stays bounded by
+    the chunk and no read transaction is held open across chunk writes.
+    """
+    last_user_id = None
+    while True:
+        id_query = db.query(LifeEvent.user_id).distinct()
+        if user_ids:
+            id_query = id_query.filter(LifeEvent.user_id.in_(user_ids))
+        if last_user_id is not None:
+            id_query = id_query.filter(LifeEvent.user_id > last_user_id)
+        chunk_ids = [row.user_id for row in id_query.order_by(LifeEvent.user_id).limit(chunk_size)]
+        if not chunk_ids:
+            return
+
+        rows = db.query(
+            LifeEvent.user_id, LifeEvent.year, LifeEvent.month, LifeEvent.score, LifeEvent.id
+        ).filter(LifeEvent.user_id.in_(chunk_ids)).order_by(LifeEvent.user_id).all()
+        db.rollback()  # End the read transaction before the chunk is written
+
+        yield [
+            (user_id, sorted_points([SeriesPoint(row.year, row.month, row.score, row.id) for row in user_rows]))
+            for user_id, user_rows in groupby(rows, key=lambda row: row.user_id)
+        ]
+        last_user_id = chunk_ids[-1]
+
+
+def stacked_linear_trend(series: List[List[SeriesPoint]], forecast_years: int) -> Tuple[np.ndarray, List[Optional[Dict]], np.ndarray]:
+    """
+    Fit y = a + b * (x - x0) for every series at once.
+
+    Series are padded into (n_series, max_len) matrices with a mask, so the
+    least-squares sums are single reductions along axis 1. Series with 3+
+    points use decimal years like generate_statistical_forecast; shorter ones
+    use whole years like simple_linear_forecast.
+
+    Returns the (n_series, forecast_years) trend forecasts, the per-series
+    OLS sums (None for short series) and the future years matrix.
+    """
+    lengths = np.array([len(points) for points in series])
+    width = int(lengths.max())
+    X = np.zeros((len(series), width))
+    Y = np.zeros((len(series), width))
+    for row, points in enumerate(series):
+        long_series = len(points) >= 3
+        X[row, :len(points)] = [decimal_year(p) if long_series else p.year for p in points]
+        Y[row, :len(points)] = [p.score for p in points]
+    mask = np.arange(width)[None, :] < lengths[:, None]
+
+    x0 = X[:, 0]
+    xc = np.where(mask, X - x0[:, None], 0.0)
+    Y = np.where(mask, Y, 0.0)
+    n = lengths.astype(float)
+    sx = xc.sum(axis=1)
+    sy = Y.sum(axis=1)
+    sxx = (xc * xc).sum(axis=1)
+    sxy = (xc * Y).sum(axis=1)
+
+    denominator = n * sxx - sx ** 2
+    safe = np.where(denominator != 0, denominator, 1.0)
+    slope = np.where(denominator != 0, (n * sxy - sx * sy) / safe, 0.0)
+    intercept = (sy - slope * sx) / n
+
+    last_x = X[np.arange(len(series)), lengths - 1]
+    last_year = np.where(lengths >= 3, np.floor(last_x), X.max(axis=1, where=mask, initial=-np.inf))
+    future = last_year[:, None] + np.arange(1, forecast_years + 1)[None, :]
+    trend = intercept[:, None] + slope[:, None] * (future - x0[:, None])
+
+    sums = [
+        {"x0": float(x0[i]), "n": int(lengths[i]), "sx": float(sx[i]), "sy": float(sy[i]),
+         "sxx": float(sxx[i]), "sxy": float(sxy[i])} if lengths[i] >= 3 else None
+        for i in range(len(series))
+    ]
+    return trend, sums, future.astype(int)
+
+
+def fit_smoothing_batch(score_arrays: List[np.ndarray], forecast_years: int) -> List[Tuple]:
+    """Process-pool task: ETS + ARIMA for a batch of series"""
+    with warnings.catch_warnings():
+        # Convergence chatter from thousands of short series drowns the progress output
+        warnings.simplefilter("ignore")
+        return [fit_smoothing_models(scores, forecast_years) for scores in score_arrays]
+
+
+def _upsert_forecast_states(db: Session, rows: List[Dict]) -> None:
+    """Insert or replace forecast_states rows in one statement where the dialect allows it"""
+    dialect = db.bind.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(ForecastState)
+        statement = statement.on_conflict_do_update(
+            index_elements=[ForecastState.user_id],
+            set_={
+                "state_data": statement.excluded.state_data,
+                "forecast_data": statement.excluded.forecast_data,
+                "updated_at": statement.excluded.updated_at
+            }
+        )
+        db.execute(statement, rows)
+    else:
+        db.query(ForecastState).filter(
+            ForecastState.user_id.in_([row["user_id"] for row in rows])
+        ).delete(synchronize_session=False)
+        db.bulk_insert_mappings(ForecastState, rows)
+
+
+def forecast_chunk(
+    chunk: List[UserSeries],
+    pool: Optional[ProcessPoolExecutor],
+    forecast_years: int = 5,
+    linear_only: bool = False,
+    task_size: int = 32,
+    engine: Optional[str] = None
+) -> List[Dict]:
+    """
+    Forecast one chunk of users; returns forecast_states rows ready for upsert.
+    Series on the fast engine are smoothed in-process and stored without model
+    state; series on the full engine go to the pool.
+    """
+    series = [points for _, points in chunk]
+    trend, sums, future = stacked_linear_trend(series, forecast_years)
+
+    long_rows = [i for i, points in enumerate(series) if len(points) >= 3]
+    fast_rows = set()
+    if not linear_only:
+        fast_rows = {i for i in long_rows if resolve_engine(engine, len(series[i])) == "fast"}
+    full_rows = [i for i in long_rows if i not in fast_rows]
+
+    smoothing: Dict[int, Tuple] = {}
+    for i in fast_rows:
+        scores = np.array([p.score for p in series[i]])
+        forecasts = [ar1_fast(scores, forecast_years)]
+        if len(scores) >= 4:
+            forecasts.insert(0, holt_linear_fast(scores, forecast_years))
+        smoothing[i] = (forecasts, None, None)
+
+    if full_rows and not linear_only:
+        score_arrays = [np.array([p.score for p in series[i]]) for i in full_rows]
+        batches = [score_arrays[i:i + task_size] for i in range(0, len(score_arrays), task_size)]
+        mapper = pool.map if pool is not None else map
+        results = [
+            fitted
+            for batch_result in mapper(fit_smoothing_batch, batches, [forecast_years] * len(batches))
+            for fitted in batch_result
+        ]
+        smoothing.update(zip(full_rows, results))
+
+    now = datetime.utcnow()
+    rows = []
+    for i, (user_id, points) in enumerate(chunk):
+        forecasts, ets_state, arima_state = smoothing.get(i, ([], None, None))
+        scores = np.array([p.score for p in points])
+        forecast = combine_forecasts(forecasts + [trend[i]], scores, list(future[i]))
+        has_state = sums[i] is not None and i not in fast_rows
+        state = build_state(points, sums[i], ets_state, arima_state) if has_state else None
+        rows.append({
+            "user_id": user_id,
+            "state_data": json.dumps(state) if state else None,
+            "forecast_data": json.dumps([{**point, "reasoning": None} for point in forecast]),
+            "updated_at": now
+        })
+    return rows
+
+
+def run_batch_forecast(
+    chunk_size: int = 1000,
+    workers: int = settings.FORECAST_WORKERS,
+    forecast_years: int = 5,
+    linear_only: bool = False,
+    user_ids: Optional[List[str]] = None,
+    engine: Optional[str] = None
+) -> Dict:
+    """Re-forecast every user (or `user_ids`) and report throughput"""
+    started = time.perf_counter()
+    total_series = 0
+    total_points = 0
+
+    pool = None
+    if not linear_only and (engine or settings.FORECAST_ENGINE) != "fast":
+        pool = ProcessPoolExecutor(
+            max_workers=workers or None,
+            mp_context=multiprocessing.get_context(settings.FORECAST_START_METHOD)
+        )
+
+    db = SessionLocal()
+    try:
+        for chunk in iter_user_series(db, chunk_size, user_ids):
+            rows = forecast_chunk(chunk, pool, forecast_years, linear_only, engine=engine)
+            _upsert_forecast_states(db, rows)
+            db.commit()
+
+            total_series += len(chunk)
+            total_points += sum(len(points) for _, points in chunk)
+            elapsed = time.perf_counter() - started
+            logger.info("Forecasted %d series (%.1f series/sec)", total_series, total_series / elapsed)
+    finally:
+        db.close()
+        if pool is not None:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "series": total_series,
+        "points": total_points,
+        "seconds": round(elapsed, 3),
+        "series_per_sec": round(total_series / elapsed, 1) if elapsed else 0.0
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-forecast all users in bulk")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Users per chunk")
+    parser.add_argument("--workers", type=int, default=settings.FORECAST_WORKERS, help="Process pool size (0 = CPU count)")
+    parser.add_argument("--forecast-years", type=int, default=5)
+    parser.add_argument("--linear-only", action="store_true", help="Skip ETS/ARIMA and fit only the vectorized trend")
+    parser.add_argument("--engine", choices=["full", "fast", "auto"], default=None, help="Forecast engine (default: FORECAST_ENGINE)")
+    parser.add_argument("--user-id", action="append", dest="user_ids", help="Limit to these users (repeatable)")
+    args = parser.parse_args()
+    configure_logging()
+
+    summary = run_batch_forecast(
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        forecast_years=args.forecast_years,
+        linear_only=args.linear_only,
+        user_ids=args.user_ids,
+        engine=args.engine
+    )
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Cohort Statistics
+"People your age" comparisons: score percentiles and phase distributions of
+everyone born in the same decade, per calendar year.
+
+Each (birth_decade, year) bucket is a mergeable sketch: a score histogram
+per phase at 0.1 resolution (201 bins over [-10, 10]). Scores are bounded
+and entered with one decimal, so percentiles are exact at that precision.
+Buckets merge by addition (a decade across all years) and, unlike t-digest
+or KLL sketches, the histogram supports deleting an event.
+
+Writes: create_life_events and delete_event add +1/-1 to the event's
+cohort_bins row in the same transaction as the event itself, as an atomic
+`count = count + delta` upsert, so concurrent workers never lose counts.
+
+Reads: every API process holds all buckets in memory and serves
+GET /api/cohorts/... from there, with summaries cached per bucket until
+it changes. A background loop reloads the rows changed since its previous
+pass, straight after each local write and every COHORT_REFRESH_INTERVAL
+seconds to pick up other workers' writes. Rows carry absolute counts, so
+reading one twice is harmless.
+
+Usage (count events stored before cohort statistics existed):
+    python -m app.services.cohort_stats --rebuild
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentation import configure_logging
+from app.db.database import AsyncSessionLocal, SessionLocal
+from app.db.models import CohortBin, LifeEvent, User
+
+logger = logging.getLogger(__name__)
+
+PHASES = ["Very Low", "Low", "Moderate", "High", "Very High"]
+PERCENTILES = (10, 25, 50, 75, 90)
+SCORE_BINS = 201
+SCORE_VALUES = (np.arange(SCORE_BINS) - 100) / 10.0
+
+# Rows committed shortly before a refresh may carry an earlier updated_at, so
+# each pass re-reads this far behind the previous one
+_REFRESH_OVERLAP = timedelta(seconds=30)
+
+BinKey = Tuple[int, int, str, int]  # birth_decade, year, phase, score_bin
+
+
+def birth_decade(dob: str) -> int:
+    return int(dob[:4]) // 10 * 10
+
+
+def score_bin(score: float) -> int:
+    """Histogram bin of a score: 0 for -10.0, 100 for 0.0, 200 for 10.0"""
+    return min(max(math.floor(score * 10 + 0.5) + 100, 0), SCORE_BINS - 1)
+
+
+def cohort_deltas(dob: str, events: Iterable[Dict], sign: int = 1) -> Counter:
+    """Per-bin count changes for event rows (year, phase and score keys) of one user"""
+    decade = birth_decade(dob)
+    deltas: Counter = Counter()
+    for event in events:
+        deltas[(decade, event["year"], event["phase"], score_bin(event["score"]))] += sign
+    return deltas
+
+
+def _upsert_statement(dialect: str, increment: bool):
+    """INSERT ... ON CONFLICT that adds to (increment) or replaces the stored count"""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(CohortBin)
+    return statement.on_conflict_do_update(
+        index_elements=[CohortBin.birth_decade, CohortBin.year, CohortBin.phase, CohortBin.score_bin],
+        set_={
+            "count": CohortBin.count + statement.excluded["count"] if increment else statement.excluded["count"],
+            "updated_at": statement.excluded.updated_at
+        }
+    )
+
+
+def _bin_rows(counts: Dict[BinKey, int]) -> List[Dict]:
+    now = datetime.utcnow()
+    # Sorted so concurrent writers lock shared rows in the same order
+    return [
+        {"birth_decade": decade, "year": year, "phase": phase, "score_bin": bin_index, "count": count, "updated_at": now}
+        for (decade, year, phase, bin_index), count in sorted(counts.items())
+        if count
+    ]
+
+
+async def record_cohort_events(db: AsyncSession, dob: str, events: Iterable[Dict], sign: int = 1) -> None:
+    """
+    Count events of a user born on `dob` into their cohort (sign=-1 removes
+    them). Runs in the caller's transaction; the caller commits and then
+    calls cohort_stats.notify().
+    """
+    rows = _bin_rows(cohort_deltas(dob, events, sign))
+    if rows:
+        await db.execute(_upsert_statement(db.bind.dialect.name, increment=True), rows)
+
+
+def summarize(histograms: List[np.ndarray]) -> Optional[Dict[str, Any]]:
+    """Event count, mean, percentiles and phase shares of merged per-phase histograms"""
+    counts = np.array([int(histogram.sum()) for histogram in histograms])
+    total = np.sum(histograms, axis=0)
+    n = int(counts.sum())
+    if n <= 0:
+        return None
+    cumulative = np.cumsum(total)
+    # Nearest rank: the smallest score with at least p% of events at or below it
+    ranks = [max(math.ceil(p / 100 * n), 1) for p in PERCENTILES]
+    indexes = np.searchsorted(cumulative, ranks)
+    return {
+        "events": n,
+        "mean": round(float(total @ SCORE_VALUES) / n, 2),
+        "percentiles": {f"p{p}": float(SCORE_VALUES[i]) for p, i in zip(PERCENTILES, indexes)},
+        "phases": [
+            {"phase": phase, "count": int(count), "percentage": round(float(count) / n * 100, 1)}
+            for phase, count in zip(PHASES, counts)
+            if count
+        ]
+    }
+
+
+class CohortStats:
+    """In-memory cohort buckets, refreshed from cohort_bins by a background loop"""
+
+    def __init__(self):
+        # (birth_decade, year) -> one histogram per phase, in PHASES order
+        self._buckets: Dict[Tuple[int, int], np.ndarray] = {}
+        # (birth_decade, year or None for all years) -> summary
+        self._summaries: Dict[Tuple[int, Optional[int]], Optional[Dict]] = {}
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.refreshes = 0
+        self.rows_loaded = 0
+        self.last_refresh_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._watermark is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    def notify(self) -> None:
+        """Refresh now (after this process committed an event write)"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_forever(self) -> None:
+        while True:
+            # Cleared before refreshing so a write committed meanwhile triggers another pass
+            self._wakeup.clear()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cohort statistics refresh failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.COHORT_REFRESH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self) -> int:
+        """Load the rows changed since the previous refresh (all rows the first time)"""
+        started = time.perf_counter()
+        refreshed_at = datetime.utcnow()
+        query = select(CohortBin.birth_decade, CohortBin.year, CohortBin.phase, CohortBin.score_bin, CohortBin.count)
+        if self._watermark is not None:
+            query = query.where(CohortBin.updated_at >= self._watermark - _REFRESH_OVERLAP)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+        self.apply(rows)
+        self._watermark = refreshed_at
+        self.refreshes += 1
+        self.rows_loaded += len(rows)
+        self.last_refresh_seconds = time.perf_counter() - started
+        return len(rows)
+
+    def apply(self, rows: Iterable[Tuple[int, int, str, int, int]]) -> None:
+        """Set absolute bin counts and drop the summaries they invalidate"""
+        phase_index = {phase: i for i, phase in enumerate(PHASES)}
+        for decade, year, phase, bin_index, count in rows:
+            if phase not in phase_index:
+                continue
+            bucket = self._buckets.get((decade, year))
+            if bucket is None:
+                bucket = self._buckets[(decade, year)] = np.zeros((len(PHASES), SCORE_BINS), dtype=np.int64)
+            # Negative only when events stored before a --rebuild are deleted
+            bucket[phase_index[phase], bin_index] = max(count, 0)
+            self._summaries.pop((decade, year), None)
+            self._summaries.pop((decade, None), None)
+
+    def summary(self, decade: int, year: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Summary of one bucket, or of the whole decade when `year` is None; None if empty"""
+        key = (decade, year)
+        if key not in self._summaries:
+            if year is None:
+                buckets = [bucket for (d, _), bucket in self._buckets.items() if d == decade]
+                merged = np.sum(buckets, axis=0) if buckets else None
+            else:
+                merged = self._buckets.get(key)
+            summary = summarize(list(merged)) if merged is not None else None
+            if summary is not None:
+                summary = {"birth_decade": decade, "year": year, **summary}
+            self._summaries[key] = summary
+        return self._summaries[key]
+
+    def years(self, decade: int) -> List[int]:
+        return sorted(year for (d, year) in self._buckets if d == decade and self.summary(d, year))
+
+    def decades(self) -> List[int]:
+        return sorted({decade for decade, _ in self._buckets if self.summary(decade)})
+
+    def percentile_rank(self, decade: int, year: int, score: float) -> Optional[float]:
+        """Share of the bucket's events below `score`, counting ties as half (0-100)"""
+        bucket = self._buckets.get((decade, year))
+        if bucket is None:
+            return None
+        total = bucket.sum(axis=0)
+        n = int(total.sum())
+        if n <= 0:
+            return None
+        index = score_bin(score)
+        return round((float(total[:index].sum()) + float(total[index]) / 2) / n * 100, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "buckets": len(self._buckets),
+            "refreshes": self.refreshes,
+            "rows_loaded": self.rows_loaded,
+            "last_refresh_ms": round(self.last_refresh_seconds * 1000, 3) if self.last_refresh_seconds is not None else None
+        }
+
+
+cohort_stats = CohortStats()
+
+
+def rebuild_cohort_bins(db: Session, chunk_size: int = 5000) -> Dict:
+    """
+    Recount every cohort from life_events. Rows of cohorts that no longer
+    have events are zeroed rather than deleted, so running API processes
+    pick the change up on their next refresh.
+    """
+    started = time.perf_counter()
+    birth_year = func.substr(User.dob, 1, 4)
+    grouped = db.execute(
+        select(birth_year, LifeEvent.year, LifeEvent.phase, LifeEvent.score, func.count())
+        .join(User, User.id == LifeEvent.user_id)
+        .group_by(birth_year, LifeEvent.year, LifeEvent.phase, LifeEvent.score)
+    )
+    counts: Counter = Counter()
+    for year_of_birth, year, phase, score, count in grouped:
+        counts[(int(year_of_birth) // 10 * 10, year, phase, score_bin(score))] += count
+
+    rows = _bin_rows(counts)
+    db.execute(update(CohortBin).values(count=0, updated_at=datetime.utcnow()))
+    statement = _upsert_statement(db.bind.dialect.name, increment=False)
+    for start in range(0, len(rows), chunk_size):
+        db.execute(statement, rows[start:start + chunk_size])
+    db.commit()
+
+    return {
+        "bins": len(rows),
+        "events": sum(counts.values()),
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the cohort statistics")
+    parser.add_argument("--rebuild", action="store_true", help="Recount every cohort from the stored life events")
+    args = parser.parse_args()
+    configure_logging()
+    if not args.rebuild:
+        parser.error("nothing to do (pass --rebuild)")
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(rebuild_cohort_bins(db)))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
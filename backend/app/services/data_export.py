@@ -0,0 +1,311 @@
+"""
+Data Export Service
+Streams whole tables (users, events, analyses) out of the database for
+backups and analytics pulls, in constant memory:
+1. Rows are read through a server-side cursor, EXPORT_BATCH_SIZE at a time
+   (yield_per), as plain rows rather than ORM objects
+2. Each batch is encoded as NDJSON, or as an Arrow record batch / Parquet
+   row group when pyarrow is installed, and gzipped on the fly if asked
+3. Rows come out in primary key order, so an interrupted export resumes
+   with `after` set to the id of the last row received
+
+Filters: owning user(s) and a created_at range. The export reads one
+consistent snapshot, in a single transaction.
+
+Usage:
+    python -m app.services.data_export events --gzip --output events.ndjson.gz
+    python -m app.services.data_export analyses --format parquet --since 2026-01-01 --output analyses.parquet
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Sequence
+
+from sqlalchemy import Table, select
+
+from app.core.config import settings
+from app.core.instrumentation import configure_logging
+from app.db.database import AsyncSessionLocal, engine
+from app.db.models import Analysis, LifeEvent, User
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from pyarrow import ipc
+except ImportError as e:  # Arrow and Parquet exports need pyarrow; NDJSON does not
+    pa = pq = ipc = None
+    if getattr(e, "name", None) != "pyarrow":
+        # Installed but unusable, e.g. a release that needs a newer NumPy than the pinned one
+        logger.warning("pyarrow failed to import, Arrow and Parquet exports are off: %s", e)
+
+EXPORT_TABLES: Dict[str, Table] = {
+    "users": User.__table__,
+    "events": LifeEvent.__table__,
+    "analyses": Analysis.__table__
+}
+
+EXPORT_FORMATS = ("ndjson", "arrow", "parquet")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+FILE_EXTENSIONS = {"ndjson": "ndjson", "arrow": "arrows", "parquet": "parquet"}
+
+
+def check_format(fmt: str, compress: bool) -> None:
+    """Raises ValueError for a format this process cannot write"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    if fmt != "ndjson" and pa is None:
+        raise ValueError(f"{fmt} exports need pyarrow (pip install \"pyarrow>=14,<17\"; see the log if it is installed)")
+    if fmt == "parquet" and compress:
+        raise ValueError("Parquet is compressed internally; gzip applies to ndjson and arrow")
+
+
+def export_query(
+    table_name: str,
+    user_ids: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None
+):
+    """
+    Rows of one table in primary key order. `since`/`until` bound created_at
+    (until is exclusive); `after` is the id of the last row already exported.
+    Raises KeyError for an unknown table and ValueError for a malformed `after`.
+    """
+    table = EXPORT_TABLES[table_name]
+    query = select(*table.c).order_by(table.c.id)
+    if user_ids:
+        owner = table.c.id if table_name == "users" else table.c.user_id
+        query = query.where(owner.in_(list(user_ids)))
+    if since is not None:
+        query = query.where(table.c.created_at >= since)
+    if until is not None:
+        query = query.where(table.c.created_at < until)
+    if after is not None:
+        try:
+            after_id = table.c.id.type.python_type(after)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid `after` for {table_name}: {after!r}")
+        query = query.where(table.c.id > after_id)
+    return query
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+class _BufferSink:
+    """Write-only file object for pyarrow's writers; take() hands over what was written since the last call"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(table: Table):
+    types = {int: pa.int64(), float: pa.float64(), bool: pa.bool_(), str: pa.string(), bytes: pa.binary(), datetime: pa.timestamp("us")}
+    return pa.schema([pa.field(column.name, types[column.type.python_type]) for column in table.c])
+
+
+class ExportWriter:
+    """
+    Encodes batches of rows of one table. write() and close() return the
+    bytes ready to send (possibly empty while gzip or a writer is buffering).
+    """
+
+    def __init__(self, table_name: str, fmt: str = "ndjson", compress: bool = False):
+        check_format(fmt, compress)
+        table = EXPORT_TABLES[table_name]
+        self.table_name = table_name
+        self.fmt = fmt
+        self.columns = [column.name for column in table.c]
+        self._id_index = self.columns.index("id")
+        self._gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+        self._sink = None
+        self._arrow_writer = None
+        if fmt != "ndjson":
+            self._schema = _arrow_schema(table)
+            self._sink = _BufferSink()
+            output = pa.PythonFile(self._sink, mode="w")
+            if fmt == "arrow":
+                self._arrow_writer = ipc.new_stream(output, self._schema)
+            else:
+                self._arrow_writer = pq.ParquetWriter(output, self._schema, compression="zstd")
+        self.rows = 0
+        self.bytes = 0
+        self.last_id = None
+
+    def _out(self, data: bytes) -> bytes:
+        if self._gzip is not None:
+            data = self._gzip.compress(data)
+        self.bytes += len(data)
+        return data
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        if not rows:
+            return b""
+        self.rows += len(rows)
+        self.last_id = rows[-1][self._id_index]
+        if self.fmt == "ndjson":
+            lines = [
+                json.dumps(dict(zip(self.columns, row)), default=_json_default, separators=(",", ":"))
+                for row in rows
+            ]
+            return self._out(("\n".join(lines) + "\n").encode("utf-8"))
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), self._schema)]
+        self._arrow_writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self._schema))
+        return self._out(self._sink.take())
+
+    def close(self) -> bytes:
+        """End of the export: the Arrow end-of-stream marker or Parquet footer, and the gzip trailer"""
+        data = b""
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+            data = self._out(self._sink.take())
+        if self._gzip is not None:
+            tail = self._gzip.flush()
+            self.bytes += len(tail)
+            data += tail
+        return data
+
+    def summary(self) -> Dict:
+        return {
+            "table": self.table_name,
+            "format": self.fmt,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "last_id": self.last_id  # Pass as `after` to resume
+        }
+
+
+async def stream_export(
+    table_name: str,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    user_ids: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Encoded export chunks for a StreamingResponse, read from a session of its
+    own so it can outlive the request's session. Validate the arguments
+    (check_format, export_query) before starting the response.
+    """
+    writer = ExportWriter(table_name, fmt, compress)
+    query = export_query(table_name, user_ids, since, until, after)
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=batch_size or settings.EXPORT_BATCH_SIZE))
+        async for rows in result.partitions():
+            chunk = writer.write(rows)
+            if chunk:
+                yield chunk
+    yield writer.close()
+
+
+def export_table(
+    out: BinaryIO,
+    table_name: str,
+    fmt: str = "ndjson",
+    compress: bool = False,
+    user_ids: Optional[Sequence[str]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    after: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Dict:
+    """Write one table's export to `out` with the sync engine (CLI); returns the writer's summary and timing"""
+    writer = ExportWriter(table_name, fmt, compress)
+    query = export_query(table_name, user_ids, since, until, after)
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True,
+            yield_per=batch_size or settings.EXPORT_BATCH_SIZE
+        ).execute(query)
+        for batches, rows in enumerate(result.partitions(), start=1):
+            out.write(writer.write(rows))
+            if batches % 100 == 0:
+                logger.info("Exported %d %s rows (last id %s)", writer.rows, table_name, writer.last_id)
+    out.write(writer.close())
+    out.flush()
+    elapsed = time.perf_counter() - started
+    return {
+        **writer.summary(),
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(writer.rows / elapsed) if elapsed > 0 else None
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream a table out of the database")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson", dest="fmt")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output (ndjson and arrow)")
+    parser.add_argument("--output", default="-", help="File to write (default: stdout)")
+    parser.add_argument("--user-id", action="append", dest="user_ids", help="Limit to these users (repeatable)")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Rows created at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Rows created before this time")
+    parser.add_argument("--after", default=None, help="Resume after this id (last_id of an interrupted export)")
+    parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE, help="Rows per cursor fetch")
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        check_format(args.fmt, args.gzip)
+        export_query(args.table, after=args.after)
+    except ValueError as e:
+        parser.error(str(e))
+
+    options = dict(
+        table_name=args.table, fmt=args.fmt, compress=args.gzip, user_ids=args.user_ids,
+        since=args.since, until=args.until, after=args.after, batch_size=args.batch_size
+    )
+    if args.output == "-":
+        summary = export_table(sys.stdout.buffer, **options)
+        # The data went to stdout
+        print(json.dumps(summary, default=str), file=sys.stderr)
+    else:
+        with open(args.output, "wb") as out:
+            summary = export_table(out, **options)
+        print(json.dumps(summary, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Event Analytics
+Deterministic, data-driven insight cards computed without the LLM:
+1. Emotional Trajectory (sparkline, average, peak and low)
+2. What Shaped Your Journey (phase distribution)
+3. Patterns & Cycles (trend and volatility)
+4. Seasonal Trends (average score per calendar month)
+
+A user's events are read once into EventColumns, NumPy arrays in timeline
+order, and every card is derived from them in one vectorized pass:
+bincount for phases and months, argmax/argmin for peaks, diff/std for
+patterns. Being cheap, the cards are ready before any LLM section.
+"""
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+PHASES = ["Very Low", "Low", "Moderate", "High", "Very High"]
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+PATTERN_DESCRIPTIONS = {
+    "growth": "Your journey shows consistent upward growth",
+    "decline": "You've faced increasing challenges recently",
+    "waves": "Your emotions cycle through highs and lows",
+    "stable": "You maintain emotional stability",
+    "emerging": "Your pattern is still emerging"
+}
+
+
+class EventColumns(NamedTuple):
+    """A user's events as parallel columns, in the order they were given"""
+    years: np.ndarray  # int
+    months: np.ndarray  # int, 0 where the month is unknown
+    scores: np.ndarray  # float
+    phase_codes: np.ndarray  # int index into `phases`
+    phases: List[str]  # PHASES, plus any other labels found, in order of appearance
+    descriptions: List[str]
+
+    @classmethod
+    def from_events(cls, events) -> "EventColumns":
+        phases = list(PHASES)
+        codes = {phase: i for i, phase in enumerate(phases)}
+        phase_codes = []
+        for event in events:
+            if event.phase not in codes:
+                codes[event.phase] = len(phases)
+                phases.append(event.phase)
+            phase_codes.append(codes[event.phase])
+        return cls(
+            years=np.fromiter((event.year for event in events), dtype=np.int64, count=len(events)),
+            months=np.fromiter((event.month or 0 for event in events), dtype=np.int64, count=len(events)),
+            scores=np.fromiter((event.score for event in events), dtype=float, count=len(events)),
+            phase_codes=np.asarray(phase_codes, dtype=np.int64),
+            phases=phases,
+            descriptions=[event.description for event in events]
+        )
+
+
+def trajectory_card(columns: EventColumns) -> Dict:
+    """Card 1: sparkline with the average, and the first peak and low event"""
+    scores = columns.scores
+    average = float(scores.mean())
+    peak, low = int(np.argmax(scores)), int(np.argmin(scores))
+    return {
+        "title": "Emotional Trajectory",
+        "description": f"Your average emotional score is {average:.1f}",
+        "data": {
+            "sparkline": [{"year": year, "score": score} for year, score in zip(columns.years.tolist(), scores.tolist())],
+            "average": round(average, 2),
+            "peak": {"score": float(scores[peak]), "year": int(columns.years[peak]), "description": columns.descriptions[peak]},
+            "low": {"score": float(scores[low]), "year": int(columns.years[low]), "description": columns.descriptions[low]}
+        },
+        "visualization_type": "sparkline"
+    }
+
+
+def contributors_card(columns: EventColumns) -> Dict:
+    """Card 2: phase distribution, most frequent first (ties in order of first appearance)"""
+    n_phases = len(columns.phases)
+    counts = np.bincount(columns.phase_codes, minlength=n_phases)
+    n_events = len(columns.scores)
+    first_seen = np.full(n_phases, n_events)
+    np.minimum.at(first_seen, columns.phase_codes, np.arange(n_events))
+    present = np.flatnonzero(counts)
+    order = present[np.lexsort((first_seen[present], -counts[present]))]
+
+    donut = [
+        {
+            "phase": columns.phases[code],
+            "count": int(counts[code]),
+            "percentage": round(float(counts[code]) / n_events * 100, 1)
+        }
+        for code in order
+    ]
+    dominant_phase = donut[0]["phase"] if donut else "Moderate"
+    return {
+        "title": "What Shaped Your Journey",
+        "description": f"Your journey was predominantly {dominant_phase}",
+        "data": {"donut": donut, "dominant_phase": dominant_phase},
+        "visualization_type": "donut"
+    }
+
+
+def pattern_features(scores: np.ndarray) -> Tuple[float, float]:
+    """Mean event-to-event change and volatility (std) of scores in timeline order"""
+    differences = np.diff(scores)
+    mean_change = float(differences.mean()) if len(differences) else 0.0
+    return mean_change, float(scores.std())
+
+
+def patterns_card(columns: EventColumns) -> Dict:
+    """Card 3: growth, decline, waves or stable from the event-to-event changes"""
+    scores = columns.scores
+    differences = np.diff(scores)
+    mean_change, volatility = pattern_features(scores)
+    if len(scores) < 3:
+        pattern_type = "emerging"
+    elif mean_change > 1:
+        pattern_type = "growth"
+    elif mean_change < -1:
+        pattern_type = "decline"
+    elif float(differences.std()) > 3:
+        pattern_type = "waves"
+    else:
+        pattern_type = "stable"
+
+    return {
+        "title": "Patterns & Cycles",
+        "description": PATTERN_DESCRIPTIONS[pattern_type],
+        "data": {
+            "pattern_type": pattern_type,
+            "volatility": round(volatility, 2),
+            "trend": "upward" if mean_change > 0 else "downward"
+        },
+        "visualization_type": "circular"
+    }
+
+
+def seasonal_card(columns: EventColumns) -> Dict:
+    """Card 4: average score per calendar month, with the best and worst month"""
+    counts = np.bincount(columns.months, minlength=13)[1:13]
+    totals = np.bincount(columns.months, weights=columns.scores, minlength=13)[1:13]
+    has_data = counts > 0
+    averages = np.divide(totals, counts, out=np.zeros(12), where=has_data)
+
+    monthly_data = [
+        {"month": month, "average": round(float(average), 2) if present else None}
+        for month, (average, present) in enumerate(zip(averages, has_data), start=1)
+    ]
+    if has_data.any():
+        # Compare the rounded averages, as shown, so ties resolve to the earliest month
+        rounded = np.round(averages, 2)
+        best_month = int(np.argmax(np.where(has_data, rounded, -np.inf))) + 1
+        worst_month = int(np.argmin(np.where(has_data, rounded, np.inf))) + 1
+    else:
+        best_month, worst_month = 6, 1
+
+    return {
+        "title": "Seasonal Trends",
+        "description": f"You tend to feel best in {MONTH_NAMES[best_month - 1]}",
+        "data": {
+            "monthly_data": monthly_data,
+            "best_month": best_month,
+            "worst_month": worst_month
+        },
+        "visualization_type": "sinusoid"
+    }
+
+
+def data_insight_cards(events) -> Dict[str, Dict]:
+    """All data-driven cards, keyed as in the insights response; empty without events"""
+    columns = events if isinstance(events, EventColumns) else EventColumns.from_events(events)
+    if not len(columns.scores):
+        return {}
+    return {
+        "trajectory": trajectory_card(columns),
+        "contributors": contributors_card(columns),
+        "patterns": patterns_card(columns),
+        "seasonal_trends": seasonal_card(columns)
+    }
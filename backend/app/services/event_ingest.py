@@ -0,0 +1,186 @@
+"""
+Event Ingestion Service
+Bulk path behind POST /api/life-events (journal imports, migration jobs):
+1. Events whose idempotency key is already stored are skipped, so a retried
+   upload is not stored twice
+2. The rest go in with one multi-row INSERT ... RETURNING per chunk, or with
+   COPY on Postgres for large payloads
+3. Every BULK_INSERT_CHUNK_SIZE events are committed on their own, so a large
+   import never holds one long transaction. If a later chunk fails, earlier
+   chunks stay stored and a retry with the same keys completes the upload.
+"""
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import LifeEvent
+from app.schemas.schemas import LifeEventCreate
+
+# Column order for COPY records; the id is allocated from the sequence up front
+_COPY_COLUMNS = (
+    "id", "user_id", "year", "month", "phase", "score", "description",
+    "idempotency_key", "created_at", "updated_at"
+)
+
+# Keys per IN (...) lookup, well under every driver's bind parameter limit
+_KEY_LOOKUP_CHUNK = 500
+
+
+def _chunks(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def event_rows(user_id: str, events: Iterable[LifeEventCreate]) -> List[Dict]:
+    """Column dicts for a core INSERT (ORM defaults are filled in here, once)"""
+    now = datetime.utcnow()
+    return [
+        {
+            "user_id": user_id,
+            "year": event.year,
+            "month": event.month,
+            "phase": event.phase,
+            "score": event.score,
+            "description": event.description,
+            "idempotency_key": event.idempotency_key,
+            "created_at": now,
+            "updated_at": now
+        }
+        for event in events
+    ]
+
+
+async def existing_event_ids(db: AsyncSession, user_id: str, keys: Iterable[str]) -> Dict[str, int]:
+    """Map already stored idempotency keys of a user to their event ids"""
+    found: Dict[str, int] = {}
+    for chunk in _chunks(sorted(keys), _KEY_LOOKUP_CHUNK):
+        result = await db.execute(
+            select(LifeEvent.idempotency_key, LifeEvent.id).where(
+                LifeEvent.user_id == user_id,
+                LifeEvent.idempotency_key.in_(chunk)
+            )
+        )
+        found.update((key, event_id) for key, event_id in result.all())
+    return found
+
+
+async def _insert_returning(db: AsyncSession, rows: List[Dict]) -> List[int]:
+    """executemany INSERT, batched into multi-row VALUES by SQLAlchemy; ids come back in row order"""
+    if not rows:
+        return []
+    if db.bind.dialect.name == "sqlite":
+        # Ordered RETURNING degrades to one statement per row on SQLite. The
+        # writer holds the database lock for the whole statement, so rowids
+        # are allocated in row order and sorting them restores the mapping.
+        result = await db.execute(insert(LifeEvent).returning(LifeEvent.id), rows)
+        return sorted(result.scalars())
+    result = await db.execute(
+        insert(LifeEvent).returning(LifeEvent.id, sort_by_parameter_order=True),
+        rows
+    )
+    return list(result.scalars())
+
+
+async def _copy_rows(db: AsyncSession, rows: List[Dict]) -> List[int]:
+    """COPY rows into life_events (Postgres/asyncpg); ids are drawn from the sequence first so they can be returned"""
+    ids = (await db.execute(
+        text("SELECT nextval(pg_get_serial_sequence('life_events', 'id')) FROM generate_series(1, :n)"),
+        {"n": len(rows)}
+    )).scalars().all()
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    # Same connection and transaction the session is using
+    await raw_connection.driver_connection.copy_records_to_table(
+        LifeEvent.__tablename__,
+        records=[
+            (event_id, *(row[column] for column in _COPY_COLUMNS[1:]))
+            for event_id, row in zip(ids, rows)
+        ],
+        columns=list(_COPY_COLUMNS)
+    )
+    return list(ids)
+
+
+def _is_duplicate_key(error: Exception) -> bool:
+    # IntegrityError from SQLAlchemy, UniqueViolationError straight from asyncpg during COPY
+    return isinstance(error, IntegrityError) or getattr(error, "sqlstate", None) == "23505"
+
+
+async def bulk_insert_events(
+    db: AsyncSession,
+    user_id: str,
+    events: List[LifeEventCreate],
+    chunk_size: Optional[int] = None,
+    before_commit: Optional[Callable[[AsyncSession, List[Dict]], Awaitable[None]]] = None
+) -> Tuple[List[int], int, int]:
+    """
+    Store `events` for a user in bulk.
+
+    `before_commit` is awaited with the rows of each chunk just before that
+    chunk commits, so derived data (cohort statistics) is written in the
+    same transaction.
+
+    Returns (event_ids, created, duplicates). event_ids has one id per
+    submitted event in request order; events skipped by idempotency key
+    report the id that was stored for that key.
+    """
+    chunk_size = chunk_size or settings.BULK_INSERT_CHUNK_SIZE
+    keys = {event.idempotency_key for event in events if event.idempotency_key}
+    known = await existing_event_ids(db, user_id, keys) if keys else {}
+
+    # Indexes of events to insert; a key repeated within the payload is stored once
+    pending: List[int] = []
+    first_index: Dict[str, int] = {}
+    for index, event in enumerate(events):
+        key = event.idempotency_key
+        if key:
+            if key in known or key in first_index:
+                continue
+            first_index[key] = index
+        pending.append(index)
+    rows = event_rows(user_id, (events[index] for index in pending))
+
+    use_copy = db.bind.dialect.name == "postgresql" and len(rows) >= settings.BULK_COPY_MIN_ROWS
+    write_chunk = _copy_rows if use_copy else _insert_returning
+
+    ids_by_index: Dict[int, int] = {}
+    for chunk_indexes, chunk_rows in zip(_chunks(pending, chunk_size), _chunks(rows, chunk_size)):
+        try:
+            inserted = await write_chunk(db, list(chunk_rows))
+            if before_commit:
+                await before_commit(db, list(chunk_rows))
+            await db.commit()
+        except Exception as e:
+            if not _is_duplicate_key(e):
+                raise
+            # A concurrent retry stored some of these keys after the lookup: skip them and insert the rest
+            await db.rollback()
+            chunk_keys = {row["idempotency_key"] for row in chunk_rows if row["idempotency_key"]}
+            known.update(await existing_event_ids(db, user_id, chunk_keys))
+            remaining = [
+                (index, row) for index, row in zip(chunk_indexes, chunk_rows)
+                if row["idempotency_key"] not in known
+            ]
+            chunk_indexes = [index for index, _ in remaining]
+            inserted = await _insert_returning(db, [row for _, row in remaining])
+            if before_commit:
+                await before_commit(db, [row for _, row in remaining])
+            await db.commit()
+        ids_by_index.update(zip(chunk_indexes, inserted))
+
+    event_ids = []
+    for index, event in enumerate(events):
+        key = event.idempotency_key
+        if index in ids_by_index:
+            event_ids.append(ids_by_index[index])
+        elif key in known:
+            event_ids.append(known[key])
+        else:
+            event_ids.append(ids_by_index[first_index[key]])
+
+    created = len(ids_by_index)
+    return event_ids, created, len(events) - created
@@ -0,0 +1,121 @@
+"""
+Event Query Service
+Per-user event reads in timeline order (year, month, id), served by the
+ix_life_events_user_year_month_id index:
+- user_events_query: the whole history (analysis)
+- user_events_page: keyset pagination with an opaque cursor
+- iter_user_events: page-by-page iteration for streaming responses
+
+Month is optional, so the keyset predicate follows the database's own NULL
+ordering (first on SQLite, last on Postgres) to keep reading the index in order.
+"""
+import base64
+import json
+from typing import AsyncIterator, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import LifeEvent
+
+Cursor = Tuple[int, Optional[int], int]  # (year, month, id) of the last event returned
+
+
+def encode_cursor(event: LifeEvent) -> str:
+    raw = json.dumps([event.year, event.month, event.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Parse a cursor from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        year, month, event_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(year, int) or not isinstance(event_id, int) or not (month is None or isinstance(month, int)):
+        raise ValueError("Invalid cursor")
+    return year, month, event_id
+
+
+def _nulls_first(db: AsyncSession) -> bool:
+    # Postgres sorts NULLs last in ascending order, SQLite (and MySQL) first
+    return db.bind.dialect.name != "postgresql"
+
+
+def _after(cursor: Cursor, nulls_first: bool) -> ColumnElement:
+    """Events strictly after `cursor` in (year, month, id) order"""
+    year, month, event_id = cursor
+    if month is None:
+        same_month_after = and_(LifeEvent.month.is_(None), LifeEvent.id > event_id)
+        # Dated months come after the undated ones only when NULLs sort first
+        month_after = or_(LifeEvent.month.isnot(None), same_month_after) if nulls_first else same_month_after
+    else:
+        month_after = or_(
+            LifeEvent.month > month,
+            and_(LifeEvent.month == month, LifeEvent.id > event_id)
+        )
+        if not nulls_first:
+            month_after = or_(month_after, LifeEvent.month.is_(None))
+    return or_(
+        LifeEvent.year > year,
+        and_(LifeEvent.year == year, month_after)
+    )
+
+
+def user_events_query(user_id: str):
+    """All of a user's events in timeline order"""
+    return select(LifeEvent).where(
+        LifeEvent.user_id == user_id
+    ).order_by(LifeEvent.year, LifeEvent.month, LifeEvent.id)
+
+
+async def user_events_page(
+    db: AsyncSession,
+    user_id: str,
+    after: Optional[Cursor],
+    limit: int
+) -> Tuple[List[LifeEvent], Optional[str]]:
+    """Up to `limit` events after `after`; returns them with the cursor for the next page (None at the end)"""
+    query = user_events_query(user_id)
+    if after is not None:
+        query = query.where(_after(after, _nulls_first(db)))
+    # One extra row tells whether another page exists without a COUNT
+    events = list((await db.execute(query.limit(limit + 1))).scalars())
+    if len(events) <= limit:
+        return events, None
+    events = events[:limit]
+    return events, encode_cursor(events[-1])
+
+
+async def iter_user_events(
+    user_id: str,
+    after: Optional[Cursor] = None,
+    batch_size: int = 500,
+    limit: Optional[int] = None
+) -> AsyncIterator[LifeEvent]:
+    """
+    Yield events page by page from a session of its own, so it can outlive the
+    request's session in a StreamingResponse. Each page is a separate short
+    query, so no transaction stays open while the client reads.
+    """
+    remaining = limit
+    async with AsyncSessionLocal() as db:
+        while remaining is None or remaining > 0:
+            page_size = batch_size if remaining is None else min(batch_size, remaining)
+            query = user_events_query(user_id)
+            if after is not None:
+                query = query.where(_after(after, _nulls_first(db)))
+            events = list((await db.execute(query.limit(page_size))).scalars())
+            # Detach the page, then end the read transaction before yielding
+            db.expunge_all()
+            await db.rollback()
+            for event in events:
+                yield event
+            if len(events) < page_size:
+                return
+            after = (events[-1].year, events[-1].month, events[-1].id)
+            if remaining is not None:
+                remaining -= len(events)
@@ -0,0 +1,342 @@
+"""
+Event Search
+Full-text search over a user's event descriptions and rephrasings, ranked by
+BM25 (GET /api/events/{user_id}/search). The inverted index depends on the
+database:
+- SQLite: an FTS5 table (life_events_fts) over life_events, kept in step by
+  triggers on insert, update and delete, ranked with FTS5's bm25()
+- Postgres: a generated tsvector column (life_events.search_vector) with a
+  GIN index. Matches come off the index and BM25 is computed from the
+  lexeme positions stored in the vectors
+- SQLite builds without FTS5, or EVENT_SEARCH_BACKEND=python: a per-user
+  inverted index built in memory from the user's events and rebuilt when
+  they change (whole words, no stemming)
+
+Query terms are OR-ed, so events matching more of the terms (and rarer
+ones) rank first. BM25 statistics are the user's own events, except on
+SQLite where FTS5 uses the whole table.
+"""
+import logging
+import math
+import re
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import LifeEvent
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_QUERY_TERMS = 16
+
+_TOKEN = re.compile(r"\w+")
+
+# Also created by migration 0008; external content, so the text is only stored in life_events
+SQLITE_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS life_events_fts USING fts5(
+        user_id, description, rephrased_description,
+        content='life_events', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_insert AFTER INSERT ON life_events BEGIN
+        INSERT INTO life_events_fts(rowid, user_id, description, rephrased_description)
+        VALUES (new.id, new.user_id, new.description, new.rephrased_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_delete AFTER DELETE ON life_events BEGIN
+        INSERT INTO life_events_fts(life_events_fts, rowid, user_id, description, rephrased_description)
+        VALUES ('delete', old.id, old.user_id, old.description, old.rephrased_description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS life_events_fts_update
+    AFTER UPDATE OF user_id, description, rephrased_description ON life_events BEGIN
+        INSERT INTO life_events_fts(life_events_fts, rowid, user_id, description, rephrased_description)
+        VALUES ('delete', old.id, old.user_id, old.description, old.rephrased_description);
+        INSERT INTO life_events_fts(rowid, user_id, description, rephrased_description)
+        VALUES (new.id, new.user_id, new.description, new.rephrased_description);
+    END
+    """
+)
+SQLITE_REBUILD = "INSERT INTO life_events_fts(life_events_fts) VALUES ('rebuild')"
+
+# Needs Postgres 12+ (generated columns)
+POSTGRES_DDL = (
+    """
+    ALTER TABLE life_events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', description || ' ' || coalesce(rephrased_description, ''))
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_life_events_search_vector ON life_events USING gin (search_vector)"
+)
+
+# The user_id column keeps the match to one user's rows; its weight of 0 leaves it out of the score
+_FTS5_SEARCH = text(
+    "SELECT rowid, bm25(life_events_fts, 0.0, 1.0, 1.0) AS rank FROM life_events_fts "
+    "WHERE life_events_fts MATCH :match ORDER BY rank LIMIT :limit OFFSET :offset"
+)
+_POSTGRES_LEXEMES = text("SELECT tsvector_to_array(to_tsvector('english', :query))")
+# Document length is the number of distinct lexemes, length(tsvector)
+_POSTGRES_POSTINGS = text(
+    "SELECT e.id, t.lexeme, coalesce(array_length(t.positions, 1), 1), length(e.search_vector) "
+    "FROM life_events e CROSS JOIN LATERAL unnest(e.search_vector) AS t "
+    "WHERE e.user_id = :user_id AND e.search_vector @@ CAST(:tsquery AS tsquery) "
+    "AND t.lexeme = ANY(:lexemes)"
+)
+_POSTGRES_STATS = text("SELECT count(*), avg(length(search_vector)) FROM life_events WHERE user_id = :user_id")
+
+Ranking = List[Tuple[int, float]]  # (event id, score), best first
+
+
+def tokenize(value: Optional[str]) -> List[str]:
+    return _TOKEN.findall(value.lower()) if value else []
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct terms of a search query in order, at most MAX_QUERY_TERMS"""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def bm25_rank(
+    postings: Dict[str, Dict[int, int]],
+    lengths: Dict[int, int],
+    n_docs: int,
+    avgdl: float
+) -> Ranking:
+    """
+    Okapi BM25 over OR-ed terms. `postings` maps each query term to
+    {event id: term frequency}; `lengths` holds the length of every event
+    that appears in them.
+    """
+    avgdl = avgdl or 1.0
+    scores: Dict[int, float] = {}
+    for documents in postings.values():
+        df = len(documents)
+        if not df:
+            continue
+        idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+        for event_id, tf in documents.items():
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths[event_id] / avgdl)
+            scores[event_id] = scores.get(event_id, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _fts5_phrase(value: str) -> str:
+    return '"' + value.replace('"', '""') + '"'
+
+
+def fts5_match(user_id: str, terms: Sequence[str]) -> str:
+    """FTS5 query: the user's rows, then any of the terms in either text column"""
+    any_term = " OR ".join(_fts5_phrase(term) for term in terms)
+    return f"user_id : {_fts5_phrase(user_id)} AND {{description rephrased_description}} : ({any_term})"
+
+
+def _tsquery_lexeme(lexeme: str) -> str:
+    return "'" + lexeme.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+class UserIndex(NamedTuple):
+    fingerprint: Tuple  # (count, max id, max updated_at) of the user's events when it was built
+    postings: Dict[str, Dict[int, int]]
+    lengths: Dict[int, int]
+    avgdl: float
+
+
+def build_user_index(fingerprint: Tuple, rows: Iterable[Tuple[int, str, Optional[str]]]) -> UserIndex:
+    """Inverted index over (id, description, rephrased_description) rows"""
+    postings: Dict[str, Dict[int, int]] = {}
+    lengths: Dict[int, int] = {}
+    for event_id, description, rephrased in rows:
+        tokens = tokenize(description) + tokenize(rephrased)
+        lengths[event_id] = len(tokens)
+        for token in tokens:
+            documents = postings.setdefault(token, {})
+            documents[event_id] = documents.get(event_id, 0) + 1
+    avgdl = sum(lengths.values()) / len(lengths) if lengths else 0.0
+    return UserIndex(fingerprint, postings, lengths, avgdl)
+
+
+def ensure_search_index(bind: Engine) -> Optional[str]:
+    """
+    Create the database's native index if it is missing (startup, for
+    databases created with create_all; shared databases get it from
+    migration 0008). Returns the backend name, or None when the database
+    has no native full-text search.
+    """
+    if settings.EVENT_SEARCH_BACKEND == "python":
+        return None
+    dialect = bind.dialect.name
+    try:
+        with bind.begin() as connection:
+            if dialect == "sqlite":
+                # The triggers go when life_events is dropped (drop_all), leaving a stale index behind
+                in_step = connection.execute(text(
+                    "SELECT count(*) FROM sqlite_master WHERE name IN "
+                    "('life_events_fts', 'life_events_fts_insert', 'life_events_fts_delete', 'life_events_fts_update')"
+                )).scalar() == 4
+                for statement in SQLITE_DDL:
+                    connection.execute(text(statement))
+                if not in_step:
+                    connection.execute(text(SQLITE_REBUILD))
+                return "fts5"
+            if dialect == "postgresql":
+                for statement in POSTGRES_DDL:
+                    connection.execute(text(statement))
+                return "postgres"
+    except Exception as e:
+        # SQLite compiled without FTS5, Postgres before 12
+        logger.warning("No native full-text index for %s, searching in memory: %s", dialect, e)
+    return None
+
+
+class EventSearch:
+    """Ranked search over one user's events, on the native index when the database has one"""
+
+    def __init__(self, cache_users: int):
+        self.cache_users = cache_users
+        self._backend: Optional[str] = None
+        self._indexes: "OrderedDict[str, UserIndex]" = OrderedDict()
+        self.searches = 0
+        self.index_builds = 0
+        self.index_hits = 0
+
+    async def backend(self, db: AsyncSession) -> str:
+        """fts5, postgres or python, looked up once per process"""
+        if self._backend is None:
+            backend = "python"
+            dialect = db.bind.dialect.name
+            if settings.EVENT_SEARCH_BACKEND != "python":
+                if dialect == "sqlite":
+                    found = await db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'life_events_fts'"))
+                    backend = "fts5" if found.first() else backend
+                elif dialect == "postgresql":
+                    found = await db.execute(text(
+                        "SELECT 1 FROM information_schema.columns "
+                        "WHERE table_name = 'life_events' AND column_name = 'search_vector'"
+                    ))
+                    backend = "postgres" if found.first() else backend
+            self._backend = backend
+        return self._backend
+
+    async def search(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        query: str,
+        limit: int,
+        offset: int = 0
+    ) -> Tuple[List[Tuple[LifeEvent, float]], bool]:
+        """One page of the user's events matching `query` with their scores, best first, and whether more follow"""
+        self.searches += 1
+        terms = query_terms(query)
+        if not terms:
+            return [], False
+
+        backend = await self.backend(db)
+        if backend == "fts5" and tokenize(user_id):
+            ranked = await self._search_fts5(db, user_id, terms, limit + 1, offset)
+        elif backend == "postgres":
+            ranked = (await self._rank_postgres(db, user_id, query))[offset:offset + limit + 1]
+        else:
+            ranked = (await self._rank_memory(db, user_id, terms))[offset:offset + limit + 1]
+
+        has_more = len(ranked) > limit
+        ranked = ranked[:limit]
+        events = await self._load(db, user_id, [event_id for event_id, _ in ranked])
+        return [(events[event_id], score) for event_id, score in ranked if event_id in events], has_more
+
+    async def _search_fts5(self, db: AsyncSession, user_id: str, terms: List[str], limit: int, offset: int) -> Ranking:
+        result = await db.execute(
+            _FTS5_SEARCH,
+            {"match": fts5_match(user_id, terms), "limit": limit, "offset": offset}
+        )
+        # bm25() is lower for better matches
+        return [(event_id, -rank) for event_id, rank in result.all()]
+
+    async def _rank_postgres(self, db: AsyncSession, user_id: str, query: str) -> Ranking:
+        lexemes = (await db.execute(_POSTGRES_LEXEMES, {"query": query})).scalar() or []
+        lexemes = lexemes[:MAX_QUERY_TERMS]
+        if not lexemes:
+            # Only stop words
+            return []
+        rows = (await db.execute(
+            _POSTGRES_POSTINGS,
+            {
+                "user_id": user_id,
+                "tsquery": " | ".join(_tsquery_lexeme(lexeme) for lexeme in lexemes),
+                "lexemes": list(lexemes)
+            }
+        )).all()
+        if not rows:
+            return []
+        n_docs, avgdl = (await db.execute(_POSTGRES_STATS, {"user_id": user_id})).one()
+        postings: Dict[str, Dict[int, int]] = {}
+        lengths: Dict[int, int] = {}
+        for event_id, lexeme, tf, length in rows:
+            postings.setdefault(lexeme, {})[event_id] = tf
+            lengths[event_id] = length
+        return bm25_rank(postings, lengths, n_docs, float(avgdl or 0.0))
+
+    async def _rank_memory(self, db: AsyncSession, user_id: str, terms: List[str]) -> Ranking:
+        index = await self._user_index(db, user_id)
+        postings = {term: index.postings.get(term, {}) for term in terms}
+        return bm25_rank(postings, index.lengths, len(index.lengths), index.avgdl)
+
+    async def _user_index(self, db: AsyncSession, user_id: str) -> UserIndex:
+        """The user's in-memory index, rebuilt when their events changed (in any process) since it was built"""
+        fingerprint = tuple((await db.execute(
+            select(func.count(LifeEvent.id), func.max(LifeEvent.id), func.max(LifeEvent.updated_at))
+            .where(LifeEvent.user_id == user_id)
+        )).one())
+        index = self._indexes.get(user_id)
+        if index is not None and index.fingerprint == fingerprint:
+            self._indexes.move_to_end(user_id)
+            self.index_hits += 1
+            return index
+
+        rows = await db.execute(
+            select(LifeEvent.id, LifeEvent.description, LifeEvent.rephrased_description)
+            .where(LifeEvent.user_id == user_id)
+        )
+        index = build_user_index(fingerprint, rows.all())
+        self.index_builds += 1
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.cache_users:
+            self._indexes.popitem(last=False)
+        return index
+
+    async def _load(self, db: AsyncSession, user_id: str, event_ids: List[int]) -> Dict[int, LifeEvent]:
+        if not event_ids:
+            return {}
+        # The user filter also drops FTS5 rows of another user whose ID contains this one's tokens
+        result = await db.execute(
+            select(LifeEvent).where(LifeEvent.user_id == user_id, LifeEvent.id.in_(event_ids))
+        )
+        return {event.id: event for event in result.scalars()}
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop the user's in-memory index after their events change (native indexes maintain themselves)"""
+        self._indexes.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self._backend or "unresolved",
+            "searches": self.searches,
+            "memory_indexes": len(self._indexes),
+            "memory_index_builds": self.index_builds,
+            "memory_index_hits": self.index_hits
+        }
+
+
+event_search = EventSearch(settings.EVENT_SEARCH_CACHE_USERS)
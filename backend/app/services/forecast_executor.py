@@ -0,0 +1,169 @@
+"""
+Forecast Executor
+Runs CPU-bound model fitting (ExponentialSmoothing, ARIMA, LinearRegression)
+in a bounded process pool so it never blocks the event loop.
+
+The pool is created at startup without blocking it; warm_up_forecasting()
+then loads the scientific stack in the background, in-process and in every
+worker, and flips the readiness flag reported by /ready.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _warmup() -> int:
+    """Import the scientific stack and run one tiny fit of every model"""
+    from app.services.prediction_service import warm_up_forecasting
+
+    warm_up_forecasting()
+    return os.getpid()
+
+
+class ForecastExecutor:
+    """
+    Bounded process pool with an async submit/await API.
+
+    At most `max_pending` jobs are handed to the pool at once; further callers
+    wait on a semaphore instead of growing the pool's internal queue without limit.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, job_timeout: float, start_method: str):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending, self.max_workers)
+        self.job_timeout = job_timeout
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._timeouts = 0
+        self.warm = False
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs submitted but not yet running on a worker, including callers waiting for a slot"""
+        return max(self._in_flight - self.max_workers, 0) + self._waiting
+
+    async def start(self) -> None:
+        """Create the pool; workers are spawned on first use or by warm_up()"""
+        if self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method)
+        )
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._loop = asyncio.get_running_loop()
+
+    async def warm_up(self) -> None:
+        """
+        Spawn every worker and load the scientific stack in it, plus in this
+        process for the inline fast engine and timeout fallback.
+        """
+        await self.start()
+        started = time.perf_counter()
+        await asyncio.gather(
+            asyncio.to_thread(_warmup),
+            *[self._loop.run_in_executor(self._pool, _warmup) for _ in range(self.max_workers)]
+        )
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        self.warm = True
+
+    async def shutdown(self) -> None:
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        await asyncio.get_running_loop().run_in_executor(
+            None, lambda: pool.shutdown(wait=True, cancel_futures=True)
+        )
+
+    async def submit(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run `fn(*args)` in a worker process and await its result.
+
+        Raises asyncio.TimeoutError if the job does not finish within `timeout`
+        (defaults to FORECAST_JOB_TIMEOUT). A timed-out job keeps its slot until
+        the worker actually finishes so the pool cannot be oversubscribed.
+        """
+        if self._pool is None:
+            await self.start()
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._on_done)
+
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future),
+                timeout=timeout if timeout is not None else self.job_timeout
+            )
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            future.cancel()
+            raise
+
+    def _on_done(self, future) -> None:
+        self._completed += 1
+        # Done callbacks fire on the pool's management thread
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._release)
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "warm": self.warm,
+            "warmup_seconds": self.warmup_seconds,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "completed": self._completed,
+            "timeouts": self._timeouts
+        }
+
+
+async def warm_up_forecasting() -> None:
+    """Background startup task; failures only delay readiness until first use"""
+    try:
+        await forecast_executor.warm_up()
+        logger.info("Forecasting warm in %ss", forecast_executor.warmup_seconds)
+    except Exception as e:
+        logger.warning("Forecasting warm-up failed: %s", e)
+
+
+forecast_executor = ForecastExecutor(
+    max_workers=settings.FORECAST_WORKERS,
+    max_pending=settings.FORECAST_MAX_PENDING,
+    job_timeout=settings.FORECAST_JOB_TIMEOUT,
+    start_method=settings.FORECAST_START_METHOD
+)
@@ -0,0 +1,243 @@
+"""
+Forecast State
+Per-user fitted model state so a newly appended event updates the forecast
+incrementally instead of refitting every model from scratch:
+- Linear trend: closed-form least squares from running sums, O(1) per event
+- Exponential Smoothing: Holt recursions with the stored smoothing parameters
+- ARIMA: innovations recursion with the stored parameters, warm-started
+  refit every FORECAST_ARIMA_REFIT_EVERY appends
+
+A full refit happens on the first forecast, when events are deleted or
+inserted before the last observation, and when a new point drifts too far
+from the one-step-ahead prediction.
+"""
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.prediction_service import (
+    SeriesPoint,
+    combine_forecasts,
+    fast_statistical_forecast,
+    fit_arima,
+    fit_exponential_smoothing,
+    model_fit,
+    resolve_engine,
+    simple_linear_forecast
+)
+
+STATE_VERSION = 1
+
+
+def decimal_year(point: SeriesPoint) -> float:
+    return point.year + (point.month or 6) / 12.0
+
+
+def sorted_points(points: List[SeriesPoint]) -> List[SeriesPoint]:
+    return sorted(points, key=decimal_year)
+
+
+def _prefix_hash(points: List[SeriesPoint]) -> str:
+    digest = hashlib.sha256()
+    for point in points:
+        digest.update(f"{point.id}:{point.year}:{point.month}:{point.score};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _ols_sums(x: np.ndarray, y: np.ndarray, x0: float) -> Dict:
+    """Sufficient statistics for y = a + b * (x - x0); centering keeps them well conditioned"""
+    xc = x - x0
+    return {
+        "x0": x0,
+        "n": int(len(x)),
+        "sx": float(xc.sum()),
+        "sy": float(y.sum()),
+        "sxx": float((xc * xc).sum()),
+        "sxy": float((xc * y).sum())
+    }
+
+
+def _ols_add(sums: Dict, x: float, y: float) -> None:
+    xc = x - sums["x0"]
+    sums["n"] += 1
+    sums["sx"] += xc
+    sums["sy"] += y
+    sums["sxx"] += xc * xc
+    sums["sxy"] += xc * y
+
+
+def _ols_predict(sums: Dict, future_years: List[int]) -> np.ndarray:
+    n = sums["n"]
+    denominator = n * sums["sxx"] - sums["sx"] ** 2
+    slope = (n * sums["sxy"] - sums["sx"] * sums["sy"]) / denominator if denominator else 0.0
+    intercept = (sums["sy"] - slope * sums["sx"]) / n
+    return intercept + slope * (np.asarray(future_years, dtype=float) - sums["x0"])
+
+
+def _ets_step(ets: Dict, y: float) -> None:
+    """One Holt update: l = a*y + (1-a)(l+b), b = B(l - l_prev) + (1-B)b"""
+    previous_level = ets["level"]
+    ets["level"] = ets["alpha"] * y + (1 - ets["alpha"]) * (previous_level + ets["trend"])
+    ets["trend"] = ets["beta"] * (ets["level"] - previous_level) + (1 - ets["beta"]) * ets["trend"]
+
+
+def _ets_forecast(ets: Dict, steps: int) -> np.ndarray:
+    return ets["level"] + ets["trend"] * np.arange(1, steps + 1)
+
+
+def _arima_step(arima: Dict, y: float) -> None:
+    """Advance the ARMA(1,1) innovation: e_t = (y_t - mu) - phi(y_t-1 - mu) - theta e_t-1"""
+    mu, phi, theta = arima["params"][:3]
+    arima["last_resid"] = (y - mu) - phi * (arima["last_y"] - mu) - theta * arima["last_resid"]
+    arima["last_y"] = y
+
+
+def _arima_forecast(arima: Dict, steps: int) -> np.ndarray:
+    mu, phi, theta = arima["params"][:3]
+    first = phi * (arima["last_y"] - mu) + theta * arima["last_resid"]
+    return mu + first * phi ** np.arange(steps)
+
+
+def future_years_after(last_decimal_year: float, forecast_years: int) -> List[int]:
+    last_year = int(last_decimal_year)
+    return [last_year + i for i in range(1, forecast_years + 1)]
+
+
+def fit_smoothing_models(scores: np.ndarray, forecast_years: int) -> Tuple[List[np.ndarray], Optional[Dict], Optional[Dict]]:
+    """Fit ETS (4+ points) and ARIMA; returns their forecasts and fitted states"""
+    forecasts = []
+
+    ets_state = None
+    if len(scores) >= 4:
+        with model_fit("ets"):
+            forecast_es, ets_state = fit_exponential_smoothing(scores, forecast_years)
+            forecasts.append(forecast_es)
+
+    arima_state = None
+    with model_fit("arima"):
+        forecast_arima, arima_state = fit_arima(scores, forecast_years)
+        forecasts.append(forecast_arima)
+
+    return forecasts, ets_state, arima_state
+
+
+def build_state(points: List[SeriesPoint], ols: Dict, ets_state: Optional[Dict], arima_state: Optional[Dict]) -> Dict:
+    """Assemble a freshly fitted state for chronologically sorted `points`"""
+    return {
+        "version": STATE_VERSION,
+        "n": len(points),
+        "prefix_hash": _prefix_hash(points),
+        "last_year": decimal_year(points[-1]),
+        "ols": ols,
+        "ets": ets_state,
+        "arima": arima_state,
+        "appends_since_refit": 0,
+        "arima_appends": 0
+    }
+
+
+def full_refit(points: List[SeriesPoint], forecast_years: int = 5) -> Tuple[List[Dict], Optional[Dict]]:
+    """Fit every model from scratch and capture the state needed for later appends"""
+    points = sorted_points(points)
+    if len(points) < 3:
+        return simple_linear_forecast(points, forecast_years), None
+
+    years = np.array([decimal_year(p) for p in points])
+    scores = np.array([p.score for p in points], dtype=float)
+    future_years = future_years_after(years[-1], forecast_years)
+
+    forecasts, ets_state, arima_state = fit_smoothing_models(scores, forecast_years)
+    ols = _ols_sums(years, scores, x0=float(years[0]))
+    forecasts.append(_ols_predict(ols, future_years))
+
+    state = build_state(points, ols, ets_state, arima_state)
+    return combine_forecasts(forecasts, scores, future_years), state
+
+
+def _appended_points(points: List[SeriesPoint], state: Dict) -> Optional[List[SeriesPoint]]:
+    """
+    Return the points added since `state` was captured, or None if the change
+    is anything other than appends after the last observation.
+    """
+    n = state["n"]
+    if len(points) <= n or _prefix_hash(points[:n]) != state["prefix_hash"]:
+        return None
+    new_points = points[n:]
+    if decimal_year(new_points[0]) < state["last_year"]:
+        return None
+    return new_points
+
+
+def update_statistical_forecast(
+    points: List[SeriesPoint],
+    state: Optional[Dict],
+    forecast_years: int = 5,
+    engine: Optional[str] = None
+) -> Tuple[List[Dict], Optional[Dict], str]:
+    """
+    Forecast from `points`, reusing `state` when the only change since it was
+    captured is new events at the end of the timeline. The fast engine is
+    stateless and cheap enough to recompute every time.
+
+    Returns (forecast, new_state, mode) where mode is "fast", "full" or "incremental".
+    """
+    points = sorted_points(points)
+    if resolve_engine(engine, len(points)) == "fast":
+        return fast_statistical_forecast(points, forecast_years), None, "fast"
+    if not state or state.get("version") != STATE_VERSION:
+        return (*full_refit(points, forecast_years), "full")
+
+    new_points = _appended_points(points, state)
+    if new_points is None:
+        return (*full_refit(points, forecast_years), "full")
+    # A model that was skipped for a short series may now qualify
+    if state["ets"] is None and len(points) >= 4:
+        return (*full_refit(points, forecast_years), "full")
+    if state["appends_since_refit"] + len(new_points) > settings.FORECAST_MAX_INCREMENTAL_APPENDS:
+        return (*full_refit(points, forecast_years), "full")
+
+    state = {
+        **state,
+        "ols": dict(state["ols"]),
+        "ets": dict(state["ets"]) if state["ets"] else None,
+        "arima": dict(state["arima"]) if state["arima"] else None
+    }
+    ets, arima = state["ets"], state["arima"]
+    for point in new_points:
+        if ets is not None:
+            # Drift check: a surprise this large means the fitted parameters no longer describe the series
+            expected = ets["level"] + ets["trend"]
+            if abs(point.score - expected) > settings.FORECAST_DRIFT_SIGMA * max(ets["resid_std"], 0.5):
+                return (*full_refit(points, forecast_years), "full")
+            _ets_step(ets, point.score)
+        if arima is not None:
+            _arima_step(arima, point.score)
+        _ols_add(state["ols"], decimal_year(point), point.score)
+
+    scores = np.array([p.score for p in points], dtype=float)
+    last_year = decimal_year(points[-1])
+    future_years = future_years_after(last_year, forecast_years)
+    forecasts = []
+    if ets is not None:
+        forecasts.append(_ets_forecast(ets, forecast_years))
+
+    if arima is not None:
+        state["arima_appends"] += len(new_points)
+        forecast_arima = _arima_forecast(arima, forecast_years)
+        if state["arima_appends"] >= settings.FORECAST_ARIMA_REFIT_EVERY:
+            with model_fit("arima"):
+                forecast_arima, state["arima"] = fit_arima(scores, forecast_years, start_params=arima["params"])
+                state["arima_appends"] = 0
+        forecasts.append(forecast_arima)
+
+    forecasts.append(_ols_predict(state["ols"], future_years))
+
+    state.update(
+        n=len(points),
+        prefix_hash=_prefix_hash(points),
+        last_year=last_year,
+        appends_since_refit=state["appends_since_refit"] + len(new_points)
+    )
+    return combine_forecasts(forecasts, scores, future_years), state, "incremental"
@@ -0,0 +1,190 @@
+"""
+Insight Cache
+Content-addressed cache for LLM results. Keys are a hash of everything that
+goes into the prompt, so unchanged events map to the same entry.
+
+Tiers:
+1. In-process LRU with a TTL (always on)
+2. Database table shared across workers (optional, INSIGHT_CACHE_DB)
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import InsightCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def insight_cache_key(events_context: List[Dict], user_age: int, model: str, prompt_version: str) -> str:
+    """Hash the normalized prompt inputs into a stable cache key"""
+    normalized = sorted(events_context, key=lambda e: (e["year"], e["month"] or 0, e["id"]))
+    payload = json.dumps(
+        {
+            "events": normalized,
+            "user_age": user_age,
+            "model": model,
+            "prompt_version": prompt_version
+        },
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryCacheTier:
+    """Thread-safe LRU with per-entry expiry (async API to match the database tier)"""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[Tuple[str, str]]:
+        return self.get_nowait(key)
+
+    def get_nowait(self, key: str) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user_id, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user_id, value
+
+    async def set(self, key: str, user_id: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, user_id, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    async def invalidate_user(self, user_id: str) -> int:
+        with self._lock:
+            stale = [key for key, (_, owner, _) in self._entries.items() if owner == user_id]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DatabaseCacheTier:
+    """Cache entries stored in the insight_cache table (SQLite or Postgres)"""
+
+    name = "database"
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[Tuple[str, str]]:
+        async with AsyncSessionLocal() as db:
+            entry = (await db.execute(
+                select(InsightCacheEntry).where(InsightCacheEntry.key == key)
+            )).scalars().first()
+            if entry is None or entry.expires_at < datetime.utcnow():
+                return None
+            return entry.user_id, entry.value
+
+    async def set(self, key: str, user_id: str, value: str) -> None:
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.merge(InsightCacheEntry(
+                    key=key,
+                    user_id=user_id,
+                    value=value,
+                    expires_at=datetime.utcnow() + timedelta(seconds=self.ttl)
+                ))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                logger.warning("Insight cache write failed: %s", e)
+
+    async def invalidate_user(self, user_id: str) -> int:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                delete(InsightCacheEntry).where(InsightCacheEntry.user_id == user_id)
+            )
+            await db.commit()
+            return result.rowcount
+
+
+class InsightCache:
+    """
+    Read-through over the configured tiers. A hit in a slower tier is copied
+    into the faster ones. Values are stored as JSON so callers always get a
+    fresh copy they are free to mutate.
+    """
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self.hits = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get(self, key: str) -> Optional[Dict]:
+        for index, tier in enumerate(self.tiers):
+            try:
+                entry = await tier.get(key)
+            except Exception as e:
+                logger.warning("Insight cache read failed (%s): %s", tier.name, e)
+                continue
+            if entry is not None:
+                user_id, value = entry
+                self.hits[tier.name] += 1
+                for faster in self.tiers[:index]:
+                    await faster.set(key, user_id, value)
+                return json.loads(value)
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, user_id: str, value: Dict) -> None:
+        serialized = json.dumps(value)
+        for tier in self.tiers:
+            await tier.set(key, user_id, serialized)
+
+    async def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached result for a user (called when their events change)"""
+        for tier in self.tiers:
+            try:
+                self.invalidations += await tier.invalidate_user(user_id)
+            except Exception as e:
+                logger.warning("Insight cache invalidation failed (%s): %s", tier.name, e)
+
+    def stats(self) -> Dict[str, Any]:
+        total_hits = sum(self.hits.values())
+        lookups = total_hits + self.misses
+        return {
+            "tiers": [tier.name for tier in self.tiers],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(total_hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "memory_entries": len(self.tiers[0])
+        }
+
+
+def _build_insight_cache() -> InsightCache:
+    tiers: List[Any] = [MemoryCacheTier(settings.INSIGHT_CACHE_SIZE, settings.INSIGHT_CACHE_TTL)]
+    if settings.INSIGHT_CACHE_DB:
+        tiers.append(DatabaseCacheTier(settings.INSIGHT_CACHE_TTL))
+    return InsightCache(tiers)
+
+
+insight_cache = _build_insight_cache()
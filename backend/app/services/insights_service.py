@@ -7,17 +7,28 @@ Generates the 6 insight cards with data for visualization:
 4. Seasonal Trends
 5. Future Predictions
 6. Personalized Improvement (handled by LLM)
+
+Cards 1-4 depend only on the events and are computed by event_analytics in
+one vectorized pass; the rest come from the LLM results and forecasts.
 """
-import numpy as np
 from typing import List, Dict
-from collections import Counter
+
+from app.services.event_analytics import (
+    EventColumns,
+    contributors_card,
+    data_insight_cards,
+    patterns_card,
+    seasonal_card,
+    trajectory_card
+)
 
 
 def generate_insight_cards(events, statistical_forecast: List[Dict], llm_results: Dict) -> Dict:
     """
     Generate unique, practical insights.
     """
-    insights = {}
+    # Data-driven cards (empty without events)
+    insights = data_insight_cards(events)
     
     # Use LLM-generated insights
     insights["turning_points"] = llm_results.get("turning_points", [])
@@ -40,169 +51,37 @@ def generate_trajectory_insight(events) -> Dict:
     Card 1: Emotional Trajectory
     Visualization: Sparkline with peaks and average
     """
-    scores = [event.score for event in events]
-    years = [event.year for event in events]
-    
-    avg_score = np.mean(scores)
-    peak_score = max(scores)
-    low_score = min(scores)
-    
-    # Find peak event
-    peak_event = events[scores.index(peak_score)]
-    low_event = events[scores.index(low_score)]
-    
-    sparkline_data = [{"year": year, "score": score} for year, score in zip(years, scores)]
-    
-    return {
-        "title": "Emotional Trajectory",
-        "description": f"Your average emotional score is {avg_score:.1f}",
-        "data": {
-            "sparkline": sparkline_data,
-            "average": round(avg_score, 2),
-            "peak": {
-                "score": peak_score,
-                "year": peak_event.year,
-                "description": peak_event.description
-            },
-            "low": {
-                "score": low_score,
-                "year": low_event.year,
-                "description": low_event.description
-            }
-        },
-        "visualization_type": "sparkline"
-    }
+    return trajectory_card(EventColumns.from_events(events))
 
 
 def generate_contributors_insight(events) -> Dict:
     """
     Card 2: What Shaped Your Journey
-    Visualization: Donut chart showing phase distribution
+    Visualization: Donut chart of the phase distribution
     """
-    phases = [event.phase for event in events]
-    phase_counts = Counter(phases)
-    
-    total = len(phases)
-    donut_data = [
-        {
-            "phase": phase,
-            "count": count,
-            "percentage": round((count / total) * 100, 1)
-        }
-        for phase, count in phase_counts.items()
-    ]
-    
-    # Sort by count
-    donut_data.sort(key=lambda x: x["count"], reverse=True)
-    
-    dominant_phase = donut_data[0]["phase"] if donut_data else "Moderate"
-    
-    return {
-        "title": "What Shaped Your Journey",
-        "description": f"Your journey was predominantly {dominant_phase}",
-        "data": {
-            "donut": donut_data,
-            "dominant_phase": dominant_phase
-        },
-        "visualization_type": "donut"
-    }
+    return contributors_card(EventColumns.from_events(events))
 
 
 def generate_patterns_insight(events) -> Dict:
     """
     Card 3: Patterns & Cycles
-    Visualization: Circular graph showing growth, waves, or burnout patterns
+    Visualization: Circular pattern (growth, waves or burnout)
     """
-    scores = [event.score for event in events]
-    
-    # Analyze patterns
-    if len(scores) < 3:
-        pattern_type = "emerging"
-    else:
-        # Check for growth (increasing trend)
-        differences = np.diff(scores)
-        avg_diff = np.mean(differences)
-        
-        if avg_diff > 1:
-            pattern_type = "growth"
-        elif avg_diff < -1:
-            pattern_type = "decline"
-        elif np.std(differences) > 3:
-            pattern_type = "waves"
-        else:
-            pattern_type = "stable"
-    
-    pattern_descriptions = {
-        "growth": "Your journey shows consistent upward growth",
-        "decline": "You've faced increasing challenges recently",
-        "waves": "Your emotions cycle through highs and lows",
-        "stable": "You maintain emotional stability",
-        "emerging": "Your pattern is still emerging"
-    }
-    
-    return {
-        "title": "Patterns & Cycles",
-        "description": pattern_descriptions[pattern_type],
-        "data": {
-            "pattern_type": pattern_type,
-            "volatility": round(float(np.std(scores)), 2),
-            "trend": "upward" if np.mean(np.diff(scores)) > 0 else "downward"
-        },
-        "visualization_type": "circular"
-    }
+    return patterns_card(EventColumns.from_events(events))
 
 
 def generate_seasonal_insight(events) -> Dict:
     """
     Card 4: Seasonal Trends
-    Visualization: Sinusoid wave showing monthly patterns
+    Visualization: Sinusoid of the monthly averages
     """
-    # Analyze events with month data
-    monthly_scores = {i: [] for i in range(1, 13)}
-    
-    for event in events:
-        if event.month:
-            monthly_scores[event.month].append(event.score)
-    
-    # Calculate average score per month
-    monthly_averages = []
-    for month in range(1, 13):
-        if monthly_scores[month]:
-            avg = np.mean(monthly_scores[month])
-        else:
-            avg = None
-        monthly_averages.append({
-            "month": month,
-            "average": round(avg, 2) if avg is not None else None
-        })
-    
-    # Identify best and worst months
-    valid_months = [m for m in monthly_averages if m["average"] is not None]
-    if valid_months:
-        best_month = max(valid_months, key=lambda x: x["average"])
-        worst_month = min(valid_months, key=lambda x: x["average"])
-    else:
-        best_month = {"month": 6, "average": 5}
-        worst_month = {"month": 1, "average": 5}
-    
-    month_names = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    
-    return {
-        "title": "Seasonal Trends",
-        "description": f"You tend to feel best in {month_names[best_month['month']-1]}",
-        "data": {
-            "monthly_data": monthly_averages,
-            "best_month": best_month['month'],
-            "worst_month": worst_month['month']
-        },
-        "visualization_type": "sinusoid"
-    }
+    return seasonal_card(EventColumns.from_events(events))
 
 
 def generate_comparison_insight(stat_forecast: List[Dict], llm_forecast: List[Dict]) -> Dict:
     """
     Card 5: Future Predictions Comparison
-    Visualization: Table comparing statistical vs LLM predictions
+    Visualization: Table comparing statistical (with its 80% band) vs LLM predictions
     """
     comparison_data = []
     
@@ -211,7 +90,10 @@ def generate_comparison_insight(stat_forecast: List[Dict], llm_forecast: List[Di
             "year": stat["year"],
             "statistical": {
                 "score": stat["score"],
-                "phase": stat["phase"]
+                "phase": stat["phase"],
+                # 80% prediction band, when the forecast has one
+                "lower": stat.get("lower_80"),
+                "upper": stat.get("upper_80")
             },
             "intuitive": {
                 "score": llm.get("score", stat["score"]),
@@ -0,0 +1,446 @@
+"""
+Journey Index
+"Journeys like yours": nearest neighbours over every user's score trajectory.
+
+Each journey becomes a unit-length float32 vector, so cosine similarity is a
+plain dot product:
+- scores resampled onto ages 0, 3, ..., 90 (linear interpolation between
+  events, 0 at ages without events) and scaled to [-1, 1], so journeys are
+  compared at the same ages
+- the slope (mean event-to-event change) and volatility of the Patterns &
+  Cycles card, weighted by FEATURE_WEIGHT
+
+Storage: journey_vectors (one row per user, with a stable row number) is the
+source of truth. The vectors are also laid out in a memory-mapped float32
+matrix at JOURNEY_INDEX_PATH, one row per journey_vectors.row_id, which the
+API processes share through the page cache. A process writes its own
+users' vectors as their events change and reloads the rows changed by
+others every JOURNEY_REFRESH_INTERVAL seconds; every process writes
+identical bytes for a row, so refreshes never conflict.
+
+Search: exact top-k with batched dot products over the matrix, or, with
+JOURNEY_IVF_LISTS set, through an IVF coarse quantizer: spherical k-means
+centroids trained on a sample, every row assigned to its nearest centroid,
+and only the rows of the JOURNEY_IVF_PROBES centroids nearest to the query
+scored. The centroids are retrained whenever the indexed journeys double.
+
+Matches are anonymous: the API never learns who they are. It gets the
+similarity, the ages both journeys cover and the shape of the matched
+journey, read back from its vector.
+
+Usage (index users whose events were stored before the index existed):
+    python -m app.services.journey_index --rebuild
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.instrumentation import configure_logging
+from app.db.database import AsyncSessionLocal, SessionLocal
+from app.db.models import JourneyVector, LifeEvent, User
+from app.services.event_analytics import pattern_features
+
+try:
+    import fcntl
+except ImportError:  # Windows; the matrix file is grown without a lock there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+AGE_STEP = 3.0
+AGE_GRID = np.arange(0, 90 + AGE_STEP, AGE_STEP)
+FEATURE_WEIGHT = 3.0
+DIM = len(AGE_GRID) + 2
+ROW_BYTES = DIM * np.dtype(np.float32).itemsize
+MIN_EVENTS = 2
+
+_INITIAL_ROWS = 1024
+_SEARCH_BATCH_ROWS = 65536
+_IVF_MIN_ROWS_PER_LIST = 39  # Fewer training points per centroid give unstable lists
+_IVF_TRAIN_SAMPLE = 50000
+_IVF_ITERATIONS = 10
+
+# Rows committed shortly before a refresh may carry an earlier updated_at, so
+# each pass re-reads this far behind the previous one
+_REFRESH_OVERLAP = timedelta(seconds=30)
+
+VectorRow = Tuple[int, str, Optional[bytes]]  # row_id, user_id, vector
+
+
+class JourneyMatch(NamedTuple):
+    row: int  # Matrix row; stays inside the process
+    similarity: float
+    shared_ages: Optional[Tuple[int, int]]  # First and last grid age both journeys cover
+    trajectory: List[Tuple[int, float]]  # (age, level) over the matched journey's ages, levels scaled into [-1, 1]
+
+
+def birth_decimal_year(dob: str) -> float:
+    born = date.fromisoformat(dob)
+    return born.year + (born.month - 1) / 12.0
+
+
+def journey_vector(dob: str, events) -> Optional[np.ndarray]:
+    """Unit-length vector of a user's journey; None below MIN_EVENTS or for an all-zero journey"""
+    if len(events) < MIN_EVENTS:
+        return None
+    ages = np.array([event.year + (event.month or 6) / 12.0 for event in events]) - birth_decimal_year(dob)
+    scores = np.array([event.score for event in events], dtype=float)
+    order = np.argsort(ages, kind="stable")
+    ages, scores = ages[order], scores[order]
+
+    # Grid ages within half a step of the journey count as covered
+    covered = (AGE_GRID >= ages[0] - AGE_STEP / 2) & (AGE_GRID <= ages[-1] + AGE_STEP / 2)
+    profile = np.where(covered, np.interp(AGE_GRID, ages, scores), 0.0) / 10.0
+    mean_change, volatility = pattern_features(scores)
+    features = np.array([mean_change, volatility]) / 10.0 * FEATURE_WEIGHT
+
+    vector = np.concatenate([profile, features])
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm).astype(np.float32) if norm else None
+
+
+def _covered_ages(vector: np.ndarray) -> np.ndarray:
+    # Uncovered grid ages are stored as 0 (so is a covered score of exactly 0, which is dropped here)
+    return vector[:len(AGE_GRID)] != 0
+
+
+def describe_match(query: np.ndarray, row: int, vector: np.ndarray, similarity: float) -> JourneyMatch:
+    """A match as the API may show it: its similarity, the age overlap and its shape, without its identity"""
+    covered = _covered_ages(vector)
+    profile = vector[:len(AGE_GRID)]
+    peak = float(np.abs(profile).max()) or 1.0
+    shared = np.flatnonzero(covered & _covered_ages(query))
+    return JourneyMatch(
+        row=row,
+        similarity=round(similarity, 4),
+        shared_ages=(int(AGE_GRID[shared[0]]), int(AGE_GRID[shared[-1]])) if len(shared) else None,
+        trajectory=[(int(AGE_GRID[i]), round(float(profile[i]) / peak, 2)) for i in np.flatnonzero(covered)]
+    )
+
+
+def _upsert_statement(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(JourneyVector)
+    return statement.on_conflict_do_update(
+        index_elements=[JourneyVector.user_id],
+        set_={"vector": statement.excluded.vector, "updated_at": statement.excluded.updated_at}
+    )
+
+
+class CoarseQuantizer:
+    """IVF lists: spherical k-means centroids and the list each matrix row belongs to"""
+
+    def __init__(self, centroids: np.ndarray, trained_rows: int):
+        self.centroids = centroids
+        self.trained_rows = trained_rows
+        self.assignments = np.zeros(0, dtype=np.int32)  # -1 for rows without a vector
+
+    @classmethod
+    def train(cls, matrix: np.ndarray, rows: np.ndarray, n_lists: int, seed: int = 0) -> "CoarseQuantizer":
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(rows, size=min(len(rows), _IVF_TRAIN_SAMPLE), replace=False))
+        sample = np.asarray(matrix[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(_IVF_ITERATIONS):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # A centroid that lost all its points keeps its previous position
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+        return cls(centroids.astype(np.float32), len(rows))
+
+    def assign(self, rows: np.ndarray, vectors: np.ndarray, valid: np.ndarray) -> None:
+        if len(rows) == 0:
+            return
+        needed = int(rows.max()) + 1
+        if needed > len(self.assignments):
+            grown = np.full(max(needed, 2 * len(self.assignments)), -1, dtype=np.int32)
+            grown[:len(self.assignments)] = self.assignments
+            self.assignments = grown
+        nearest = np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+        self.assignments[rows] = np.where(valid, nearest, -1)
+
+    def candidates(self, query: np.ndarray, probes: int, n_rows: int) -> np.ndarray:
+        """Rows in the `probes` lists whose centroids are nearest to `query`"""
+        lists = np.argsort(-(self.centroids @ query))[:probes]
+        return np.flatnonzero(np.isin(self.assignments[:n_rows], lists))
+
+
+class JourneyIndex:
+    """Memory-mapped journey vectors with exact or IVF top-k search"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._matrix: Optional[np.memmap] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._user_rows: Dict[str, int] = {}
+        self._rows = 0  # Highest row number in use + 1
+        self._quantizer: Optional[CoarseQuantizer] = None
+        self._watermark: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.rows_loaded = 0
+        self.searches = 0
+        self.last_search_seconds: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._watermark is not None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if self._matrix is not None:
+            self._matrix.flush()
+
+    async def _run_forever(self) -> None:
+        # This process's own writes are stored by upsert_user; the loop picks up everyone else's
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Journey index refresh failed: %s", e)
+            await asyncio.sleep(settings.JOURNEY_REFRESH_INTERVAL)
+
+    async def refresh(self) -> int:
+        """Load the rows changed since the previous refresh (all rows the first time)"""
+        refreshed_at = datetime.utcnow()
+        query = select(JourneyVector.row_id, JourneyVector.user_id, JourneyVector.vector)
+        if self._watermark is not None:
+            query = query.where(JourneyVector.updated_at >= self._watermark - _REFRESH_OVERLAP)
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(query)).all()
+        self.store(rows)
+        self._watermark = refreshed_at
+        self.refreshes += 1
+        self.rows_loaded += len(rows)
+        return len(rows)
+
+    async def upsert_user(self, db: AsyncSession, user_id: str) -> None:
+        """
+        Recompute a user's vector after their events changed, store it and
+        update this process's matrix. Called after the event write committed,
+        so a failure is logged rather than raised; --rebuild repairs it.
+        """
+        try:
+            user = await db.get(User, user_id)
+            events = (await db.execute(
+                select(LifeEvent.year, LifeEvent.month, LifeEvent.score).where(LifeEvent.user_id == user_id)
+            )).all()
+            vector = journey_vector(user.dob, events)
+            payload = vector.tobytes() if vector is not None else None
+            row_id = (await db.execute(
+                _upsert_statement(db.bind.dialect.name).returning(JourneyVector.row_id),
+                {"user_id": user_id, "vector": payload, "updated_at": datetime.utcnow()}
+            )).scalar_one()
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.warning("Journey index update for user %s failed: %s", user_id, e)
+            return
+        self.store([(row_id, user_id, payload)])
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        """Map the matrix file with room for `rows_needed` rows, growing it under a file lock"""
+        if self._matrix is not None and rows_needed <= len(self._matrix):
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # Released when the file is closed
+            size = os.fstat(f.fileno()).st_size
+            wanted = max(_INITIAL_ROWS, 1 << (rows_needed - 1).bit_length()) * ROW_BYTES
+            if size < wanted:
+                f.truncate(wanted)  # New rows read as zeros
+                size = wanted
+        if self._matrix is not None:
+            self._matrix.flush()
+        self._matrix = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(size // ROW_BYTES, DIM))
+        if len(self._valid) < len(self._matrix):
+            valid = np.zeros(len(self._matrix), dtype=bool)
+            valid[:len(self._valid)] = self._valid
+            self._valid = valid
+
+    def store(self, rows: Iterable[VectorRow]) -> None:
+        """Write vectors into the matrix (a NULL vector clears the row)"""
+        rows = list(rows)
+        if not rows:
+            return
+        row_ids = np.array([row_id for row_id, _, _ in rows], dtype=np.int64)
+        self._ensure_capacity(int(row_ids.max()) + 1)
+        vectors = np.zeros((len(rows), DIM), dtype=np.float32)
+        valid = np.zeros(len(rows), dtype=bool)
+        for i, (row_id, user_id, vector) in enumerate(rows):
+            if vector is not None:
+                vectors[i] = np.frombuffer(vector, dtype=np.float32)
+                valid[i] = True
+            self._user_rows[user_id] = row_id
+        self._matrix[row_ids] = vectors
+        self._valid[row_ids] = valid
+        self._rows = max(self._rows, int(row_ids.max()) + 1)
+
+        if self._quantizer is not None:
+            self._quantizer.assign(row_ids, vectors, valid)
+        self.train_quantizer()
+
+    def train_quantizer(self) -> None:
+        """Train the IVF quantizer once enough journeys exist, and retrain it when they double"""
+        n_lists = settings.JOURNEY_IVF_LISTS
+        if n_lists <= 0:
+            return
+        valid_rows = np.flatnonzero(self._valid[:self._rows])
+        if len(valid_rows) < n_lists * _IVF_MIN_ROWS_PER_LIST:
+            return
+        if self._quantizer is not None and len(valid_rows) < 2 * self._quantizer.trained_rows:
+            return
+        started = time.perf_counter()
+        quantizer = CoarseQuantizer.train(self._matrix, valid_rows, n_lists)
+        for start in range(0, self._rows, _SEARCH_BATCH_ROWS):
+            end = min(start + _SEARCH_BATCH_ROWS, self._rows)
+            quantizer.assign(np.arange(start, end), np.asarray(self._matrix[start:end]), self._valid[start:end])
+        self._quantizer = quantizer
+        logger.info(
+            "Trained %d IVF lists on %d journeys in %.2fs", n_lists, len(valid_rows), time.perf_counter() - started
+        )
+
+    def similar(self, user_id: str, k: int) -> Optional[List[JourneyMatch]]:
+        """Top-k anonymous matches for a user, most similar first; None if the user has no journey vector"""
+        row = self._user_rows.get(user_id)
+        if row is None or not self._valid[row]:
+            return None
+        started = time.perf_counter()
+        query = np.array(self._matrix[row])
+
+        if self._quantizer is not None:
+            candidates = self._quantizer.candidates(query, settings.JOURNEY_IVF_PROBES, self._rows)
+            blocks: Iterable = [(candidates, self._matrix[candidates])]
+        else:
+            # The matrix is mapped with spare capacity; blocks stop at the last row in use
+            blocks = (
+                (np.arange(start, end), self._matrix[start:end])
+                for start in range(0, self._rows, _SEARCH_BATCH_ROWS)
+                for end in [min(start + _SEARCH_BATCH_ROWS, self._rows)]
+            )
+
+        # Keep each block's top k, then pick the overall top k from those
+        best_rows, best_scores = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.float32)]
+        for rows, vectors in blocks:
+            scores = np.asarray(vectors) @ query
+            keep = self._valid[rows] & (rows != row)
+            rows, scores = rows[keep], scores[keep]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k)[:k]
+                rows, scores = rows[top], scores[top]
+            best_rows.append(rows)
+            best_scores.append(scores)
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        order = np.argsort(-scores, kind="stable")[:k]
+
+        self.searches += 1
+        self.last_search_seconds = time.perf_counter() - started
+        rows, scores = rows[order], scores[order]
+        vectors = np.asarray(self._matrix[rows])
+        return [describe_match(query, int(r), v, float(s)) for r, v, s in zip(rows, vectors, scores)]
+
+    @property
+    def search_method(self) -> str:
+        return "ivf" if self._quantizer is not None else "exact"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.loaded,
+            "journeys": int(self._valid[:self._rows].sum()),
+            "rows": self._rows,
+            "capacity": len(self._matrix) if self._matrix is not None else 0,
+            "ivf_lists": len(self._quantizer.centroids) if self._quantizer is not None else 0,
+            "refreshes": self.refreshes,
+            "rows_loaded": self.rows_loaded,
+            "searches": self.searches,
+            "last_search_ms": round(self.last_search_seconds * 1000, 3) if self.last_search_seconds is not None else None
+        }
+
+
+journey_index = JourneyIndex(settings.JOURNEY_INDEX_PATH)
+
+
+def rebuild_journey_vectors(db: Session, chunk_size: int = 1000) -> Dict:
+    """
+    Recompute every user's vector from life_events. Users left without
+    events get a NULL vector, so running API processes drop them on their
+    next refresh.
+    """
+    # Imported here: batch_forecast pulls in the forecasting stack
+    from app.services.batch_forecast import iter_user_series
+
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
+    statement = _upsert_statement(db.bind.dialect.name)
+    users = indexed = 0
+    for chunk in iter_user_series(db, chunk_size):
+        user_ids = [user_id for user_id, _ in chunk]
+        dobs = dict(db.query(User.id, User.dob).filter(User.id.in_(user_ids)).all())
+        now = datetime.utcnow()
+        rows = []
+        for user_id, points in chunk:
+            vector = journey_vector(dobs[user_id], points)
+            indexed += vector is not None
+            rows.append({"user_id": user_id, "vector": vector.tobytes() if vector is not None else None, "updated_at": now})
+        db.execute(statement, rows)
+        db.commit()
+        users += len(chunk)
+
+    db.execute(
+        update(JourneyVector)
+        .where(JourneyVector.updated_at < started_at)
+        .values(vector=None, updated_at=datetime.utcnow())
+    )
+    db.commit()
+    return {
+        "users": users,
+        "journeys": indexed,
+        "seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the similar-journey index")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute every user's journey vector from the stored events")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Users per chunk")
+    args = parser.parse_args()
+    configure_logging()
+    if not args.rebuild:
+        parser.error("nothing to do (pass --rebuild)")
+
+    db = SessionLocal()
+    try:
+        print(json.dumps(rebuild_journey_vectors(db, args.chunk_size)))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
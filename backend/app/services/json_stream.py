@@ -0,0 +1,104 @@
+"""
+Incremental JSON Parser
+Feeds a JSON object in arbitrary text chunks (e.g. streamed LLM tokens) and
+hands back each top-level `key: value` pair as soon as the value is complete,
+so callers can act on early sections before the whole document has arrived.
+
+Every character is scanned once; only completed values are passed to
+json.loads.
+"""
+import json
+from typing import Any, Dict, List, Tuple
+
+
+class JsonObjectStream:
+    """
+    Usage:
+        stream = JsonObjectStream()
+        for chunk in chunks:
+            for key, value in stream.feed(chunk):
+                ...
+        stream.close()  # raises ValueError if the object was never closed
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0  # Next character to scan
+        self._depth = 0  # Nesting of {} / [] outside strings
+        self._in_string = False
+        self._escaped = False
+        self._token_start = None  # Start of the current top-level key or value
+        self._key = None  # Key whose value is being read
+        self.done = False
+        self.values: Dict[str, Any] = {}
+
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume `text`; returns the top-level pairs completed by it, in order"""
+        if self.done:
+            return []
+        self._buffer += text
+        completed = []
+        buffer = self._buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._key is None:
+                        # End of a top-level key
+                        self._key = json.loads(buffer[self._token_start:pos + 1])
+                        self._token_start = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._token_start is None:
+                    self._token_start = pos
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 2 and self._token_start is None:
+                    self._token_start = pos
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._complete_value(buffer, pos, completed)
+                    self.done = True
+                    break
+            elif self._depth == 1:
+                if char == ":":
+                    self._token_start = None
+                elif char == ",":
+                    self._complete_value(buffer, pos, completed)
+                elif not char.isspace() and self._token_start is None:
+                    # Number, true, false or null
+                    self._token_start = pos
+
+        # Drop everything already consumed so long responses do not grow the buffer
+        consumed = self._token_start if self._token_start is not None else len(buffer)
+        if self.done:
+            consumed = len(buffer)
+        self._buffer = buffer[consumed:]
+        if self._token_start is not None:
+            self._token_start = 0
+        self._pos = len(self._buffer)
+        return completed
+
+    def _complete_value(self, buffer: str, end: int, completed: List[Tuple[str, Any]]) -> None:
+        if self._key is None or self._token_start is None:
+            return
+        value = json.loads(buffer[self._token_start:end])
+        self.values[self._key] = value
+        completed.append((self._key, value))
+        self._key = None
+        self._token_start = None
+
+    def close(self) -> Dict[str, Any]:
+        """Check the object is complete and return every top-level pair"""
+        if not self.done:
+            raise ValueError("Incomplete JSON object")
+        return self.values
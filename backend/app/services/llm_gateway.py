@@ -0,0 +1,379 @@
+"""
+LLM Gateway
+The single path to the OpenAI API. Every chat completion goes through:
+1. A circuit breaker that fails fast once the upstream keeps failing
+2. Token buckets for requests and tokens per minute (LLM_RPM_LIMIT / LLM_TPM_LIMIT)
+3. A semaphore capping requests in flight (LLM_GATEWAY_CONCURRENCY)
+4. Retries of transient errors (connection errors, timeouts, 408/409/429/5xx)
+   with exponential backoff and jitter, honoring Retry-After when present
+5. Optionally (LLM_HEDGE_ENABLED), a second identical request once the first
+   has run longer than the observed p95 latency; the first answer wins
+
+Limits are per worker process. Point OPENAI_BASE_URL at benchmarks/fake_openai.py
+to exercise all of this locally.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional
+
+import openai
+from openai import AsyncOpenAI
+
+from app.core.config import settings
+from app.core.instrumentation import LLM_TOKENS
+
+
+class LLMUnavailableError(Exception):
+    """The upstream could not serve the request (retries exhausted or circuit open)"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the upstream while the circuit breaker is open"""
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, openai.APIConnectionError):  # Includes APITimeoutError
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Delay requested by the upstream via Retry-After / retry-after-ms, if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to one minute's worth; 0 disables it"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self._rate = per_minute / 60.0
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    async def acquire(self, amount: float) -> float:
+        """Wait until `amount` units are available and take them; returns seconds waited"""
+        if not self.per_minute:
+            return 0.0
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        # Callers queue on the lock, so the bucket is granted in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - started
+                await asyncio.sleep((amount - self.tokens) / self._rate)
+
+    def charge(self, amount: float) -> None:
+        """Correct a reservation once actual usage is known (negative refunds); may go into debt"""
+        if self.per_minute:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def bind(self) -> None:
+        self._lock = asyncio.Lock()
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `threshold` consecutive upstream failures; open ->
+    half_open after `reset_seconds`, letting one probe through; the probe's
+    outcome closes or re-opens the circuit. A probe that ends without an
+    answer from the upstream (cancelled, local error) is abandoned, so the
+    next call probes again.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+        return self.state == "closed"
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or (self.threshold and self.failures >= self.threshold):
+            if self.state != "open":
+                self.times_opened += 1
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def abandon_probe(self) -> None:
+        if self.state == "half_open" and self._probing:
+            # Back to open with the old opened_at, so the next allow() starts a new probe
+            self.state = "open"
+            self._probing = False
+
+
+def _p95(samples: Deque[float]) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+class LLMGateway:
+    """Bounded, rate-limited, retrying access to chat completions"""
+
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+        self.breaker = CircuitBreaker(settings.LLM_BREAKER_THRESHOLD, settings.LLM_BREAKER_RESET)
+        self.requests = TokenBucket(settings.LLM_RPM_LIMIT)
+        self.tokens = TokenBucket(settings.LLM_TPM_LIMIT)
+        self._latencies: Deque[float] = deque(maxlen=500)  # Non-streamed calls; the hedge delay comes from these
+        self._first_chunk_latencies: Deque[float] = deque(maxlen=500)  # Streams, up to their first chunk
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._counters = {
+            "requests": 0, "retries": 0, "failures": 0, "rejected_open_circuit": 0,
+            "hedges": 0, "hedge_wins": 0, "rate_limit_wait_seconds": 0.0
+        }
+
+    def _bind(self) -> None:
+        # asyncio primitives belong to one event loop; recreate them if the loop changed (tests, CLI runs)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(settings.LLM_GATEWAY_CONCURRENCY)
+            self.requests.bind()
+            self.tokens.bind()
+
+    @staticmethod
+    def estimate_tokens(kwargs: Dict) -> int:
+        """Rough prompt size (4 characters per token) plus the expected completion"""
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in kwargs.get("messages", []))
+        return prompt_chars // 4 + settings.LLM_EXPECTED_OUTPUT_TOKENS
+
+    def hedge_delay(self) -> Optional[float]:
+        """p95 of recent latencies, once there are enough samples to trust it"""
+        if not settings.LLM_HEDGE_ENABLED or len(self._latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return _p95(self._latencies)
+
+    async def _admit(self, estimate: int) -> bool:
+        """Circuit breaker, then rate limits; returns whether this request is the half-open probe"""
+        if not self.breaker.allow():
+            self._counters["rejected_open_circuit"] += 1
+            raise CircuitOpenError("LLM circuit breaker is open")
+        probe = self.breaker.state == "half_open"
+        try:
+            waited = await self.requests.acquire(1)
+            waited += await self.tokens.acquire(estimate)
+        except BaseException as e:
+            if probe:
+                self._settle_probe(e)
+            raise
+        self._counters["rate_limit_wait_seconds"] += waited
+        return probe
+
+    def _settle_probe(self, error: BaseException) -> None:
+        """
+        Outcome of a probe that raised. Retryable upstream errors are counted
+        by _with_retries; any other answer from the upstream (a 4xx) proves
+        it is up, and anything else (cancellation, local errors) says
+        nothing about it.
+        """
+        if isinstance(error, openai.APIStatusError) and not is_retryable(error):
+            self.breaker.record_success()
+        elif not (isinstance(error, Exception) and is_retryable(error)):
+            self.breaker.abandon_probe()
+
+    async def _attempt(self, kwargs: Dict, estimate: int) -> Any:
+        """One request: rate limits, then a concurrency slot for the duration of the call"""
+        probe = await self._admit(estimate)
+        try:
+            async with self._semaphore:
+                self._in_flight += 1
+                self._counters["requests"] += 1
+                started = time.perf_counter()
+                try:
+                    response = await self.client.chat.completions.create(**kwargs)
+                finally:
+                    self._in_flight -= 1
+        except BaseException as e:
+            # Includes CancelledError from a lost hedge race or a disconnected SSE client
+            if probe:
+                self._settle_probe(e)
+            raise
+        self._latencies.append(time.perf_counter() - started)
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None):
+            self.tokens.charge(usage.total_tokens - estimate)
+            LLM_TOKENS.inc("prompt", amount=usage.prompt_tokens or 0)
+            LLM_TOKENS.inc("completion", amount=usage.completion_tokens or 0)
+        return response
+
+    async def _hedged(self, kwargs: Dict, estimate: int) -> Any:
+        primary = asyncio.create_task(self._attempt(kwargs, estimate))
+        pending = {primary}
+        try:
+            # Cancelled at any await below (e.g. a disconnected SSE client), the finally cancels whatever is in flight
+            delay = self.hedge_delay()
+            if delay is None:
+                return await primary
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._counters["hedges"] += 1
+            backup = asyncio.create_task(self._attempt(kwargs, estimate))
+            pending = {primary, backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self._counters["hedge_wins"] += 1
+                        return task.result()
+            # Both failed; report the primary's error
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _with_retries(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        for attempt in range(settings.LLM_GATEWAY_RETRIES + 1):
+            try:
+                result = await call()
+                self.breaker.record_success()
+                return result
+            except CircuitOpenError:
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self._counters["failures"] += 1
+                self.breaker.record_failure()
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = min(settings.LLM_GATEWAY_BACKOFF * 2 ** attempt, settings.LLM_GATEWAY_MAX_BACKOFF)
+                    delay *= random.uniform(0.5, 1.0)  # Jitter so concurrent callers do not retry in lockstep
+                if attempt == settings.LLM_GATEWAY_RETRIES or delay > settings.LLM_GATEWAY_MAX_BACKOFF:
+                    raise LLMUnavailableError(f"LLM request failed after {attempt + 1} attempt(s): {e}") from e
+                self._counters["retries"] += 1
+                await asyncio.sleep(delay)
+
+    async def chat(self, **kwargs) -> Any:
+        """Non-streamed chat completion (hedged when enabled)"""
+        self._bind()
+        estimate = self.estimate_tokens(kwargs)
+        return await self._with_retries(lambda: self._hedged(kwargs, estimate))
+
+    async def chat_stream(self, **kwargs) -> AsyncIterator[Any]:
+        """
+        Streamed chat completion. Opening the stream is retried like chat();
+        errors after the first chunk propagate to the caller. The concurrency
+        slot is held until the stream is consumed or closed.
+        """
+        self._bind()
+        estimate = self.estimate_tokens(kwargs)
+        opened_at = 0.0
+
+        async def open_stream():
+            nonlocal opened_at
+            probe = await self._admit(estimate)
+            try:
+                await self._semaphore.acquire()
+            except BaseException as e:
+                if probe:
+                    self._settle_probe(e)
+                raise
+            try:
+                self._counters["requests"] += 1
+                opened_at = time.perf_counter()
+                return await self.client.chat.completions.create(stream=True, **kwargs)
+            except BaseException as e:
+                self._semaphore.release()
+                if probe:
+                    self._settle_probe(e)
+                raise
+
+        stream = await self._with_retries(open_stream)
+        self._in_flight += 1
+        first = True
+        try:
+            # The whole stream runs at the consumer's pace, so only the wait for its first chunk is sampled
+            async for chunk in stream:
+                if first:
+                    self._first_chunk_latencies.append(time.perf_counter() - opened_at)
+                    first = False
+                yield chunk
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self._in_flight,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "p95_seconds": _round(_p95(self._latencies)),
+            "stream_first_chunk_p95_seconds": _round(_p95(self._first_chunk_latencies)),
+            **{name: round(value, 3) if isinstance(value, float) else value for name, value in self._counters.items()}
+        }
+
+
+client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    base_url=settings.OPENAI_BASE_URL or None,
+    timeout=settings.OPENAI_TIMEOUT,
+    max_retries=0  # Retries are handled by the gateway
+)
+
+llm_gateway = LLMGateway(client)
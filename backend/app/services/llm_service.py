@@ -4,26 +4,38 @@ Handles OpenAI API calls for:
 - Rephrasing event descriptions
 - Generating intuitive predictions with reasoning
 - Creating personalized insights and headings
+
+The insights are produced by a graph of small, independent sub-requests
+(see llm_tasks) that run concurrently under LLM_TASK_CONCURRENCY. Each task
+is cached, validated and retried on its own, and only a task that keeps
+failing is replaced by its part of the fallback insights, so wall-clock time
+is the slowest task rather than one long generation.
+
+Requests themselves go through llm_gateway, which bounds concurrency and
+rate across all analyses and retries transient API errors; the task-level
+retries here only cover malformed or incomplete responses.
 """
+import asyncio
+import hashlib
 import json
-from typing import List, Dict
-from openai import AsyncOpenAI
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from app.core.config import settings
+from app.core.instrumentation import LLM_TASKS
 from app.db.models import User, LifeEvent
+from app.services.insight_cache import insight_cache
+from app.services.json_stream import JsonObjectStream
+from app.services.llm_gateway import LLMUnavailableError, llm_gateway
+from app.services.llm_tasks import LLMTask, build_llm_tasks, task_fallback, validate_task_result
 
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+SectionCallback = Callable[[str, Any], Awaitable[None]]
 
+logger = logging.getLogger(__name__)
 
-async def generate_llm_insights(user: User, events: List[LifeEvent]) -> Dict:
-    """
-    Generate comprehensive LLM-based insights including:
-    - Hero heading and summary
-    - Rephrased event descriptions
-    - Intuitive future predictions with reasoning
-    - Personalized improvement plan
-    """
-    # Build context about the user's journey
+
+def insights_context(user: User, events: List[LifeEvent]) -> Tuple[List[Dict], int]:
+    """Build context about the user's journey; returns (events_context, user_age)"""
     events_context = []
     for event in events:
         events_context.append({
@@ -36,130 +48,198 @@ async def generate_llm_insights(user: User, events: List[LifeEvent]) -> Dict:
         })
     
     user_age = 2024 - int(user.dob.split('-')[0])  # Approximate current age
-    
-    prompt = f"""Analyze {user.name}'s life events and generate practical, unique insights. Use simple, direct English.
-
-User: {user.name}, Age {user_age}
-
-Events:
-{json.dumps(events_context, indent=2)}
-
-Return JSON:
-
-{{
-  "hero_heading": "One clear sentence about their pattern (simple English)",
-  "summary": "What stands out in plain language",
-  
-  "rephrased_events": {{
-    "event_id": "Clear, simple rephrasing"
-  }},
-  
-  "turning_points": [
-    {{
-      "event_id": "id",
-      "year": 2020,
-      "type": "first_dip" | "biggest_recovery" | "longest_stable" | "recent_change",
-      "insight": "Why this mattered - be specific and practical"
-    }}
-  ],
-  
-  "what_shaped_journey": [
-    {{
-      "chain": "Work stress → emotional dip → withdrawal",
-      "explanation": "Simple cause-effect in plain English"
-    }}
-  ],
-  
-  "emotional_cycle": {{
-    "pattern_name": "The Overdrive Loop" | "The Steady Builder" | "The Phoenix" | "The Wave Rider",
-    "cycle_description": "What keeps happening in simple terms",
-    "visual_flow": "Build → Push → Dip → Recover"
-  }},
-  
-  "llm_forecast": [
-    {{
-      "year": 2025,
-      "score": 7.5,
-      "phase": "High",
-      "reasoning": "Simple, practical reasoning"
-    }}
-  ],
-  
-  "unique_insights": {{
-    "pattern_name": "2-3 word name for their journey",
-    "one_truth": "One practical truth about their life pattern",
-    "hidden_rule": "A rule they follow without realizing it",
-    "blind_spot": "Something they might miss about themselves",
-    "strength_they_dont_see": "A strength they have but may not notice",
-    "warning_sign": "A pattern that could cause problems if ignored",
-    "opportunity": "A specific opportunity based on their pattern",
-    "what_works": "What actually works for them (based on data)",
-    "what_doesnt": "What doesn't work for them (based on data)",
-    "future_self_note": "Practical note from 1 year ahead"
-  }},
-  
-  "actionable_insights": [
-    {{
-      "title": "Specific action based on their pattern",
-      "why": "Why this matters for them",
-      "when": "When to do this"
-    }}
-  ]
-}}
-
-RULES:
-- Use simple, direct English - no flowery language
-- Be specific to THEIR data, not generic
-- Focus on practical, useful insights
-- Each insight should be unique and actionable
-- If not enough data, say "Pattern still forming"
-
-Map scores: 8-10=Very High, 4-7=High, 0-3=Moderate, -3-0=Low, -10--3=Very Low
-"""
+    return events_context, user_age
 
-    try:
-        response = await client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert emotional intelligence coach who provides deep, personalized insights. Always respond with valid JSON."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
+
+def description_hash(description: str) -> str:
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+def needs_rephrasing(event: LifeEvent) -> bool:
+    """True unless the stored rephrasing was made from the event's current description"""
+    return not event.rephrased_description or event.description_hash != description_hash(event.description)
+
+
+def _task_graph(user: User, events: List[LifeEvent]) -> List[LLMTask]:
+    events_context, user_age = insights_context(user, events)
+    # Stored rephrasings are reused; only new or edited events are rephrased
+    rephrase_context = [context for context, event in zip(events_context, events) if needs_rephrasing(event)]
+    return build_llm_tasks(user, events_context, user_age, rephrase_context)
+
+
+def normalize_llm_forecast(forecast: Any, events: List[LifeEvent]) -> List[Dict]:
+    """Ensure llm_forecast is a list with exactly 5 years"""
+    if not isinstance(forecast, list):
+        forecast = []
+    # Ensure we have 5 years of forecast
+    if len(forecast) < 5:
+        last_year = max([e.year for e in events]) if events else 2024
+        last_score = events[-1].score if events else 5
+        for i in range(len(forecast), 5):
+            forecast.append({
+                "year": last_year + i + 1,
+                "score": last_score,
+                "phase": "Moderate",
+                "reasoning": "Pattern still forming"
+            })
+    return forecast[:5]  # Ensure exactly 5
+
+
+def _postprocess(section: str, value: Any, events: List[LifeEvent]) -> Any:
+    return normalize_llm_forecast(value, events) if section == "llm_forecast" else value
+
+
+async def _complete_task(task: LLMTask, on_section: Optional[SectionCallback] = None) -> Dict:
+    """One attempt at a task; streamed when `on_section` is given so sections arrive as they complete"""
+    if on_section is None:
+        response = await llm_gateway.chat(
+            model=settings.OPENAI_MODEL,
+            messages=task.messages,
             temperature=0.7,
             response_format={"type": "json_object"}
         )
-        
-        result = json.loads(response.choices[0].message.content)
-        
-        # Ensure llm_forecast has proper structure and 5 years
-        if "llm_forecast" in result:
-            forecast = result["llm_forecast"]
-            if not isinstance(forecast, list):
-                forecast = []
-            # Ensure we have 5 years of forecast
-            if len(forecast) < 5:
-                last_year = max([e.year for e in events]) if events else 2024
-                last_score = events[-1].score if events else 5
-                for i in range(len(forecast), 5):
-                    forecast.append({
-                        "year": last_year + i + 1,
-                        "score": last_score,
-                        "phase": "Moderate",
-                        "reasoning": "Pattern still forming"
-                    })
-            result["llm_forecast"] = forecast[:5]  # Ensure exactly 5
-        
-        return result
+        return validate_task_result(task, json.loads(response.choices[0].message.content))
+    
+    response = llm_gateway.chat_stream(
+        model=settings.OPENAI_MODEL,
+        messages=task.messages,
+        temperature=0.7,
+        response_format={"type": "json_object"}
+    )
+    parser = JsonObjectStream()
+    try:
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if not delta:
+                continue
+            for section, value in parser.feed(delta):
+                if isinstance(value, task.sections.get(section, ())):
+                    await on_section(section, value)
+    finally:
+        await response.aclose()  # Frees the gateway slot even if the stream is abandoned
+    return validate_task_result(task, parser.close())
+
+
+async def run_llm_task(
+    task: LLMTask,
+    user: User,
+    events: List[LifeEvent],
+    semaphore: asyncio.Semaphore,
+    on_section: Optional[SectionCallback] = None
+) -> Dict:
+    """
+    Run one task: served from the insight cache when possible, otherwise
+    called with up to LLM_TASK_RETRIES retries (with exponential backoff)
+    and finally replaced by its fallback sections. When the gateway reports
+    the API unavailable, the fallback is used straight away. With `on_section`, every
+    section is reported exactly once, as soon as it is known.
+    """
+    # Rephrasing batches share one label so the metric's cardinality stays fixed
+    task_label = task.name.split(":")[0]
+    cached = await insight_cache.get(task.cache_key)
+    if cached is not None:
+        LLM_TASKS.inc(task_label, "cached")
+        if on_section is not None:
+            for section, value in cached.items():
+                await on_section(section, value)
+        return cached
+    
+    sent: Dict[str, Any] = {}
+    
+    async def emit(section: str, value: Any) -> None:
+        # Sections sent by a failed attempt stand; a retry only fills in the rest
+        if section not in sent:
+            sent[section] = _postprocess(section, value, events)
+            await on_section(section, sent[section])
+    
+    for attempt in range(settings.LLM_TASK_RETRIES + 1):
+        try:
+            async with semaphore:
+                result = await _complete_task(task, emit if on_section is not None else None)
+            result = {section: sent.get(section, _postprocess(section, value, events)) for section, value in result.items()}
+            # Only successful responses are cached; fallbacks are retried next time
+            await insight_cache.set(task.cache_key, user.id, result)
+            LLM_TASKS.inc(task_label, "ok")
+            return result
+        except LLMUnavailableError as e:
+            # The gateway has already retried; more attempts would only add load
+            logger.warning("LLM task %s unavailable: %s", task.name, e)
+            break
+        except Exception as e:
+            logger.warning("LLM task %s failed (attempt %d): %s", task.name, attempt + 1, e)
+            if attempt < settings.LLM_TASK_RETRIES:
+                await asyncio.sleep(settings.LLM_RETRY_BACKOFF * 2 ** attempt)
+    
+    LLM_TASKS.inc(task_label, "fallback")
+    result = {**task_fallback(task, user, events, generate_fallback_insights), **sent}
+    if on_section is not None:
+        for section, value in result.items():
+            await emit(section, value)
+    return result
+
+
+# Sections produced by several tasks (one per rephrasing batch) that are merged rather than replaced
+MERGED_SECTIONS = ("rephrased_events", "fallback_rephrased_events")
+
+
+def merge_task_results(results: List[Dict]) -> Dict:
+    """Combine task outputs into one insights dict; rephrasings from every batch are merged"""
+    merged: Dict[str, Any] = {section: {} for section in MERGED_SECTIONS}
+    for result in results:
+        for section, value in result.items():
+            if section in MERGED_SECTIONS:
+                merged[section].update(value)
+            else:
+                merged[section] = value
+    return merged
+
+
+async def generate_llm_insights(user: User, events: List[LifeEvent]) -> Dict:
+    """
+    Generate comprehensive LLM-based insights including:
+    - Hero heading and summary
+    - Rephrased event descriptions
+    - Intuitive future predictions with reasoning
+    - Personalized improvement plan
+    """
+    tasks = _task_graph(user, events)
+    semaphore = asyncio.Semaphore(settings.LLM_TASK_CONCURRENCY)
+    results = await asyncio.gather(*(run_llm_task(task, user, events, semaphore) for task in tasks))
+    return merge_task_results(results)
+
+
+async def stream_llm_insights(user: User, events: List[LifeEvent]) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    Same insights as generate_llm_insights, yielded as (section, value) pairs
+    as soon as each section is complete, whichever task it comes from.
+    Rephrasing sections are yielded again as each batch arrives, each time
+    with every rephrasing received so far.
+    """
+    tasks = _task_graph(user, events)
+    semaphore = asyncio.Semaphore(settings.LLM_TASK_CONCURRENCY)
+    queue: asyncio.Queue = asyncio.Queue()
     
-    except Exception as e:
-        print(f"LLM Service Error: {e}")
-        # Return fallback response
-        return generate_fallback_insights(user, events)
+    async def on_section(section: str, value: Any) -> None:
+        await queue.put((section, value))
+    
+    async def run_all() -> None:
+        try:
+            await asyncio.gather(*(run_llm_task(task, user, events, semaphore, on_section) for task in tasks))
+        finally:
+            await queue.put(None)
+    
+    runner = asyncio.create_task(run_all())
+    merged: Dict[str, Dict] = {section: {} for section in MERGED_SECTIONS}
+    try:
+        while (item := await queue.get()) is not None:
+            section, value = item
+            if section in MERGED_SECTIONS:
+                merged[section].update(value)
+                value = dict(merged[section])
+            yield section, value
+        await runner
+    finally:
+        runner.cancel()
 
 
 def generate_fallback_insights(user: User, events: List[LifeEvent]) -> Dict:
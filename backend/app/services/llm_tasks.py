@@ -0,0 +1,223 @@
+"""
+LLM Tasks
+The insight prompt split into independent sub-requests, each with its own
+small JSON schema, so they can run concurrently, be cached and retried on
+their own, and fall back individually:
+- rephrase: rephrased_events, one task per batch of events
+- narrative: hero_heading, summary, turning_points, what_shaped_journey, emotional_cycle
+- forecast: llm_forecast
+- unique_insights: unique_insights
+- actionable: actionable_insights
+
+Only rephrase batches are limited to their own events, and only events
+without a current rephrasing are sent; every other task sees the whole history.
+"""
+import json
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from app.core.config import settings
+from app.db.models import User, LifeEvent
+from app.services.insight_cache import insight_cache_key
+
+# Bump whenever a prompt changes so cached results are not reused across versions
+PROMPT_VERSION = "2"
+
+SYSTEM_MESSAGE = "You are an expert emotional intelligence coach who provides deep, personalized insights. Always respond with valid JSON."
+
+RULES = """RULES:
+- Use simple, direct English - no flowery language
+- Be specific to THEIR data, not generic
+- Focus on practical, useful insights
+- Each insight should be unique and actionable
+- If not enough data, say "Pattern still forming"
+
+Map scores: 8-10=Very High, 4-7=High, 0-3=Moderate, -3-0=Low, -10--3=Very Low"""
+
+NARRATIVE_SCHEMA = """{
+  "hero_heading": "One clear sentence about their pattern (simple English)",
+  "summary": "What stands out in plain language",
+
+  "turning_points": [
+    {
+      "event_id": "id",
+      "year": 2020,
+      "type": "first_dip" | "biggest_recovery" | "longest_stable" | "recent_change",
+      "insight": "Why this mattered - be specific and practical"
+    }
+  ],
+
+  "what_shaped_journey": [
+    {
+      "chain": "Work stress → emotional dip → withdrawal",
+      "explanation": "Simple cause-effect in plain English"
+    }
+  ],
+
+  "emotional_cycle": {
+    "pattern_name": "The Overdrive Loop" | "The Steady Builder" | "The Phoenix" | "The Wave Rider",
+    "cycle_description": "What keeps happening in simple terms",
+    "visual_flow": "Build → Push → Dip → Recover"
+  }
+}"""
+
+FORECAST_SCHEMA = """{
+  "llm_forecast": [
+    {
+      "year": 2025,
+      "score": 7.5,
+      "phase": "High",
+      "reasoning": "Simple, practical reasoning"
+    }
+  ]
+}
+
+Give one entry for each of the 5 years after their last event."""
+
+UNIQUE_INSIGHTS_SCHEMA = """{
+  "unique_insights": {
+    "pattern_name": "2-3 word name for their journey",
+    "one_truth": "One practical truth about their life pattern",
+    "hidden_rule": "A rule they follow without realizing it",
+    "blind_spot": "Something they might miss about themselves",
+    "strength_they_dont_see": "A strength they have but may not notice",
+    "warning_sign": "A pattern that could cause problems if ignored",
+    "opportunity": "A specific opportunity based on their pattern",
+    "what_works": "What actually works for them (based on data)",
+    "what_doesnt": "What doesn't work for them (based on data)",
+    "future_self_note": "Practical note from 1 year ahead"
+  }
+}"""
+
+ACTIONABLE_SCHEMA = """{
+  "actionable_insights": [
+    {
+      "title": "Specific action based on their pattern",
+      "why": "Why this matters for them",
+      "when": "When to do this"
+    }
+  ]
+}"""
+
+REPHRASE_SCHEMA = """{
+  "rephrased_events": {
+    "event_id": "Clear, simple rephrasing"
+  }
+}
+
+Include every event id listed above."""
+
+
+class LLMTask(NamedTuple):
+    name: str
+    sections: Dict[str, type]  # Top-level keys the response must contain, with their JSON types
+    messages: List[Dict]
+    cache_key: str
+    event_ids: Tuple[int, ...]  # Events covered (rephrase batches); empty for whole-history tasks
+
+
+def _messages(user: User, user_age: int, events_context: List[Dict], schema: str, task: str) -> List[Dict]:
+    prompt = f"""Analyze {user.name}'s life events. {task}. Use simple, direct English.
+
+User: {user.name}, Age {user_age}
+
+Events:
+{json.dumps(events_context, indent=2)}
+
+Return JSON:
+
+{schema}
+
+{RULES}
+"""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def _task(
+    name: str,
+    sections: Dict[str, type],
+    user: User,
+    user_age: int,
+    events_context: List[Dict],
+    schema: str,
+    instruction: str,
+    event_ids: Tuple[int, ...] = ()
+) -> LLMTask:
+    return LLMTask(
+        name=name,
+        sections=sections,
+        messages=_messages(user, user_age, events_context, schema, instruction),
+        cache_key=insight_cache_key(events_context, user_age, settings.OPENAI_MODEL, f"{PROMPT_VERSION}:{name}"),
+        event_ids=event_ids
+    )
+
+
+def build_llm_tasks(user: User, events_context: List[Dict], user_age: int, rephrase_context: List[Dict]) -> List[LLMTask]:
+    """
+    The task graph for one analysis; tasks are independent of each other.
+    `rephrase_context` holds the events that need a new rephrasing.
+    """
+    tasks = [
+        _task(
+            "narrative",
+            {"hero_heading": str, "summary": str, "turning_points": list, "what_shaped_journey": list, "emotional_cycle": dict},
+            user, user_age, events_context, NARRATIVE_SCHEMA,
+            "Find their pattern, turning points and what shaped their journey"
+        ),
+        _task(
+            "forecast", {"llm_forecast": list},
+            user, user_age, events_context, FORECAST_SCHEMA,
+            "Forecast the next 5 years with reasoning"
+        ),
+        _task(
+            "unique_insights", {"unique_insights": dict},
+            user, user_age, events_context, UNIQUE_INSIGHTS_SCHEMA,
+            "Generate practical, unique insights"
+        ),
+        _task(
+            "actionable", {"actionable_insights": list},
+            user, user_age, events_context, ACTIONABLE_SCHEMA,
+            "Suggest specific actions based on their pattern"
+        )
+    ]
+
+    batch_size = settings.LLM_REPHRASE_BATCH_SIZE
+    for start in range(0, len(rephrase_context), batch_size):
+        batch = rephrase_context[start:start + batch_size]
+        tasks.append(_task(
+            f"rephrase:{start // batch_size}", {"rephrased_events": dict},
+            user, user_age, batch, REPHRASE_SCHEMA,
+            "Rephrase each event description in clear, simple English",
+            event_ids=tuple(event["id"] for event in batch)
+        ))
+    return tasks
+
+
+def validate_task_result(task: LLMTask, result: Dict) -> Dict:
+    """Keep only the task's sections; raises ValueError if one is missing or has the wrong type"""
+    if not isinstance(result, dict):
+        raise ValueError(f"{task.name}: response is not a JSON object")
+    for section, expected_type in task.sections.items():
+        if not isinstance(result.get(section), expected_type):
+            raise ValueError(f"{task.name}: missing or invalid '{section}'")
+    return {section: result[section] for section in task.sections}
+
+
+def task_fallback(task: LLMTask, user: User, events: List[LifeEvent], fallback_insights: Callable[[User, List[LifeEvent]], Dict]) -> Dict:
+    """
+    Sections for a task that failed every attempt, taken from the rule-based
+    fallback insights. Fallback rephrasings are returned as
+    fallback_rephrased_events so they are shown but not kept as current.
+    """
+    if task.event_ids:
+        covered = set(task.event_ids)
+        events = [event for event in events if event.id in covered]
+        return {"fallback_rephrased_events": fallback_insights(user, events)["rephrased_events"]}
+    fallback = fallback_insights(user, events)
+    sections = {section: fallback.get(section, expected_type()) for section, expected_type in task.sections.items()}
+    if task.name == "actionable":
+        # select_plan_items falls back to the legacy plan when there are no actionable insights
+        sections["personalized_plan"] = fallback["personalized_plan"]
+    return sections
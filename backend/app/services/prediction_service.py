@@ -1,13 +1,50 @@
 """
 Statistical Prediction Service
 Generates forecasts using Exponential Smoothing and ARIMA models
+
+Engines:
+- full: statsmodels ExponentialSmoothing + ARIMA(1,0,1) + LinearRegression
+- fast: Holt linear smoothing, AR(1) and OLS trend in closed form with NumPy
+- auto: fast for short series, full from FORECAST_AUTO_FULL_MIN_POINTS events
+
+Every ensemble forecast carries 50/80/95% prediction bands from a residual
+bootstrap (see prediction_bands): FORECAST_INTERVAL_PATHS future paths are
+simulated at once as a single array operation.
+
+statsmodels and scikit-learn are imported on first use, so importing this
+module (and the API that depends on it) stays cheap.
 """
+import logging
+from contextlib import contextmanager
+
 import numpy as np
-import pandas as pd
-from typing import List, Dict
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
-from statsmodels.tsa.arima.model import ARIMA
-from sklearn.linear_model import LinearRegression
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.core.instrumentation import FORECAST_MODELS, span
+
+logger = logging.getLogger(__name__)
+
+FORECAST_ENGINES = ("full", "fast", "auto")
+
+# Fixed smoothing grid for the fast Holt fit (81 alpha/beta pairs)
+_HOLT_GRID = np.array([(a, b) for a in np.linspace(0.1, 0.9, 9) for b in np.linspace(0.1, 0.9, 9)])
+
+# Central prediction bands, as lower_<level>/upper_<level> on each forecast point
+INTERVAL_LEVELS = (50, 80, 95)
+
+
+class SeriesPoint(NamedTuple):
+    """Plain, picklable view of a LifeEvent used by the forecasting workers"""
+    year: int
+    month: Optional[int]
+    score: float
+    id: Optional[int] = None
+
+
+def to_series_points(events) -> List[SeriesPoint]:
+    """Detach ORM events into SeriesPoints so they can cross a process boundary"""
+    return [SeriesPoint(event.year, event.month, event.score, event.id) for event in events]
 
 
 def score_to_phase(score: float) -> str:
@@ -24,28 +61,230 @@ def score_to_phase(score: float) -> str:
         return "Very Low"
 
 
-def generate_statistical_forecast(events, forecast_years: int = 5) -> List[Dict]:
+def prepare_series(events) -> Tuple[np.ndarray, np.ndarray]:
+    """Decimal years and scores, sorted chronologically"""
+    years = np.array([event.year + (event.month or 6) / 12.0 for event in events], dtype=float)
+    scores = np.array([event.score for event in events], dtype=float)
+    order = np.argsort(years, kind="stable")
+    return years[order], scores[order]
+
+
+@contextmanager
+def model_fit(model: str):
+    """
+    Time one model fit as the `forecast.<model>` stage and count its outcome.
+    A failing fit is logged and suppressed so the ensemble uses the others.
+    """
+    with span(f"forecast.{model}"):
+        try:
+            yield
+        except Exception as e:
+            FORECAST_MODELS.inc(model, "failed")
+            logger.warning("%s fit failed: %s", model, e)
+            return
+    FORECAST_MODELS.inc(model, "ok")
+
+
+def fit_exponential_smoothing(scores: np.ndarray, steps: int) -> Tuple[np.ndarray, Dict]:
+    """Holt's additive-trend smoothing; returns the forecast and the fitted state"""
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    
+    model_es = ExponentialSmoothing(
+        scores,
+        seasonal_periods=None,
+        trend='add',
+        seasonal=None
+    )
+    fitted_es = model_es.fit()
+    state = {
+        "alpha": float(fitted_es.params["smoothing_level"]),
+        "beta": float(fitted_es.params["smoothing_trend"]),
+        "level": float(fitted_es.level[-1]),
+        "trend": float(fitted_es.trend[-1]),
+        "resid_std": float(np.sqrt(fitted_es.sse / len(scores)))
+    }
+    return fitted_es.forecast(steps=steps), state
+
+
+def fit_arima(scores: np.ndarray, steps: int, start_params: Optional[List[float]] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    ARIMA(1,0,1) with a constant; `start_params` warm-starts the optimizer
+    from a previous fit. Returns the forecast and the fitted state.
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+    
+    model_arima = ARIMA(scores, order=(1, 0, 1))
+    fitted_arima = model_arima.fit(start_params=start_params)
+    state = {
+        "params": [float(p) for p in fitted_arima.params],  # const, ar.L1, ma.L1, sigma2
+        "last_y": float(scores[-1]),
+        "last_resid": float(fitted_arima.resid[-1])
+    }
+    return fitted_arima.forecast(steps=steps), state
+
+
+def fit_linear_trend(years: np.ndarray, scores: np.ndarray, future_years: List[int]) -> np.ndarray:
+    from sklearn.linear_model import LinearRegression
+    
+    X = np.array(years).reshape(-1, 1)
+    model_lr = LinearRegression()
+    model_lr.fit(X, scores)
+    future_X = np.array(future_years).reshape(-1, 1)
+    return model_lr.predict(future_X)
+
+
+def prediction_bands(scores: np.ndarray, point_forecast: np.ndarray, n_paths: Optional[int] = None, seed: int = 0) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Residual bootstrap around the point forecast. The series is detrended by
+    OLS and the residuals follow an AR(1), e_t = phi * e_t-1 + u_t. Each path
+    redraws the innovations u from the observed ones (with replacement) and
+    runs the AR(1) forward from zero, one step per forecast year:
+
+        paths = point_forecast + draws @ phi ** (h - k)  (lower-triangular)
+
+    so all `n_paths` paths are one (n_paths, steps) matrix product. The bands
+    are percentiles across paths, clipped to [-10, 10]. Returns
+    {level: (lower, upper)}, or {} with fewer than 4 points or no paths.
+    """
+    n_paths = settings.FORECAST_INTERVAL_PATHS if n_paths is None else n_paths
+    steps = len(point_forecast)
+    if n_paths <= 0 or len(scores) < 4 or steps == 0:
+        return {}
+
+    t = np.arange(len(scores), dtype=float)
+    t -= t.mean()
+    slope = float(t @ (scores - scores.mean())) / float(t @ t)
+    residuals = scores - scores.mean() - slope * t
+    denominator = float(residuals[:-1] @ residuals[:-1])
+    phi = float(residuals[1:] @ residuals[:-1]) / denominator if denominator else 0.0
+    phi = float(np.clip(phi, -0.99, 0.99))
+    innovations = residuals[1:] - phi * residuals[:-1]
+    innovations -= innovations.mean()
+
+    # Seeded, so the same events always get the same bands
+    rng = np.random.default_rng(seed)
+    draws = innovations[rng.integers(0, len(innovations), size=(n_paths, steps))]
+    lags = np.arange(steps)[:, None] - np.arange(steps)[None, :]
+    propagation = np.where(lags >= 0, phi ** np.maximum(lags, 0), 0.0)
+    paths = np.asarray(point_forecast, dtype=float) + draws @ propagation.T
+
+    tails = [q for level in INTERVAL_LEVELS for q in (50 - level / 2, 50 + level / 2)]
+    quantiles = np.clip(np.percentile(paths, tails, axis=0), -10, 10)
+    return {level: (quantiles[2 * i], quantiles[2 * i + 1]) for i, level in enumerate(INTERVAL_LEVELS)}
+
+
+def combine_forecasts(forecasts: List[np.ndarray], scores: np.ndarray, future_years: List[int]) -> List[Dict]:
+    """Average all successful forecasts and map them to forecast points with prediction bands"""
+    if forecasts:
+        avg_forecast = np.mean(forecasts, axis=0)
+    else:
+        # Fallback to simple mean
+        avg_forecast = [np.mean(scores)] * len(future_years)
+    
+    # Clip scores to valid range [-10, 10]
+    avg_forecast = np.clip(avg_forecast, -10, 10)
+    bands = prediction_bands(scores, avg_forecast)
+    
+    # Build forecast result
+    result = []
+    for i, (year, score) in enumerate(zip(future_years, avg_forecast)):
+        point = {
+            "year": int(year),
+            "score": round(float(score), 2),
+            "phase": score_to_phase(float(score))
+        }
+        for level, (lower, upper) in bands.items():
+            point[f"lower_{level}"] = round(float(lower[i]), 2)
+            point[f"upper_{level}"] = round(float(upper[i]), 2)
+        result.append(point)
+    
+    return result
+
+
+def holt_linear_fast(scores: np.ndarray, steps: int) -> np.ndarray:
+    """
+    Holt's linear smoothing with (alpha, beta) picked from a fixed grid by
+    in-sample one-step SSE. All grid points run through the recursion together,
+    so the cost is one vectorized pass over the series.
+    """
+    alpha, beta = _HOLT_GRID[:, 0], _HOLT_GRID[:, 1]
+    level = np.full(len(_HOLT_GRID), scores[0])
+    trend = np.full(len(_HOLT_GRID), scores[1] - scores[0])
+    sse = np.zeros(len(_HOLT_GRID))
+    for y in scores[1:]:
+        predicted = level + trend
+        sse += (y - predicted) ** 2
+        previous_level = level
+        level = alpha * y + (1 - alpha) * predicted
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+    best = int(np.argmin(sse))
+    return level[best] + trend[best] * np.arange(1, steps + 1)
+
+
+def ar1_fast(scores: np.ndarray, steps: int) -> np.ndarray:
+    """AR(1) around the mean, with phi from the lag-1 least-squares estimate"""
+    mean = scores.mean()
+    centered = scores - mean
+    denominator = float(centered[:-1] @ centered[:-1])
+    phi = float(centered[1:] @ centered[:-1]) / denominator if denominator else 0.0
+    phi = float(np.clip(phi, -0.99, 0.99))  # Keep the forecast stationary
+    return mean + centered[-1] * phi ** np.arange(1, steps + 1)
+
+
+def linear_trend_fast(years: np.ndarray, scores: np.ndarray, future_years: List[int]) -> np.ndarray:
+    """Closed-form OLS trend, centered on the mean year for conditioning"""
+    x = years - years.mean()
+    denominator = float(x @ x)
+    slope = float(x @ (scores - scores.mean())) / denominator if denominator else 0.0
+    return scores.mean() + slope * (np.asarray(future_years, dtype=float) - years.mean())
+
+
+def resolve_engine(engine: Optional[str], n_points: int) -> str:
+    """Pick the concrete engine ("full" or "fast") for a series of `n_points`"""
+    engine = engine or settings.FORECAST_ENGINE
+    if engine not in FORECAST_ENGINES:
+        raise ValueError(f"Unknown forecast engine: {engine}")
+    if engine == "auto":
+        return "full" if n_points >= settings.FORECAST_AUTO_FULL_MIN_POINTS else "fast"
+    return engine
+
+
+def fast_statistical_forecast(events, forecast_years: int = 5) -> List[Dict]:
+    """Closed-form ensemble mirroring the full one: Holt (4+ points), AR(1) and OLS trend"""
+    if len(events) < 3:
+        return simple_linear_forecast(events, forecast_years)
+    
+    years, scores = prepare_series(events)
+    last_year = int(max(years))
+    future_years = [last_year + i for i in range(1, forecast_years + 1)]
+    
+    forecasts = [ar1_fast(scores, forecast_years), linear_trend_fast(years, scores, future_years)]
+    if len(scores) >= 4:
+        forecasts.insert(0, holt_linear_fast(scores, forecast_years))
+    
+    return combine_forecasts(forecasts, scores, future_years)
+
+
+def generate_statistical_forecast(events, forecast_years: int = 5, engine: Optional[str] = None) -> List[Dict]:
     """
     Generate statistical forecast using multiple methods and averaging results.
     
     Args:
         events: List of LifeEvent objects
         forecast_years: Number of years to forecast (default: 5)
+        engine: "full", "fast" or "auto" (default: FORECAST_ENGINE)
     
     Returns:
         List of forecast points with year, score, and phase
     """
-    # Extract scores and years
-    scores = [event.score for event in events]
-    years = [event.year + (event.month or 6) / 12.0 for event in events]  # Convert to decimal year
-    
-    if len(scores) < 3:
+    if len(events) < 3:
         # Not enough data for statistical forecast, return simple linear trend
         return simple_linear_forecast(events, forecast_years)
     
-    # Create time series
-    df = pd.DataFrame({'year': years, 'score': scores})
-    df = df.sort_values('year')
+    if resolve_engine(engine, len(events)) == "fast":
+        return fast_statistical_forecast(events, forecast_years)
+    
+    years, scores = prepare_series(events)
     
     # Get last year and generate future years
     last_year = int(max(years))
@@ -53,62 +292,22 @@ def generate_statistical_forecast(events, forecast_years: int = 5) -> List[Dict]
     
     forecasts = []
     
-    try:
-        # Method 1: Exponential Smoothing
-        if len(scores) >= 4:
-            model_es = ExponentialSmoothing(
-                df['score'].values,
-                seasonal_periods=None,
-                trend='add',
-                seasonal=None
-            )
-            fitted_es = model_es.fit()
-            forecast_es = fitted_es.forecast(steps=forecast_years)
+    # Method 1: Exponential Smoothing
+    if len(scores) >= 4:
+        with model_fit("ets"):
+            forecast_es, _ = fit_exponential_smoothing(scores, forecast_years)
             forecasts.append(forecast_es)
-    except Exception as e:
-        print(f"Exponential Smoothing failed: {e}")
-    
-    try:
-        # Method 2: ARIMA
-        model_arima = ARIMA(df['score'].values, order=(1, 0, 1))
-        fitted_arima = model_arima.fit()
-        forecast_arima = fitted_arima.forecast(steps=forecast_years)
+    
+    # Method 2: ARIMA
+    with model_fit("arima"):
+        forecast_arima, _ = fit_arima(scores, forecast_years)
         forecasts.append(forecast_arima)
-    except Exception as e:
-        print(f"ARIMA failed: {e}")
-    
-    try:
-        # Method 3: Linear Regression
-        X = np.array(df['year'].values).reshape(-1, 1)
-        y = df['score'].values
-        model_lr = LinearRegression()
-        model_lr.fit(X, y)
-        future_X = np.array(future_years).reshape(-1, 1)
-        forecast_lr = model_lr.predict(future_X)
-        forecasts.append(forecast_lr)
-    except Exception as e:
-        print(f"Linear Regression failed: {e}")
-    
-    # Average all successful forecasts
-    if forecasts:
-        avg_forecast = np.mean(forecasts, axis=0)
-    else:
-        # Fallback to simple mean
-        avg_forecast = [np.mean(scores)] * forecast_years
     
-    # Clip scores to valid range [-10, 10]
-    avg_forecast = np.clip(avg_forecast, -10, 10)
+    # Method 3: Linear Regression
+    with model_fit("linear"):
+        forecasts.append(fit_linear_trend(years, scores, future_years))
     
-    # Build forecast result
-    result = []
-    for year, score in zip(future_years, avg_forecast):
-        result.append({
-            "year": int(year),
-            "score": round(float(score), 2),
-            "phase": score_to_phase(float(score))
-        })
-    
-    return result
+    return combine_forecasts(forecasts, scores, future_years)
 
 
 def simple_linear_forecast(events, forecast_years: int = 5) -> List[Dict]:
@@ -131,16 +330,10 @@ def simple_linear_forecast(events, forecast_years: int = 5) -> List[Dict]:
             for i in range(1, forecast_years + 1)
         ]
     
-    # Calculate simple linear trend
-    X = np.array(years).reshape(-1, 1)
-    y = np.array(scores)
-    model = LinearRegression()
-    model.fit(X, y)
-    
+    # Calculate simple linear trend (closed form, so it is safe to run on the event loop)
     last_year = max(years)
     future_years = [last_year + i for i in range(1, forecast_years + 1)]
-    future_X = np.array(future_years).reshape(-1, 1)
-    forecast = model.predict(future_X)
+    forecast = linear_trend_fast(np.array(years, dtype=float), np.array(scores, dtype=float), future_years)
     forecast = np.clip(forecast, -10, 10)
     
     result = []
@@ -153,3 +346,10 @@ def simple_linear_forecast(events, forecast_years: int = 5) -> List[Dict]:
     
     return result
 
+
+
+def warm_up_forecasting() -> None:
+    """Import the scientific stack and run one tiny fit of every model"""
+    points = [SeriesPoint(2020 + i, 6, float(i % 3)) for i in range(5)]
+    generate_statistical_forecast(points, forecast_years=1, engine="full")
+    simple_linear_forecast(points[:2], forecast_years=1)
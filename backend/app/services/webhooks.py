@@ -0,0 +1,67 @@
+"""
+Webhook Delivery
+Guards job webhooks (POST /api/analyze/jobs `webhook_url`) against
+server-side request forgery:
+1. The URL passes app.core.webhook_urls.check_webhook_url: http(s) without
+   credentials, no literal private address, allowlisted host if any
+2. The host must resolve to public addresses only (no loopback, private,
+   link-local or reserved ranges such as 169.254.169.254), unless
+   WEBHOOK_ALLOWED_HOSTS is set, in which case only the hosts listed there
+   are accepted
+3. The check is repeated at send time and the request goes to the address
+   that was checked, so a DNS answer that changes in between (rebinding)
+   cannot redirect it. Redirects are not followed.
+"""
+import asyncio
+import socket
+from typing import Any, Dict
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+from app.core.webhook_urls import allowed_webhook_hosts, check_webhook_url, is_public_address
+
+
+async def resolve_webhook_url(url: str) -> Dict[str, Any]:
+    """
+    Check `url` and resolve its host. Returns the request to send: the URL
+    with the host replaced by a checked address, plus the Host header and
+    TLS server name of the original host. Raises ValueError for a rejected
+    or unresolvable URL.
+    """
+    host = check_webhook_url(url)
+    parts = urlsplit(url)
+    if host in allowed_webhook_hosts():
+        return {"url": url, "headers": {}, "extensions": {}}
+
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError("Webhook host does not resolve")
+    addresses = [info[4][0] for info in infos]
+    if not addresses or not all(is_public_address(address) for address in addresses):
+        raise ValueError("Webhook host resolves to a private, loopback, link-local or reserved address")
+
+    address = addresses[0].split("%", 1)[0]
+    netloc = f"[{address}]" if ":" in address else address
+    if parts.port:
+        netloc += f":{parts.port}"
+    return {
+        "url": urlunsplit((parts.scheme, netloc, parts.path, parts.query, "")),
+        "headers": {"Host": parts.netloc},
+        "extensions": {"sni_hostname": host} if parts.scheme == "https" else {}
+    }
+
+
+async def post_webhook(client: httpx.AsyncClient, url: str, payload: Dict) -> httpx.Response:
+    """POST `payload` to the checked address of `url`; raises ValueError if the URL is rejected now"""
+    request = await resolve_webhook_url(url)
+    return await client.post(
+        request["url"],
+        json=payload,
+        headers=request["headers"],
+        extensions=request["extensions"],
+        follow_redirects=False
+    )
+
@@ -0,0 +1 @@
+# Benchmarks and comparison harnesses (run from the backend directory)
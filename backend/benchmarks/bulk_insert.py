@@ -0,0 +1,96 @@
+"""
+Bulk Insert Benchmark
+Times storing one large POST /api/life-events payload three ways:
+- orm: one LifeEvent object and db.add per event, single commit (the old path)
+- bulk: bulk_insert_events (multi-row INSERT ... RETURNING, COPY on Postgres)
+- retry: the same payload again with idempotency keys, all skipped as duplicates
+
+Runs against a throwaway SQLite file unless --database-url is given (point it
+at a scratch Postgres database to measure the COPY path). Results print as JSON.
+
+Usage:
+    python -m benchmarks.bulk_insert --events 10000
+    python -m benchmarks.bulk_insert --database-url postgresql://localhost/lifelens_bench
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+
+def make_payload(n_events: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    phases = ["Very Low", "Low", "Moderate", "High", "Very High"]
+    return [
+        {
+            "year": 1990 + i % 35,
+            "month": rng.randint(1, 12),
+            "phase": rng.choice(phases),
+            "score": round(rng.uniform(-10, 10), 1),
+            "description": f"Imported journal entry {i}",
+            "idempotency_key": f"import-{i}"
+        }
+        for i in range(n_events)
+    ]
+
+
+async def run(n_events: int, chunk_size: int) -> Dict:
+    # Imported here so --database-url is in place before the engine is created
+    from app.db.database import AsyncSessionLocal, Base, async_engine, engine
+    from app.db.models import LifeEvent, User
+    from app.schemas.schemas import LifeEventCreate
+    from app.services.event_ingest import bulk_insert_events
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    payload = [LifeEventCreate(**event) for event in make_payload(n_events)]
+
+    async with AsyncSessionLocal() as db:
+        db.add_all([User(id="orm", name="orm", dob="1990-01-01"), User(id="bulk", name="bulk", dob="1990-01-01")])
+        await db.commit()
+
+    results = {"events": n_events, "dialect": engine.dialect.name, "chunk_size": chunk_size}
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        for event in payload:
+            db.add(LifeEvent(user_id="orm", **event.model_dump(exclude={"idempotency_key"})))
+        await db.commit()
+        results["orm_seconds"] = round(time.perf_counter() - started, 3)
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        event_ids, created, _ = await bulk_insert_events(db, "bulk", payload, chunk_size)
+        results["bulk_seconds"] = round(time.perf_counter() - started, 3)
+        assert created == n_events and len(set(event_ids)) == n_events
+
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        retried_ids, created, duplicates = await bulk_insert_events(db, "bulk", payload, chunk_size)
+        results["retry_seconds"] = round(time.perf_counter() - started, 3)
+        assert created == 0 and duplicates == n_events and retried_ids == event_ids
+
+    results["speedup"] = round(results["orm_seconds"] / results["bulk_seconds"], 1)
+    results["bulk_events_per_sec"] = round(n_events / results["bulk_seconds"])
+    await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk life event ingestion")
+    parser.add_argument("--events", type=int, default=10000, help="Events in the payload")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Events per INSERT batch and commit")
+    parser.add_argument("--database-url", default=None, help="Scratch database (tables are dropped and recreated)")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bulk_insert.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    print(json.dumps(asyncio.run(run(args.events, args.chunk_size)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shared helpers for the benchmark suite: synthetic data, latency summaries,
+memory readings and the JSON result envelope that benchmarks.compare diffs.
+"""
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ["Very Low", "Low", "Moderate", "High", "Very High"]
+
+
+def phase_for(score: float) -> str:
+    return PHASES[min(int((score + 10) / 4), 4)]
+
+
+def synthetic_scores(rng: np.random.Generator, length: int) -> np.ndarray:
+    """Drift + slow cycle + noise, clipped to the score range"""
+    t = np.arange(length)
+    drift = rng.normal(0, 0.3)
+    cycle = rng.uniform(0, 4) * np.sin(2 * np.pi * t / rng.uniform(4, 12))
+    return np.clip(rng.uniform(-3, 5) + drift * t / max(length / 30, 1) + cycle + rng.normal(0, 1.2, length), -10, 10)
+
+
+def synthetic_events(rng: np.random.Generator, length: int, start_year: int = 1990) -> List[Dict]:
+    """`length` monthly events as LifeEventCreate-shaped dicts"""
+    scores = synthetic_scores(rng, length)
+    return [
+        {
+            "year": start_year + i // 12,
+            "month": i % 12 + 1,
+            "phase": phase_for(float(score)),
+            "score": round(float(score), 1),
+            "description": f"Synthetic event {i}"
+        }
+        for i, score in enumerate(scores)
+    ]
+
+
+def latency_summary(samples: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Count, mean and p50/p95/p99 of durations in seconds, reported in milliseconds"""
+    if not samples:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    values = np.asarray(samples, dtype=float) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3)
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def process_rss_mb(pid: int) -> Optional[float]:
+    """Current resident memory of another process, where /proc is available"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def wait_for_url(url: str, deadline: float) -> float:
+    """Poll `url` until it answers 200; returns the perf_counter time it did"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(url)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit(benchmark: str, params: Dict[str, Any], results: Any, output: Optional[str] = None) -> Dict:
+    """Wrap results with run metadata, print them as JSON and optionally write them to `output`"""
+    document = {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "results": results
+    }
+    text = json.dumps(document, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    return document
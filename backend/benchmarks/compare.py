@@ -0,0 +1,85 @@
+"""
+Benchmark Comparison
+Diffs two result files written with --output by the same benchmark (e.g. on
+the base and head commits) and flags regressions beyond --threshold:
+- higher is worse: *_ms, *seconds, *rss_mb and other timings/memory
+- lower is worse: *per_sec, speedup, success_rate, recall_at_k
+
+Usage:
+    python -m benchmarks.compare base.json head.json --threshold 0.1
+    python -m benchmarks.compare base.json head.json --fail-on-regression   # exit 1 on a regression (CI)
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+HIGHER_IS_BETTER = ("per_sec", "speedup", "success_rate", "recall_at_k")
+LOWER_IS_BETTER = ("_ms", "seconds", "rss_mb", "max", "last")
+
+
+def flatten(value, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Numeric leaves as dotted paths (results.arima.1000.p95_ms)"""
+    if isinstance(value, dict):
+        for key, child in value.items():
+            yield from flatten(child, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def direction(path: str) -> Optional[int]:
+    """+1 if larger values are better, -1 if smaller are, None for counts and other non-metrics"""
+    name = path.rsplit(".", 1)[-1]
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER) and "server_stats" not in path:
+        return -1
+    return None
+
+
+def compare(base: Dict, head: Dict, threshold: float) -> Dict:
+    base_values = dict(flatten(base["results"]))
+    head_values = dict(flatten(head["results"]))
+    changes, regressions = {}, []
+    for path, before in base_values.items():
+        sign = direction(path)
+        after = head_values.get(path)
+        if sign is None or after is None or before == 0:
+            continue
+        change = (after - before) / abs(before)
+        changes[path] = {"base": before, "head": after, "change": round(change, 4)}
+        if sign * change < -threshold:
+            regressions.append(path)
+    return {
+        "benchmark": head["benchmark"],
+        "base_revision": base.get("revision"),
+        "head_revision": head.get("revision"),
+        "threshold": threshold,
+        "regressions": regressions,
+        "changes": changes
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+    if base["benchmark"] != head["benchmark"]:
+        sys.exit(f"Cannot compare {base['benchmark']} results with {head['benchmark']} results")
+
+    report = compare(base, head, args.threshold)
+    print(json.dumps(report, indent=2))
+    if args.fail_on_regression and report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
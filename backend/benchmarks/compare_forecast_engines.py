@@ -0,0 +1,88 @@
+"""
+Forecast Engine Comparison
+Accuracy and latency of the fast (closed-form NumPy) engine against the
+full statsmodels ensemble on synthetic journeys.
+
+Each series is split into history and a held-out tail of `horizon` yearly
+points; both engines forecast the tail from the history and are scored by
+mean absolute error.
+
+Usage:
+    python -m benchmarks.compare_forecast_engines --series 200 --lengths 5 10 20 30 60
+"""
+import argparse
+import json
+import time
+import warnings
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.prediction_service import SeriesPoint, generate_statistical_forecast
+
+
+def synthetic_journey(rng: np.random.Generator, length: int, horizon: int) -> List[SeriesPoint]:
+    """One point per year: drift + slow cycle + noise, clipped to the score range"""
+    drift = rng.normal(0, 0.3)
+    period = rng.uniform(4, 12)
+    amplitude = rng.uniform(0, 4)
+    start = rng.uniform(-3, 5)
+    t = np.arange(length + horizon)
+    scores = start + drift * t + amplitude * np.sin(2 * np.pi * t / period) + rng.normal(0, 1.5, len(t))
+    scores = np.clip(scores, -10, 10)
+    return [SeriesPoint(2000 + int(i), 6, float(score), int(i)) for i, score in enumerate(scores)]
+
+
+def evaluate(engine: str, journeys: List[List[SeriesPoint]], horizon: int) -> Dict:
+    errors = []
+    latencies = []
+    for points in journeys:
+        history, actual = points[:-horizon], points[-horizon:]
+        start = time.perf_counter()
+        forecast = generate_statistical_forecast(history, forecast_years=horizon, engine=engine)
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors.append(np.mean([abs(f["score"] - a.score) for f, a in zip(forecast, actual)]))
+    latencies = np.array(latencies)
+    return {
+        "mae": round(float(np.mean(errors)), 3),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "max_ms": round(float(latencies.max()), 3)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare fast vs full forecast engines")
+    parser.add_argument("--series", type=int, default=100, help="Synthetic journeys per length")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[5, 10, 20, 30, 60])
+    parser.add_argument("--horizon", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results only")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    rng = np.random.default_rng(args.seed)
+    results = []
+    for length in args.lengths:
+        journeys = [synthetic_journey(rng, length, args.horizon) for _ in range(args.series)]
+        row = {"length": length}
+        for engine in ("full", "fast"):
+            row[engine] = evaluate(engine, journeys, args.horizon)
+        row["speedup"] = round(row["full"]["p50_ms"] / max(row["fast"]["p50_ms"], 1e-6), 1)
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    print(f"{'length':>6} | {'full MAE':>8} {'full p50':>9} {'full p95':>9} | {'fast MAE':>8} {'fast p50':>9} {'fast p95':>9} | speedup")
+    for row in results:
+        full, fast = row["full"], row["fast"]
+        print(
+            f"{row['length']:>6} | {full['mae']:>8} {full['p50_ms']:>7}ms {full['p95_ms']:>7}ms"
+            f" | {fast['mae']:>8} {fast['p50_ms']:>7}ms {fast['p95_ms']:>7}ms | {row['speedup']}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Event Search Benchmark
+Loads N synthetic event descriptions (Zipf-distributed words, every third
+event with a rephrasing) spread over --users users into a scratch database,
+then times GET /api/events/{user_id}/search's ranking:
+- load: executemany inserts, including index maintenance (the FTS5 triggers
+  on SQLite, the generated tsvector column on Postgres)
+- native: FTS5 bm25() on SQLite, GIN index + BM25 on Postgres
+- python_cold / python_warm: the in-memory per-user index, built by each
+  user's first query, then reused
+- like: an unranked LIKE '%term%' scan of the user's events, the old workaround
+
+Runs against a throwaway SQLite file unless --database-url is given (tables
+are dropped and recreated).
+
+Usage:
+    python -m benchmarks.event_search --descriptions 1000000 --users 10000
+    python -m benchmarks.event_search --database-url postgresql://localhost/lifelens_bench
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from benchmarks.common import emit, latency_summary, peak_rss_mb
+
+WORDS = (
+    "work job promotion family friend moved city school graduated married wedding baby born loss "
+    "grief health hospital recovery travel trip vacation home house bought sold relationship breakup "
+    "divorce started business project marathon running music band book wrote exam passed failed "
+    "retired dog cat garden holiday parents brother sister college university anxiety therapy"
+).split()
+
+Query = Tuple[str, str]  # (user_id, q)
+
+
+def vocabulary(size: int) -> np.ndarray:
+    return np.array(WORDS + [f"term{i}" for i in range(max(size - len(WORDS), 0))])
+
+
+def zipf_weights(size: int) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** 1.07
+    return weights / weights.sum()
+
+
+def descriptions(rng: np.random.Generator, vocab: np.ndarray, weights: np.ndarray, count: int) -> List[str]:
+    """`count` descriptions of 6-24 words"""
+    lengths = rng.integers(6, 25, size=count)
+    words = vocab[rng.choice(len(vocab), size=int(lengths.sum()), p=weights)]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    return [" ".join(words[bounds[i]:bounds[i + 1]]) for i in range(count)]
+
+
+def event_batches(total: int, users: int, vocab_size: int, batch_size: int, seed: int) -> Iterator[List[Dict]]:
+    """Rows for life_events, generated a batch at a time so a million descriptions never sit in memory at once"""
+    rng = np.random.default_rng(seed)
+    vocab, weights = vocabulary(vocab_size), zipf_weights(vocab_size)
+    for start in range(0, total, batch_size):
+        texts = descriptions(rng, vocab, weights, min(batch_size, total - start))
+        yield [
+            {
+                "user_id": f"bench-user-{(start + i) % users}",
+                "year": 1990 + (start + i) % 35,
+                "month": (start + i) % 12 + 1,
+                "phase": "Moderate",
+                "score": 0.0,
+                "description": text,
+                "rephrased_description": texts[i - 1] if i % 3 == 0 else None
+            }
+            for i, text in enumerate(texts)
+        ]
+
+
+def make_queries(users: int, vocab_size: int, count: int, seed: int) -> List[Query]:
+    """One to three terms each, drawn with the same word frequencies as the descriptions"""
+    rng = np.random.default_rng(seed + 1)
+    vocab, weights = vocabulary(vocab_size), zipf_weights(vocab_size)
+    return [
+        (f"bench-user-{rng.integers(users)}", " ".join(vocab[rng.choice(vocab_size, size=rng.integers(1, 4), p=weights)]))
+        for _ in range(count)
+    ]
+
+
+def load(total: int, users: int, vocab_size: int, seed: int) -> Dict:
+    from sqlalchemy import insert
+
+    from app.db.database import Base, engine
+    from app.db.models import LifeEvent, User
+    from app.services.event_search import ensure_search_index
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    native = ensure_search_index(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"id": f"bench-user-{i}", "name": f"Bench {i}", "dob": "1985-06-15"} for i in range(users)])
+
+    generate_seconds = 0.0
+    started = time.perf_counter()
+    batches = event_batches(total, users, vocab_size, 10000, seed)
+    while True:
+        generated = time.perf_counter()
+        rows = next(batches, None)
+        generate_seconds += time.perf_counter() - generated
+        if rows is None:
+            break
+        with engine.begin() as conn:
+            conn.execute(insert(LifeEvent), rows)
+    insert_seconds = time.perf_counter() - started - generate_seconds
+
+    results = {
+        "dialect": engine.dialect.name,
+        "native_index": native,
+        "insert_seconds": round(insert_seconds, 3),
+        "inserts_per_sec": round(total / insert_seconds)
+    }
+    if engine.dialect.name == "sqlite":
+        results["database_mb"] = round(os.path.getsize(engine.url.database) / (1024 * 1024), 1)
+    return results
+
+
+async def time_search(backend: str, queries: List[Query], limit: int, repeat: int = 1) -> List[Dict]:
+    """Latency of EventSearch.search on a fresh instance with EVENT_SEARCH_BACKEND=backend, one pass per repeat"""
+    from app.core.config import settings
+    from app.db.database import AsyncSessionLocal
+    from app.services.event_search import EventSearch
+
+    settings.EVENT_SEARCH_BACKEND = backend
+    search = EventSearch(len(queries))
+    passes = []
+    for _ in range(repeat):
+        samples, hits = [], 0
+        for user_id, q in queries:
+            async with AsyncSessionLocal() as db:
+                started = time.perf_counter()
+                results, _ = await search.search(db, user_id, q, limit)
+                samples.append(time.perf_counter() - started)
+            hits += len(results)
+        passes.append({**latency_summary(samples), "mean_hits": round(hits / len(queries), 2), "backend": search.stats()["backend"]})
+    return passes
+
+
+async def time_like(queries: List[Query], limit: int) -> Dict:
+    from sqlalchemy import or_, select
+
+    from app.db.database import AsyncSessionLocal
+    from app.db.models import LifeEvent
+
+    samples, hits = [], 0
+    for user_id, q in queries:
+        patterns = [f"%{term}%" for term in q.split()]
+        statement = select(LifeEvent).where(
+            LifeEvent.user_id == user_id,
+            or_(*(LifeEvent.description.like(p) for p in patterns), *(LifeEvent.rephrased_description.like(p) for p in patterns))
+        ).limit(limit)
+        async with AsyncSessionLocal() as db:
+            started = time.perf_counter()
+            results = (await db.execute(statement)).scalars().all()
+            samples.append(time.perf_counter() - started)
+        hits += len(results)
+    return {**latency_summary(samples), "mean_hits": round(hits / len(queries), 2)}
+
+
+async def run(args: argparse.Namespace) -> Dict:
+    from app.db.database import async_engine
+
+    results = load(args.descriptions, args.users, args.vocabulary, args.seed)
+    queries = make_queries(args.users, args.vocabulary, args.queries, args.seed)
+
+    native = (await time_search("auto", queries, args.limit))[0]
+    results["native"] = native if native["backend"] != "python" else {"skipped": "no native full-text index"}
+    cold, warm = await time_search("python", queries, args.limit, repeat=2)
+    results["python_cold"] = cold
+    results["python_warm"] = warm
+    results["like"] = await time_like(queries, args.limit)
+    results["peak_rss_mb"] = peak_rss_mb()
+    await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark full-text search over event descriptions")
+    parser.add_argument("--descriptions", type=int, default=1000000, help="Events loaded")
+    parser.add_argument("--users", type=int, default=10000, help="Users the events are spread over")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="Distinct words")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20, help="Page size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", default=None, help="Scratch database (tables are dropped and recreated)")
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'event_search.db')}"
+    os.environ["DATABASE_URL"] = database_url
+    params = {key: value for key, value in vars(args).items() if key != "database_url"}
+    emit("event_search", params, asyncio.run(run(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Bulk Export Benchmark
+Seeds N users x M events into a scratch database, then exports life_events
+to a scratch file in each format (NDJSON, gzipped NDJSON, and Arrow/Parquet
+when pyarrow is installed), reporting rows/s, output size and peak memory.
+Peak RSS should stay flat as --events grows: rows are streamed through a
+server-side cursor --batch-size at a time.
+
+Usage:
+    python -m benchmarks.export --users 10000 --events 100
+    python -m benchmarks.export --database-url postgresql://localhost/lifelens_bench --batch-size 10000
+"""
+import argparse
+import os
+import tempfile
+from typing import Dict
+
+from benchmarks.common import emit, peak_rss_mb
+from benchmarks.seed import seed
+
+
+def run(args: argparse.Namespace, scratch: str) -> Dict:
+    # Imported here so the database URL is in place before the engine is created
+    from app.services.data_export import export_table, pa
+
+    results = {"seed": seed(args.users, args.events, reset=True)}
+    results["rss_after_seed_mb"] = peak_rss_mb()
+
+    variants = [("ndjson", False), ("ndjson", True)]
+    if pa is not None:
+        variants += [("arrow", False), ("parquet", False)]
+    for fmt, compress in variants:
+        name = fmt + ("_gzip" if compress else "")
+        with open(os.path.join(scratch, name), "wb") as out:
+            summary = export_table(out, "events", fmt, compress, batch_size=args.batch_size)
+        results[name] = {
+            "seconds": summary["seconds"],
+            "rows_per_sec": summary["rows_per_sec"],
+            "output_mb": round(summary["bytes"] / (1024 * 1024), 1),
+            "peak_rss_mb": peak_rss_mb()
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark streaming exports")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=100, help="Events per user")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per cursor fetch")
+    parser.add_argument("--database-url", default=None, help="Scratch database (tables are dropped and recreated)")
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(scratch, 'export.db')}"
+        results = run(args, scratch)
+    params = {key: value for key, value in vars(args).items() if key != "database_url"}
+    emit("export", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Fake OpenAI Server
+A stand-in for POST /v1/chat/completions so the LLM gateway, the task graph
+and the SSE stream can be exercised (and load-tested) without an API key.
+Each request is answered with plausible JSON for whichever insight task the
+prompt asks for, streamed or not, after a configurable latency. A share of
+requests can be failed with 500s or rate-limited with 429 + Retry-After.
+
+Usage:
+    python -m benchmarks.fake_openai --port 9000 --latency 0.5 --error-rate 0.1 --rate-limit-rate 0.05
+    OPENAI_BASE_URL=http://127.0.0.1:9000/v1 OPENAI_API_KEY=fake python main.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Dict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI")
+
+config = {"latency": 0.5, "jitter": 0.2, "error_rate": 0.0, "rate_limit_rate": 0.0, "retry_after": 1.0, "chunk_size": 16}
+counters = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+def task_content(prompt: str) -> Dict:
+    """Sections for every task schema found in the prompt"""
+    content: Dict = {}
+    if '"hero_heading"' in prompt:
+        content.update(
+            hero_heading="Steady growth with a few sharp dips",
+            summary="Most years trend upward; setbacks recover within a year.",
+            turning_points=[],
+            what_shaped_journey=[{"chain": "Work stress → dip → recovery", "explanation": "Pressure at work drives the dips."}],
+            emotional_cycle={"pattern_name": "The Wave Rider", "cycle_description": "Ups and downs that even out", "visual_flow": "Build → Push → Dip → Recover"}
+        )
+    if '"llm_forecast"' in prompt:
+        years = [int(year) for year in re.findall(r'"year": (\d{4})', prompt)] or [2024]
+        content["llm_forecast"] = [
+            {"year": max(years) + i, "score": 5.0, "phase": "High", "reasoning": "Recent trend continues"}
+            for i in range(1, 6)
+        ]
+    if '"unique_insights"' in prompt:
+        content["unique_insights"] = {
+            "pattern_name": "Steady Climber",
+            "one_truth": "You recover faster than you expect.",
+            "what_works": "Routine",
+            "what_doesnt": "Overcommitting"
+        }
+    if '"actionable_insights"' in prompt:
+        content["actionable_insights"] = [{"title": "Plan recovery time", "why": "Dips follow busy periods", "when": "After big pushes"}]
+    if '"rephrased_events"' in prompt:
+        ids = re.findall(r'"id": (\d+)', prompt)
+        content["rephrased_events"] = {event_id: f"Event {event_id}, in plain words" for event_id in ids}
+    return content
+
+
+def _completion(model: str, text: str, prompt_tokens: int) -> Dict:
+    completion_tokens = len(text) // 4
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+    }
+
+
+async def _chunks(model: str, text: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    pieces = [text[i:i + config["chunk_size"]] for i in range(0, len(text), config["chunk_size"])]
+    # Spread half the latency over the stream so sections arrive progressively
+    delay = config["latency"] / 2 / max(len(pieces), 1)
+    for piece in pieces:
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(delay)
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+
+    if random.random() < config["rate_limit_rate"]:
+        counters["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": str(config["retry_after"])},
+            content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+        )
+    latency = max(config["latency"] + random.uniform(-config["jitter"], config["jitter"]), 0.0)
+    if random.random() < config["error_rate"]:
+        counters["errors"] += 1
+        await asyncio.sleep(latency / 2)
+        return JSONResponse(status_code=500, content={"error": {"message": "Injected failure", "type": "server_error"}})
+
+    prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages", []))
+    text = json.dumps(task_content(prompt))
+    model = body.get("model", "gpt-4o")
+
+    if body.get("stream"):
+        await asyncio.sleep(latency / 2)
+        return StreamingResponse(_chunks(model, text), media_type="text/event-stream")
+    await asyncio.sleep(latency)
+    return _completion(model, text, len(prompt) // 4)
+
+
+@app.get("/stats")
+async def stats():
+    return {**counters, **config}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=config["latency"], help="Seconds per request")
+    parser.add_argument("--jitter", type=float, default=config["jitter"], help="Random +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=config["retry_after"], help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    config.update(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
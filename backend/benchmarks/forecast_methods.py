@@ -0,0 +1,131 @@
+"""
+Forecast Method Micro-benchmarks
+Latency of every forecasting building block, and of the insight cards, on
+synthetic monthly series from 3 to 10,000 points:
+- full engine models: ets, arima, linear_sklearn
+- fast engine models: holt_fast, ar1_fast, linear_fast
+- ensembles: full_ensemble, fast_ensemble, incremental_update (one appended
+  event on top of a stored state)
+- prediction_bands: the residual bootstrap behind the 50/80/95% bands,
+  with FORECAST_INTERVAL_PATHS (10,000) simulated paths
+- insight_cards: generate_insight_cards on the same events
+
+Each (method, size) cell runs up to --repeats times within --budget seconds
+after one warm-up call, and reports p50/p95/p99 and calls per second. Slow
+cells (ARIMA on 10,000 points) simply get fewer samples.
+
+Usage:
+    python -m benchmarks.forecast_methods --sizes 3 10 100 1000 10000 --output forecast.json
+    python -m benchmarks.forecast_methods --methods arima fast_ensemble --sizes 50
+"""
+import argparse
+import time
+import warnings
+from types import SimpleNamespace
+from typing import Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from app.services.forecast_state import full_refit, update_statistical_forecast
+from app.services.insights_service import generate_insight_cards
+from app.services.prediction_service import (
+    SeriesPoint,
+    ar1_fast,
+    fit_arima,
+    fit_exponential_smoothing,
+    fit_linear_trend,
+    generate_statistical_forecast,
+    holt_linear_fast,
+    linear_trend_fast,
+    prediction_bands,
+    prepare_series
+)
+from benchmarks.common import emit, latency_summary, peak_rss_mb, synthetic_events
+
+HORIZON = 5
+
+
+class Case(NamedTuple):
+    points: List[SeriesPoint]
+    events: List[SimpleNamespace]
+    years: np.ndarray
+    scores: np.ndarray
+    future_years: List[int]
+    state: Dict  # Fitted on all but the last point, for incremental_update
+
+
+class Method(NamedTuple):
+    run: Callable[[Case], object]
+    min_points: int
+
+
+METHODS: Dict[str, Method] = {
+    "ets": Method(lambda c: fit_exponential_smoothing(c.scores, HORIZON), 4),
+    "arima": Method(lambda c: fit_arima(c.scores, HORIZON), 3),
+    "linear_sklearn": Method(lambda c: fit_linear_trend(c.years, c.scores, c.future_years), 2),
+    "holt_fast": Method(lambda c: holt_linear_fast(c.scores, HORIZON), 2),
+    "ar1_fast": Method(lambda c: ar1_fast(c.scores, HORIZON), 2),
+    "linear_fast": Method(lambda c: linear_trend_fast(c.years, c.scores, c.future_years), 2),
+    "full_ensemble": Method(lambda c: generate_statistical_forecast(c.points, HORIZON, engine="full"), 1),
+    "fast_ensemble": Method(lambda c: generate_statistical_forecast(c.points, HORIZON, engine="fast"), 1),
+    "incremental_update": Method(lambda c: update_statistical_forecast(c.points, c.state, HORIZON, engine="full"), 5),
+    "prediction_bands": Method(lambda c: prediction_bands(c.scores, np.zeros(HORIZON)), 4),
+    "insight_cards": Method(lambda c: generate_insight_cards(c.events, [], {}), 1)
+}
+
+
+def build_case(size: int, seed: int) -> Case:
+    rng = np.random.default_rng(seed)
+    events = [SimpleNamespace(id=i + 1, **event) for i, event in enumerate(synthetic_events(rng, size))]
+    points = [SeriesPoint(e.year, e.month, e.score, e.id) for e in events]
+    years, scores = prepare_series(points)
+    state = full_refit(points[:-1], HORIZON)[1] if size >= 5 else {}
+    return Case(points, events, years, scores, [int(years[-1]) + i for i in range(1, HORIZON + 1)], state)
+
+
+def bench_cell(method: Method, case: Case, repeats: int, budget: float) -> Dict:
+    method.run(case)  # Warm-up: lazy imports, caches
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < repeats and (not samples or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        method.run(case)
+        samples.append(time.perf_counter() - started)
+    summary = latency_summary(samples)
+    summary["per_sec"] = round(len(samples) / sum(samples), 1) if sum(samples) else None
+    return summary
+
+
+def run(methods: List[str], sizes: List[int], repeats: int, budget: float, seed: int) -> Dict:
+    results: Dict[str, Dict] = {name: {} for name in methods}
+    for size in sizes:
+        case = build_case(size, seed)
+        for name in methods:
+            method = METHODS[name]
+            if size < method.min_points:
+                continue
+            try:
+                results[name][str(size)] = bench_cell(method, case, repeats, budget)
+            except Exception as e:
+                results[name][str(size)] = {"error": f"{type(e).__name__}: {e}"}
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Micro-benchmark forecast methods and insight cards")
+    parser.add_argument("--methods", nargs="+", choices=list(METHODS), default=list(METHODS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[3, 10, 100, 1000, 10000], help="Points per series")
+    parser.add_argument("--repeats", type=int, default=50, help="Most timed calls per cell")
+    parser.add_argument("--budget", type=float, default=5.0, help="Seconds per cell before it stops repeating")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")  # statsmodels convergence warnings on synthetic data
+    results = run(args.methods, args.sizes, args.repeats, args.budget, args.seed)
+    emit("forecast_methods", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Similar-Journey Search Benchmark
+Builds a journey index of N synthetic users in a scratch memory-mapped file
+(no database) and times GET /api/users/{id}/similar's search:
+- build: journey_vector for every user, then one store() into the matrix
+- exact: batched dot products over every row
+- ivf: the coarse quantizer with --ivf-lists lists and --probes probes,
+  plus its recall@k against the exact results
+
+Usage:
+    python -m benchmarks.journey_search --users 10000 100000 1000000 --ivf-lists 1024 --probes 8
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.journey_index import JourneyIndex, journey_vector
+from benchmarks.common import emit, latency_summary, peak_rss_mb, synthetic_scores
+
+
+def build_index(path: str, users: int, events: int, seed: int) -> Dict:
+    """Index `users` journeys of `events` monthly events each, born 1940-2000"""
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    rows = []
+    for row_id in range(users):
+        birth_year = int(rng.integers(1940, 2000))
+        start_year = birth_year + int(rng.integers(5, 40))
+        scores = synthetic_scores(rng, events)
+        journey = [SimpleNamespace(year=start_year + i // 12, month=i % 12 + 1, score=float(s)) for i, s in enumerate(scores)]
+        vector = journey_vector(f"{birth_year}-06-15", journey)
+        rows.append((row_id, f"bench-user-{row_id}", vector.tobytes() if vector is not None else None))
+    vectors_seconds = time.perf_counter() - started
+
+    index = JourneyIndex(path)
+    started = time.perf_counter()
+    index.store(rows)
+    return {"index": index, "vectors_seconds": round(vectors_seconds, 3), "store_seconds": round(time.perf_counter() - started, 3)}
+
+
+def time_queries(index: JourneyIndex, query_ids: List[str], k: int) -> Dict:
+    samples, results = [], {}
+    for user_id in query_ids:
+        started = time.perf_counter()
+        results[user_id] = index.similar(user_id, k)
+        samples.append(time.perf_counter() - started)
+    return {"latency": latency_summary(samples), "results": results}
+
+
+def recall(exact: Dict, approximate: Dict) -> float:
+    hits = total = 0
+    for user_id, matches in exact.items():
+        expected = {match.row for match in matches}
+        hits += len(expected & {match.row for match in approximate[user_id]})
+        total += len(expected)
+    return round(hits / total, 4) if total else 1.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark similar-journey search")
+    parser.add_argument("--users", nargs="+", type=int, default=[10000, 100000], help="Index sizes")
+    parser.add_argument("--events", type=int, default=60, help="Events per synthetic journey")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ivf-lists", type=int, default=256, help="0 skips the IVF run")
+    parser.add_argument("--probes", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for users in args.users:
+            settings.JOURNEY_IVF_LISTS = 0
+            built = build_index(os.path.join(scratch, f"journeys-{users}.f32"), users, args.events, args.seed)
+            index = built.pop("index")
+            rng = np.random.default_rng(args.seed + 1)
+            query_ids = [f"bench-user-{i}" for i in rng.choice(users, size=min(args.queries, users), replace=False)]
+
+            exact = time_queries(index, query_ids, args.k)
+            cell = {**built, "exact": exact["latency"]}
+
+            if args.ivf_lists:
+                settings.JOURNEY_IVF_LISTS = args.ivf_lists
+                settings.JOURNEY_IVF_PROBES = args.probes
+                started = time.perf_counter()
+                index.train_quantizer()
+                cell["ivf_train_seconds"] = round(time.perf_counter() - started, 3)
+                if index.search_method == "ivf":
+                    approximate = time_queries(index, query_ids, args.k)
+                    cell["ivf"] = {**approximate["latency"], "recall_at_k": recall(exact["results"], approximate["results"])}
+                else:
+                    cell["ivf"] = {"skipped": "too few journeys for the number of lists"}
+            results[str(users)] = cell
+    results["peak_rss_mb"] = peak_rss_mb()
+    emit("journey_search", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+End-to-end Load Test
+Drives a real `uvicorn main:app` with concurrent HTTP clients:
+1. Seeds --users x --events into a scratch SQLite file (or --database-url)
+2. Starts benchmarks.fake_openai with the given latency and error rates
+3. Starts the API against both, waits for /ready
+4. Runs --concurrency clients for --duration seconds over a weighted mix of
+   scenarios and samples the API's RSS every second
+
+Scenarios:
+- analyze: POST /api/analyze (computed once per user, then served stored)
+- analyze_force: POST /api/analyze with force, the full forecast + LLM path
+- analyze_job: POST /api/analyze/jobs, then poll until the job finishes
+- events: GET /api/events/{user_id}?limit=100
+- latest_analysis: GET /api/analysis/{user_id}
+
+Reports req/s and p50/p95/p99 per scenario, status counts, RSS and the
+API's /stats, as JSON comparable with benchmarks.compare.
+
+Usage:
+    python -m benchmarks.load_test --users 200 --events 40 --concurrency 32 --duration 30 --mix analyze=3,events=5,analyze_force=1
+    python -m benchmarks.load_test --base-url http://127.0.0.1:8000 --users 200 --mix events=1
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import BACKEND_DIR, emit, latency_summary, process_rss_mb, wait_for_url
+from benchmarks.seed import bench_user_ids
+
+SCENARIOS = ("analyze", "analyze_force", "analyze_job", "events", "latest_analysis")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def request_scenario(client: httpx.AsyncClient, scenario: str, user_id: str) -> int:
+    """Issue one scenario and return its final status code"""
+    if scenario in ("analyze", "analyze_force"):
+        response = await client.post("/api/analyze", json={"user_id": user_id, "force": scenario == "analyze_force"})
+    elif scenario == "analyze_job":
+        response = await client.post("/api/analyze/jobs", json={"user_id": user_id, "force": True})
+        if response.status_code != 202:
+            return response.status_code
+        location = response.headers["location"]
+        while True:
+            await asyncio.sleep(0.1)
+            response = await client.get(location)
+            if response.status_code != 200 or response.json()["status"] in ("succeeded", "failed"):
+                break
+        if response.status_code == 200 and response.json()["status"] == "failed":
+            return 500
+    elif scenario == "events":
+        response = await client.get(f"/api/events/{user_id}", params={"limit": 100})
+    else:
+        response = await client.get(f"/api/analysis/{user_id}")
+    return response.status_code
+
+
+async def generate_load(
+    base_url: str,
+    user_ids: List[str],
+    mix: Dict[str, float],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    server_pid: Optional[int]
+) -> Dict:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    rss_samples: List[float] = []
+    scenarios, weights = list(mix), list(mix.values())
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration
+
+    async def client_loop(client: httpx.AsyncClient, rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = await request_scenario(client, scenario, rng.choice(user_ids))
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if started >= measure_from:
+                latencies[scenario].append(time.perf_counter() - started)
+                statuses[scenario][str(status)] += 1
+
+    async def sample_rss() -> None:
+        while time.perf_counter() < deadline:
+            rss = process_rss_mb(server_pid) if server_pid else None
+            if rss is not None:
+                rss_samples.append(rss)
+            await asyncio.sleep(1.0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        await asyncio.gather(sample_rss(), *(client_loop(client, random.Random(i)) for i in range(concurrency)))
+        stats = (await client.get("/stats")).json()
+
+    total = sum(len(samples) for samples in latencies.values())
+    ok = sum(count for counter in statuses.values() for status, count in counter.items() if status.startswith("2"))
+    return {
+        "requests": total,
+        "requests_per_sec": round(total / duration, 1),
+        "success_rate": round(ok / total, 4) if total else None,
+        "overall": latency_summary([s for samples in latencies.values() for s in samples]),
+        "scenarios": {
+            scenario: {**latency_summary(latencies[scenario]), "statuses": dict(statuses[scenario])}
+            for scenario in mix
+        },
+        "server_rss_mb": {"max": max(rss_samples), "last": rss_samples[-1]} if rss_samples else None,
+        "server_stats": stats
+    }
+
+
+def start_servers(args, database_url: str) -> Tuple[List[subprocess.Popen], int]:
+    """Start the fake OpenAI server and the API; returns the processes and the API pid"""
+    fake = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_openai", "--port", str(args.openai_port),
+            "--latency", str(args.llm_latency), "--error-rate", str(args.llm_error_rate),
+            "--rate-limit-rate", str(args.llm_rate_limit_rate)
+        ],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{args.openai_port}/v1",
+        "OPENAI_API_KEY": "fake",
+        "DEBUG": "False"
+    }
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.perf_counter() + args.startup_timeout
+    wait_for_url(f"http://127.0.0.1:{args.openai_port}/stats", deadline)
+    wait_for_url(f"http://127.0.0.1:{args.port}/ready", deadline)
+    return [api, fake], api.pid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API against a fake OpenAI server")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=40, help="Events per seeded user")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--mix", default="analyze=3,events=5,latest_analysis=1,analyze_force=1", help="scenario=weight,...")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Fake OpenAI seconds per request")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--database-url", default=None, help="Database to seed and serve (default: scratch SQLite file)")
+    parser.add_argument("--base-url", default=None, help="Load an already running API instead (skips seeding and servers)")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--openai-port", type=int, default=9766)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    user_ids = bench_user_ids(args.users)
+    processes: List[subprocess.Popen] = []
+    server_pid = None
+    seeding = None
+    try:
+        if args.base_url:
+            base_url = args.base_url
+        else:
+            database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}"
+            os.environ["DATABASE_URL"] = database_url
+            from benchmarks.seed import seed
+
+            seeding = seed(args.users, args.events, reset=args.database_url is None)
+            processes, server_pid = start_servers(args, database_url)
+            base_url = f"http://127.0.0.1:{args.port}"
+
+        results = asyncio.run(generate_load(base_url, user_ids, mix, args.concurrency, args.duration, args.warmup, server_pid))
+        results["seed"] = seeding
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=30)
+
+    params = {key: value for key, value in vars(args).items() if key not in ("database_url", "output")}
+    emit("load_test", params, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
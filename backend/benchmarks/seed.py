@@ -0,0 +1,107 @@
+"""
+Benchmark Data Seeder
+Creates N users with M synthetic monthly events each, for load tests and the
+batch forecasting job. Users get stable IDs (`bench-user-<i>`), so repeated
+runs and benchmarks.load_test agree on who exists.
+
+Writes to DATABASE_URL (SQLite or Postgres) unless --database-url is given.
+--reset drops and recreates every table first. Events are inserted directly,
+so the cohort statistics and journey vectors are rebuilt afterwards.
+
+Usage:
+    python -m benchmarks.seed --users 1000 --events 40
+    python -m benchmarks.seed --users 100 --events 500 --database-url postgresql://localhost/lifelens_bench --reset
+"""
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import emit, synthetic_events
+
+
+def bench_user_ids(users: int) -> List[str]:
+    return [f"bench-user-{i}" for i in range(users)]
+
+
+def seed(users: int, events_per_user: int, reset: bool = False, chunk_size: int = 5000, random_seed: int = 0) -> Dict:
+    """Insert the users and their events with executemany batches; returns counts and timing"""
+    # Imported here so a --database-url override is in place before the engine is created
+    from sqlalchemy import delete, insert
+
+    from app.db.database import Base, SessionLocal, engine
+    from app.db.models import Analysis, AnalysisJob, ForecastState, JourneyVector, LifeEvent, User
+    from app.services.cohort_stats import rebuild_cohort_bins
+    from app.services.event_search import ensure_search_index
+    from app.services.journey_index import rebuild_journey_vectors
+
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+
+    rng = np.random.default_rng(random_seed)
+    user_ids = bench_user_ids(users)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        # Re-seeding replaces earlier benchmark users (and what was computed for them)
+        for model in (AnalysisJob, Analysis, ForecastState, JourneyVector, LifeEvent):
+            conn.execute(delete(model).where(model.user_id.in_(user_ids)))
+        conn.execute(delete(User).where(User.id.in_(user_ids)))
+        conn.execute(insert(User), [{"id": user_id, "name": f"Bench {i}", "dob": "1985-06-15"} for i, user_id in enumerate(user_ids)])
+
+    pending: List[Dict] = []
+    total = 0
+    for user_id in user_ids:
+        # Start years spread out so journeys end in the past, as entered ones do
+        start_year = 2025 - events_per_user // 12 - int(rng.integers(0, 5))
+        pending.extend({"user_id": user_id, **event} for event in synthetic_events(rng, events_per_user, start_year))
+        if len(pending) >= chunk_size:
+            with engine.begin() as conn:
+                conn.execute(insert(LifeEvent), pending)
+            total += len(pending)
+            pending = []
+    if pending:
+        with engine.begin() as conn:
+            conn.execute(insert(LifeEvent), pending)
+        total += len(pending)
+
+    elapsed = time.perf_counter() - started
+    db = SessionLocal()
+    try:
+        cohorts = rebuild_cohort_bins(db)
+        journeys = rebuild_journey_vectors(db)
+    finally:
+        db.close()
+    return {
+        "dialect": engine.dialect.name,
+        "users": users,
+        "events": total,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(total / elapsed) if elapsed else None,
+        "cohort_rebuild_seconds": cohorts["seconds"],
+        "journey_rebuild_seconds": journeys["seconds"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed synthetic users and events")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--events", type=int, default=40, help="Events per user")
+    parser.add_argument("--database-url", default=None, help="Target database (default: DATABASE_URL)")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Events per INSERT batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    results = seed(args.users, args.events, args.reset, args.chunk_size, args.seed)
+    emit("seed", {key: value for key, value in vars(args).items() if key != "database_url"}, results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Startup Benchmark
+Tracks cold-start cost of the API process:
+- time and peak RSS to `import main` (what every uvicorn worker pays)
+- the same for the scientific stack alone, for reference
+- optionally (--serve), wall time until /health and /ready answer 200
+
+Each import measurement runs in a fresh interpreter so caches do not leak
+between runs. Results print as JSON so they can be compared between commits.
+
+Usage:
+    python -m benchmarks.startup --runs 5 --serve
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.common import BACKEND_DIR, wait_for_url
+
+_IMPORT_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": elapsed, "rss_mb": rss_kb / 1024,
+                   "scientific_stack_loaded": any(m in sys.modules for m in ("statsmodels", "sklearn", "pandas"))}}))
+"""
+
+TARGETS = {
+    "api": "import main",
+    "scientific_stack": "import statsmodels.tsa.arima.model, statsmodels.tsa.holtwinters, sklearn.linear_model, pandas"
+}
+
+
+def measure_import(imports: str, runs: int) -> Dict:
+    samples: List[Dict] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE.format(imports=imports)],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [s["seconds"] for s in samples]
+    return {
+        "seconds_median": round(statistics.median(seconds), 3),
+        "seconds_min": round(min(seconds), 3),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "scientific_stack_loaded": samples[-1]["scientific_stack_loaded"]
+    }
+
+
+def measure_serve(port: int, timeout: float) -> Dict:
+    """Start uvicorn and time until /health and then /ready succeed"""
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        healthy = wait_for_url(f"http://127.0.0.1:{port}/health", deadline)
+        ready = wait_for_url(f"http://127.0.0.1:{port}/ready", deadline)
+        return {
+            "seconds_to_health": round(healthy - started, 3),
+            "seconds_to_ready": round(ready - started, 3)
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure API cold-start time and memory")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--serve", action="store_true", help="Also time a real uvicorn startup")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    results = {name: measure_import(imports, args.runs) for name, imports in TARGETS.items()}
+    if args.serve:
+        results["serve"] = measure_serve(args.port, args.timeout)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
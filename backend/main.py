@@ -1,20 +1,51 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
+import time
 import uvicorn
 
 from app.core.config import settings
-from app.api.routes import onboarding, events, analysis
-from app.db.database import engine, Base
+from app.core.instrumentation import HTTP_REQUEST_SECONDS, configure_logging, metrics
+from app.api.routes import onboarding, events, analysis, cohorts, journeys, export
+from app.db.database import engine, async_engine, Base
+from app.services.analysis_coalescer import analysis_coalescer
+from app.services.analysis_jobs import analysis_job_worker
+from app.services.cohort_stats import cohort_stats
+from app.services.event_search import ensure_search_index, event_search
+from app.services.forecast_executor import forecast_executor, warm_up_forecasting
+from app.services.insight_cache import insight_cache
+from app.services.journey_index import journey_index
+from app.services.llm_gateway import llm_gateway
+
+
+configure_logging()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    # Creates missing tables for local development; shared databases are migrated with Alembic
     Base.metadata.create_all(bind=engine)
+    # Full-text index over event descriptions (FTS5 table or tsvector column, not part of the ORM schema)
+    ensure_search_index(engine)
+    await forecast_executor.start()
+    # Load statsmodels/sklearn in the background so /health answers immediately
+    warmup_task = asyncio.create_task(warm_up_forecasting())
+    analysis_job_worker.start(settings.ANALYSIS_JOB_WORKERS)
+    # Loads cohort statistics into memory, then keeps them fresh
+    cohort_stats.start()
+    # Maps the journey vector matrix and loads the rows it is missing
+    journey_index.start()
     yield
     # Shutdown
-    pass
+    warmup_task.cancel()
+    await analysis_job_worker.stop()
+    await cohort_stats.stop()
+    await journey_index.stop()
+    await forecast_executor.shutdown()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -31,12 +62,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Analysis-Source"],
 )
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """Request latency histogram, labelled by route template so user IDs do not explode the series"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        request.method,
+        getattr(route, "path", "unmatched"),
+        str(response.status_code)
+    )
+    return response
+
+
 # Include routers
 app.include_router(onboarding.router, prefix="/api", tags=["Onboarding"])
 app.include_router(events.router, prefix="/api", tags=["Events"])
 app.include_router(analysis.router, prefix="/api", tags=["Analysis"])
+app.include_router(cohorts.router, prefix="/api", tags=["Cohorts"])
+app.include_router(journeys.router, prefix="/api", tags=["Journeys"])
+app.include_router(export.router, prefix="/api", tags=["Export"])
 
 
 @app.get("/")
@@ -53,6 +103,63 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Ready once the forecasting subsystem has finished warming up"""
+    ready = forecast_executor.warm
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "warming",
+            "forecasting": {
+                "warm": ready,
+                "warmup_seconds": forecast_executor.warmup_seconds
+            }
+        }
+    )
+
+
+def runtime_stats_snapshot() -> dict:
+    return {
+        "analysis_coalescer": analysis_coalescer.stats(),
+        "analysis_jobs": analysis_job_worker.stats(),
+        "cohort_stats": cohort_stats.stats(),
+        "event_search": event_search.stats(),
+        "forecast_executor": forecast_executor.stats(),
+        "insight_cache": insight_cache.stats(),
+        "journey_index": journey_index.stats(),
+        "llm_gateway": llm_gateway.stats()
+    }
+
+
+@app.get("/stats")
+async def runtime_stats():
+    return runtime_stats_snapshot()
+
+
+def _numeric_runtime_stats() -> dict:
+    return {
+        (component, name): float(value)
+        for component, values in runtime_stats_snapshot().items()
+        for name, value in values.items()
+        if isinstance(value, (int, float))
+    }
+
+
+metrics.gauge(
+    "lifelens_runtime_stat",
+    "Numeric /stats values (queue depths, in-flight work, cache and gateway counters)",
+    ["component", "stat"],
+    _numeric_runtime_stats
+)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage and request latency histograms, LLM/forecast counters and runtime stats (Prometheus text format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
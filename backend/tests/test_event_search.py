@@ -0,0 +1,99 @@
+import math
+import sqlite3
+import uuid
+
+import pytest
+
+from app.services.event_search import (
+    BM25_B,
+    BM25_K1,
+    MAX_QUERY_TERMS,
+    SQLITE_DDL,
+    bm25_rank,
+    build_user_index,
+    fts5_match,
+    query_terms,
+    tokenize
+)
+
+
+def test_query_terms_are_distinct_lowercase_words():
+    assert tokenize("Moved to Berlin, then moved-back!") == ["moved", "to", "berlin", "then", "moved", "back"]
+    assert query_terms("Moved to Berlin, then moved-back!") == ["moved", "to", "berlin", "then", "back"]
+    assert len(query_terms(" ".join(f"w{i}" for i in range(40)))) == MAX_QUERY_TERMS
+    assert tokenize(None) == []
+
+
+def test_bm25_single_term_matches_formula():
+    ranking = bm25_rank({"job": {1: 2}}, {1: 5}, n_docs=10, avgdl=4.0)
+    idf = math.log(1 + (10 - 1 + 0.5) / (1 + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * 5 / 4.0)
+    assert ranking == [(1, pytest.approx(idf * 2 * (BM25_K1 + 1) / (2 + norm)))]
+
+
+def test_bm25_ranks_rarer_and_more_terms_first():
+    postings = {
+        "common": {1: 1, 2: 1, 3: 1, 4: 1},
+        "rare": {2: 1, 5: 1}
+    }
+    lengths = {event_id: 3 for event_id in range(1, 6)}
+    ranking = [event_id for event_id, _ in bm25_rank(postings, lengths, n_docs=10, avgdl=3.0)]
+    # Both terms, then the rare term alone, then the common term alone (ties by id)
+    assert ranking == [2, 5, 1, 3, 4]
+
+
+def test_bm25_prefers_shorter_documents():
+    ranking = bm25_rank({"move": {1: 1, 2: 1}}, {1: 20, 2: 2}, n_docs=5, avgdl=10.0)
+    assert [event_id for event_id, _ in ranking] == [2, 1]
+
+
+def test_bm25_without_matches_or_lengths():
+    assert bm25_rank({"missing": {}}, {}, n_docs=0, avgdl=0.0) == []
+    assert bm25_rank({"a": {1: 1}}, {1: 0}, n_docs=1, avgdl=0.0)[0][0] == 1
+
+
+def test_build_user_index_counts_both_columns():
+    index = build_user_index(("fp",), [(1, "New job", "Started a new job"), (2, "Moved", None)])
+    assert index.postings["job"] == {1: 2}
+    assert index.postings["moved"] == {2: 1}
+    assert index.lengths == {1: 6, 2: 1}
+    assert index.avgdl == 3.5
+
+
+@pytest.fixture
+def fts():
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE life_events (id INTEGER PRIMARY KEY, user_id TEXT, description TEXT, rephrased_description TEXT)"
+    )
+    for statement in SQLITE_DDL:
+        connection.execute(statement)
+    yield connection
+    connection.close()
+
+
+def _match(connection, user_id, terms):
+    return sorted(row[0] for row in connection.execute(
+        "SELECT rowid FROM life_events_fts WHERE life_events_fts MATCH ?", (fts5_match(user_id, terms),)
+    ))
+
+
+def test_fts5_match_quotes_uuid_user_ids(fts):
+    alice, bob = str(uuid.uuid4()), str(uuid.uuid4())
+    fts.executemany("INSERT INTO life_events VALUES (?, ?, ?, ?)", [
+        (1, alice, "Started a new job", None),
+        (2, alice, "Moved abroad", "Relocated for the new job"),
+        (3, bob, "New job in Berlin", None)
+    ])
+    assert _match(fts, alice, ["job"]) == [1, 2]
+    assert _match(fts, alice, ["abroad", "berlin"]) == [2]
+    assert _match(fts, bob, ["job"]) == [3]
+
+
+def test_fts5_match_escapes_quotes_and_operators(fts):
+    user_id = 'odd"id OR x'
+    fts.execute("INSERT INTO life_events VALUES (1, ?, 'Graduated AND celebrated', NULL)", (user_id,))
+    # FTS5 keywords are searched as words, and a quote inside a phrase is escaped
+    assert _match(fts, user_id, ["and"]) == [1]
+    assert _match(fts, user_id, ["near", "or"]) == []
+    assert _match(fts, user_id, ['celebrated"']) == [1]
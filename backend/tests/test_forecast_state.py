@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.forecast_state import (
+    _ets_step,
+    _ols_add,
+    _ols_predict,
+    _ols_sums,
+    decimal_year,
+    full_refit,
+    update_statistical_forecast
+)
+from app.services.prediction_service import SeriesPoint, linear_trend_fast
+
+
+def _points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # A noisy upward trend, one event a year
+    scores = np.clip(0.2 * np.arange(n) - 3 + rng.normal(0, 0.3, n), -10, 10)
+    return [
+        SeriesPoint(year=1990 + i, month=int(rng.integers(1, 13)), score=float(scores[i]), id=i + 1)
+        for i in range(n)
+    ]
+
+
+def test_incremental_ols_sums_match_a_full_fit():
+    points = _points(30)
+    years = np.array([decimal_year(p) for p in points])
+    scores = np.array([p.score for p in points])
+
+    sums = _ols_sums(years[:10], scores[:10], x0=float(years[0]))
+    for year, score in zip(years[10:], scores[10:]):
+        _ols_add(sums, float(year), float(score))
+    full = _ols_sums(years, scores, x0=float(years[0]))
+
+    for key in ("n", "sx", "sy", "sxx", "sxy"):
+        assert sums[key] == pytest.approx(full[key])
+    future = [2025, 2026, 2027]
+    np.testing.assert_allclose(_ols_predict(sums, future), linear_trend_fast(years, scores, future))
+
+
+def test_ols_predict_with_a_single_point_is_flat():
+    sums = _ols_sums(np.array([2000.5]), np.array([3.0]), x0=2000.5)
+    np.testing.assert_allclose(_ols_predict(sums, [2001, 2002]), [3.0, 3.0])
+
+
+def test_ets_step_is_the_holt_recursion():
+    ets = {"alpha": 0.5, "beta": 0.2, "level": 1.0, "trend": 0.5}
+    _ets_step(ets, 2.0)
+    assert ets["level"] == pytest.approx(0.5 * 2.0 + 0.5 * 1.5)
+    assert ets["trend"] == pytest.approx(0.2 * (1.75 - 1.0) + 0.8 * 0.5)
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    monkeypatch.setattr(settings, "FORECAST_DRIFT_SIGMA", 1000.0)
+    monkeypatch.setattr(settings, "FORECAST_ARIMA_REFIT_EVERY", 1000)
+    monkeypatch.setattr(settings, "FORECAST_MAX_INCREMENTAL_APPENDS", 50)
+
+
+def test_appends_update_the_state_incrementally(incremental):
+    points = _points(25)
+    _, state = full_refit(points[:20])
+
+    forecast, new_state, mode = update_statistical_forecast(points, state, engine="full")
+    assert mode == "incremental"
+    assert new_state["n"] == 25
+    assert len(forecast) == 5
+
+    years = np.array([decimal_year(p) for p in points])
+    scores = np.array([p.score for p in points])
+    full = _ols_sums(years, scores, x0=state["ols"]["x0"])
+    for key in ("n", "sx", "sy", "sxx", "sxy"):
+        assert new_state["ols"][key] == pytest.approx(full[key])
+    # The stored state is copied, not updated in place
+    assert state["ols"]["n"] == 20
+
+
+def test_incremental_trend_matches_a_full_refit(incremental):
+    points = _points(25)
+    _, state = full_refit(points[:20])
+    _, incremental_state, _ = update_statistical_forecast(points, state, engine="full")
+    _, refit_state = full_refit(points)
+
+    future = [2020, 2021]
+    np.testing.assert_allclose(_ols_predict(incremental_state["ols"], future), _ols_predict(refit_state["ols"], future))
+
+
+def test_changes_other_than_appends_refit(incremental):
+    points = _points(25)
+    _, state = full_refit(points[:20])
+
+    assert update_statistical_forecast(points[:19], state, engine="full")[2] == "full"
+    edited = points[:5] + [points[5]._replace(score=points[5].score + 1)] + points[6:]
+    assert update_statistical_forecast(edited, state, engine="full")[2] == "full"
+    backdated = points[:20] + [SeriesPoint(year=1991, month=1, score=0.0, id=99)]
+    assert update_statistical_forecast(backdated, state, engine="full")[2] == "full"
+
+
+def test_fast_engine_keeps_no_state():
+    forecast, state, mode = update_statistical_forecast(_points(10), None, engine="fast")
+    assert (mode, state) == ("fast", None)
+    assert len(forecast) == 5
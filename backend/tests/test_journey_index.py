@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.journey_index import DIM, JourneyIndex
+
+
+def _rows(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [(i, f"user-{i}", vectors[i].tobytes()) for i in range(n)], vectors
+
+
+@pytest.fixture
+def index(tmp_path):
+    return JourneyIndex(str(tmp_path / "journeys.f32"))
+
+
+def test_exact_search_below_matrix_capacity(index, monkeypatch):
+    monkeypatch.setattr(settings, "JOURNEY_IVF_LISTS", 0)
+    rows, vectors = _rows(3)
+    index.store(rows)
+    assert index.stats()["capacity"] > index.stats()["rows"]
+
+    matches = index.similar("user-0", k=5)
+    assert index.search_method == "exact"
+    assert sorted(match.row for match in matches) == [1, 2]
+    expected = sorted((float(vectors[0] @ vectors[i]) for i in (1, 2)), reverse=True)
+    assert [match.similarity for match in matches] == [round(score, 4) for score in expected]
+
+
+def test_exact_search_skips_cleared_rows(index, monkeypatch):
+    monkeypatch.setattr(settings, "JOURNEY_IVF_LISTS", 0)
+    rows, _ = _rows(4)
+    index.store(rows)
+    index.store([(2, "user-2", None)])
+
+    assert sorted(match.row for match in index.similar("user-0", k=5)) == [1, 3]
+    assert index.similar("user-2", k=5) is None
+
+
+def test_ivf_search_below_matrix_capacity(index, monkeypatch):
+    monkeypatch.setattr(settings, "JOURNEY_IVF_LISTS", 2)
+    monkeypatch.setattr(settings, "JOURNEY_IVF_PROBES", 2)
+    rows, vectors = _rows(100)
+    index.store(rows)
+    assert index.search_method == "ivf"
+    assert index.stats()["capacity"] > index.stats()["rows"]
+
+    # Probing every list scores every row, so the result matches exact search
+    matches = index.similar("user-0", k=5)
+    scores = vectors[1:] @ vectors[0]
+    assert [match.row for match in matches] == list(np.argsort(-scores)[:5] + 1)
@@ -0,0 +1,83 @@
+import json
+import random
+
+import pytest
+
+from app.services.json_stream import JsonObjectStream
+
+DOCUMENT = {
+    "summary": "She said \"it's over\" \\ and left {for good}",
+    "phases": [{"name": "Early [years]", "score": 3.5}, {"name": "Now", "score": -2}],
+    "count": 42,
+    "ratio": -0.125,
+    "flags": [True, False, None],
+    "nested": {"a": {"b": [1, [2, {"c": "}]"}]]}},
+    "empty": {},
+    "unicode": "café – 😀",
+    "last": None
+}
+
+
+def _feed(chunks):
+    stream = JsonObjectStream()
+    pairs = []
+    for chunk in chunks:
+        pairs.extend(stream.feed(chunk))
+    return stream, pairs
+
+
+def _split(text, seed):
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(text)), 20))
+    return [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+
+
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_one_character_at_a_time(ensure_ascii):
+    text = json.dumps(DOCUMENT, ensure_ascii=ensure_ascii)
+    stream, pairs = _feed(text)
+    assert pairs == list(DOCUMENT.items())
+    assert stream.close() == DOCUMENT
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunk_boundaries(seed):
+    text = json.dumps(DOCUMENT, indent=2)
+    stream, pairs = _feed(_split(text, seed))
+    assert pairs == list(DOCUMENT.items())
+    assert stream.close() == DOCUMENT
+
+
+def test_every_split_point_through_escapes():
+    document = {"quote": 'a "b\\" c\\', "brace": "}", "next": 1}
+    text = json.dumps(document)
+    for cut in range(1, len(text)):
+        stream, pairs = _feed([text[:cut], text[cut:]])
+        assert pairs == list(document.items()), cut
+
+
+def test_pairs_are_returned_as_soon_as_complete():
+    stream = JsonObjectStream()
+    assert stream.feed('{"first": {"x": 1}') == []
+    assert stream.feed(', "second": 2') == [("first", {"x": 1})]
+    assert stream.feed("}") == [("second", 2)]
+    assert stream.done
+
+
+def test_text_after_the_object_is_ignored():
+    stream, pairs = _feed(['{"a": 1} trailing', ' {"b": 2}'])
+    assert pairs == [("a", 1)]
+    assert stream.close() == {"a": 1}
+
+
+def test_incomplete_object_raises_on_close():
+    stream, pairs = _feed(['{"a": 1, "b": "unterminated'])
+    assert pairs == [("a", 1)]
+    with pytest.raises(ValueError):
+        stream.close()
+
+
+def test_buffer_does_not_keep_consumed_text():
+    stream = JsonObjectStream()
+    stream.feed('{"a": "' + "x" * 10000 + '", ')
+    assert len(stream._buffer) < 10
@@ -275,6 +275,9 @@ export default function InsightCards({ insights, personalizedPlan }: InsightCard
                   <div className="grid grid-cols-2 gap-2 text-xs">
                     <div>
                       <p className="text-blue-400">Math: {item.statistical.score}</p>
+                      {item.statistical.lower != null && item.statistical.upper != null && (
+                        <p className="text-white/40">80%: {item.statistical.lower} to {item.statistical.upper}</p>
+                      )}
                     </div>
                     <div>
                       <p className="text-purple-400">AI: {item.intuitive.score}</p>